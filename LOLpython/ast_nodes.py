@@ -1,55 +1,158 @@
-from dataclasses import dataclass
-from typing import Any, List, Optional
+from dataclasses import dataclass, field, fields
+from typing import Any, Dict, List, Optional
 
-@dataclass
-class ASTNode: pass
-@dataclass
+@dataclass(slots=True)
+class ASTNode:
+    # Source position of the first token; set by the parser on statements and definitions.
+    line: Optional[int] = field(default=None, kw_only=True, repr=False, compare=False)
+    column: Optional[int] = field(default=None, kw_only=True, repr=False, compare=False)
+@dataclass(slots=True)
 class ExpressionNode(ASTNode): pass
-@dataclass
+@dataclass(slots=True)
 class LiteralNode(ExpressionNode): value: Any
-@dataclass
-class IdentifierNode(ExpressionNode): name: str
-@dataclass
-class BinaryOpNode(ExpressionNode): left: ExpressionNode; op: str; right: ExpressionNode
-@dataclass
+@dataclass(slots=True)
+class IdentifierNode(ExpressionNode):
+    name: str
+    # Lexical address filled in by resolver.Resolver: depth 0 is the current frame, 1 the globals.
+    depth: Optional[int] = field(default=None, repr=False, compare=False)
+    slot: Optional[int] = field(default=None, repr=False, compare=False)
+@dataclass(slots=True)
+class BinaryOpNode(ExpressionNode):
+    left: ExpressionNode
+    op: str
+    right: ExpressionNode
+    # Set by Interpreter after an evaluation: (left type, right type, operation, times specialised).
+    quick: Optional[tuple] = field(default=None, repr=False, compare=False)
+@dataclass(slots=True)
 class FuncCallNode(ExpressionNode): callee: ExpressionNode; args: List[ExpressionNode]
-@dataclass
+@dataclass(slots=True)
+class BuiltinCallNode(ExpressionNode): name: str; args: List[ExpressionNode]
+@dataclass(slots=True)
 class NewInstanceNode(ExpressionNode): class_name: IdentifierNode
-@dataclass
+@dataclass(slots=True)
 class MemberAccessNode(ExpressionNode): object: ExpressionNode; member: IdentifierNode
-@dataclass
+@dataclass(slots=True)
 class MeNode(ExpressionNode): pass
-@dataclass
+@dataclass(slots=True)
 class BukkitNode(ExpressionNode): pass
-@dataclass
+@dataclass(slots=True)
 class BukkitAccessNode(ExpressionNode):
     bukkit: ExpressionNode
     index: ExpressionNode
-@dataclass
+@dataclass(slots=True)
 class MaekNode(ExpressionNode):
     target: ExpressionNode
     target_type: str
-@dataclass
+# SMOOSH a AN b ... MKAY, and YARN literals with :{name} in them.
+@dataclass(slots=True)
+class SmooshNode(ExpressionNode): parts: List[ExpressionNode]
+# GIMMEH x is parsed as x R GimmehNode(): the next line of input, or NOOB after the last one.
+@dataclass(slots=True)
+class GimmehNode(ExpressionNode): pass
+@dataclass(slots=True)
+class NoMoarNode(ExpressionNode): pass
+@dataclass(slots=True)
 class StatementNode(ASTNode): pass
-@dataclass
-class ProgramNode(ASTNode): statements: List[StatementNode]
-@dataclass
-class VarDeclNode(StatementNode): name: str; initializer: Optional[ExpressionNode]
-@dataclass
+@dataclass(slots=True)
+class ProgramNode(ASTNode):
+    statements: List[StatementNode]
+    layout: Optional[Dict[str, int]] = field(default=None, repr=False, compare=False)
+@dataclass(slots=True)
+class VarDeclNode(StatementNode):
+    name: str
+    initializer: Optional[ExpressionNode]
+    slot: Optional[int] = field(default=None, repr=False, compare=False)
+@dataclass(slots=True)
 class AssignmentNode(StatementNode): target: ExpressionNode; expression: ExpressionNode
-@dataclass
+@dataclass(slots=True)
 class VisibleNode(StatementNode): expressions: List[ExpressionNode]
-@dataclass
-class FuncDefNode(StatementNode): name: str; params: List[IdentifierNode]; body: List[StatementNode]
-@dataclass
+@dataclass(slots=True)
+class FuncDefNode(StatementNode):
+    name: str
+    params: List[IdentifierNode]
+    body: List[StatementNode]
+    layout: Optional[Dict[str, int]] = field(default=None, repr=False, compare=False)
+    # Set by purity.mark_pure_functions when calls may be answered from a MemoTable,
+    # along with the pure functions this one reads, which PARMAP ships with it.
+    pure: bool = field(default=False, repr=False, compare=False)
+    pure_callees: Optional[List['FuncDefNode']] = field(default=None, repr=False, compare=False)
+@dataclass(slots=True)
 class ReturnNode(StatementNode): value: Optional[ExpressionNode]
-@dataclass
+@dataclass(slots=True)
 class IfNode(StatementNode):
     condition: ExpressionNode
     if_block: List[StatementNode]
     else_block: Optional[List[StatementNode]]
-@dataclass
+@dataclass(slots=True)
 class ClassDefNode(StatementNode):
     name: str
     methods: List[FuncDefNode]
     properties: List[VarDeclNode]
+@dataclass(slots=True)
+class LoopNode(StatementNode):
+    label: str
+    update: Optional[str]            # 'UPPIN', 'NERFIN' or None
+    var: Optional[IdentifierNode]
+    condition_kind: Optional[str]    # 'TIL', 'WILE' or None
+    condition: Optional[ExpressionNode]
+    body: List[StatementNode]
+    # Whether the body declares names, so that every iteration needs a fresh Scope; see loop_is_scoped.
+    scoped: Optional[bool] = field(default=None, repr=False, compare=False)
+@dataclass(slots=True)
+class BreakNode(StatementNode): pass
+
+
+def iter_child_nodes(node):
+    for f in fields(node):
+        value = getattr(node, f.name)
+        if isinstance(value, ASTNode):
+            yield value
+        elif isinstance(value, list):
+            for item in value:
+                if isinstance(item, ASTNode):
+                    yield item
+
+
+def _declares(statements):
+    for stmt in statements:
+        if isinstance(stmt, (VarDeclNode, FuncDefNode, ClassDefNode)):
+            return True
+        if isinstance(stmt, IfNode) and (_declares(stmt.if_block) or _declares(stmt.else_block or ())):
+            return True
+        if isinstance(stmt, LoopNode) and _declares(stmt.body):
+            return True
+    return False
+
+
+def loop_is_scoped(node: LoopNode):
+    # A body that declares names runs in a new Scope per iteration, so that I HAS A
+    # does not fail on the second pass; other bodies run in the enclosing scope.
+    if node.scoped is None:
+        node.scoped = _declares(node.body)
+    return node.scoped
+
+
+def count_nodes(node):
+    count, pending = 0, [node]
+    while pending:
+        count += 1
+        pending.extend(iter_child_nodes(pending.pop()))
+    return count
+
+
+def dump(node, indent=0):
+    pad = '  ' * indent
+    if isinstance(node, list):
+        return '\n'.join(dump(item, indent) for item in node) if node else f"{pad}[]"
+    if not isinstance(node, ASTNode):
+        return f"{pad}{node!r}"
+    shown = [f for f in fields(node) if f.repr]
+    simple = [f"{f.name}={getattr(node, f.name)!r}" for f in shown
+              if not isinstance(getattr(node, f.name), (ASTNode, list))]
+    lines = [f"{pad}{type(node).__name__}({', '.join(simple)})"]
+    for f in shown:
+        value = getattr(node, f.name)
+        if isinstance(value, (ASTNode, list)):
+            lines.append(f"{pad}  {f.name}:")
+            lines.append(dump(value, indent + 2))
+    return '\n'.join(lines)
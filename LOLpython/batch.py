@@ -0,0 +1,92 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+from .parallel import map_serially
+
+
+@dataclass
+class ScriptResult:
+    path: str
+    status: int
+    stdout: str
+    stderr: str
+    elapsed: float
+
+
+def find_scripts(directory):
+    scripts = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs if name != '__lolcache__')
+        scripts.extend(os.path.join(root, name) for name in sorted(files) if name.endswith('.lol'))
+    return scripts
+
+
+def _warm_up():
+    # Workers import the interpreter once, before the first script arrives.
+    from . import main  # noqa: F401
+    # The workers already keep the CPUs busy, and a pool per worker would deadlock.
+    map_serially()
+
+
+def run_script(args, path):
+    # main imports this module, so it is only imported here, in the worker.
+    from .main import run_file
+    script_args = argparse.Namespace(**vars(args))
+    script_args.filepath = path
+    stdout, stderr = io.StringIO(), io.StringIO()
+    start = time.perf_counter()
+    # A fresh Interpreter is created by run_file; the default StreamSink writes
+    # to whatever sys.stdout is when it flushes, i.e. to the captured stream.
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        status = run_file(script_args)
+    return ScriptResult(path, status, stdout.getvalue(), stderr.getvalue(), time.perf_counter() - start)
+
+
+def _write_output(output_dir, directory, result):
+    base = os.path.join(output_dir, os.path.relpath(result.path, directory))
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    for suffix, text in (('.stdout', result.stdout), ('.stderr', result.stderr)):
+        with open(base + suffix, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+
+# Runs every script under `directory` with the options in `args` on `jobs`
+# worker processes, prints one line per script and a summary, and returns 1
+# if any script failed.
+def run_batch(args, directory, jobs=None, output_dir=None):
+    scripts = find_scripts(directory)
+    if not scripts:
+        print(f"Error: No .lol scripts found in '{directory}'")
+        return 1
+    jobs = jobs or os.cpu_count() or 1
+    # Hand scripts out in chunks, so that thousands of short scripts do not
+    # pay a round trip to the pool each.
+    chunksize = max(1, min(64, len(scripts) // (jobs * 8)))
+    failed = 0
+    script_time = 0.0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_warm_up) as executor:
+        for result in executor.map(partial(run_script, args), scripts, chunksize=chunksize):
+            script_time += result.elapsed
+            if output_dir:
+                _write_output(output_dir, directory, result)
+            if result.status:
+                failed += 1
+                print(f"FAIL {result.elapsed:8.3f}s  {result.path}")
+                for line in (result.stderr or result.stdout).splitlines()[-5:]:
+                    print(f"    {line}")
+            else:
+                print(f"ok   {result.elapsed:8.3f}s  {result.path}")
+            sys.stdout.flush()
+    elapsed = time.perf_counter() - start
+    print(f"{len(scripts)} scripts: {len(scripts) - failed} passed, {failed} failed "
+          f"in {elapsed:.2f}s on {jobs} workers ({script_time:.2f}s running scripts, "
+          f"{len(scripts) / elapsed:.1f} scripts/s)")
+    return 1 if failed else 0
@@ -0,0 +1,200 @@
+import operator
+from array import array
+
+from .errors import InterpreterError
+
+# An assignment this far past the end of a BUKKIT switches it to sparse storage
+# instead of filling the gap with NOOBs.
+SPARSE_GAP = 1024
+
+# BUKKITs holding only NUMBRs or only NUMBARs are stored in an array of machine values.
+_TYPECODES = {int: 'q', float: 'd'}
+
+
+def _to_array(values):
+    if values:
+        cls = values[0].__class__
+        typecode = _TYPECODES.get(cls)
+        if typecode is not None and all(value.__class__ is cls for value in values):
+            try:
+                return array(typecode, values)
+            except OverflowError:
+                pass
+    return values
+
+
+class Bukkit:
+    # `items` is a list, an array('q') of NUMBRs, an array('d') of NUMBARs, or a
+    # dict of index -> item for sparse BUKKITs, whose length is kept in `size`.
+    # Indices that hold nothing read as NOOB.
+    __slots__ = ('items', 'size')
+
+    def __init__(self, items=None):
+        self.items = [] if items is None else items
+        self.size = 0
+
+    @classmethod
+    def from_values(cls, values):
+        return cls(_to_array(list(values)))
+
+    @property
+    def storage(self):
+        items = self.items
+        if items.__class__ is dict:
+            return 'sparse'
+        if items.__class__ is array:
+            return f'array({items.typecode})'
+        return 'list'
+
+    def __len__(self):
+        items = self.items
+        return self.size if items.__class__ is dict else len(items)
+
+    def __iter__(self):
+        items = self.items
+        if items.__class__ is dict:
+            return map(items.get, range(self.size))
+        return iter(items)
+
+    def __eq__(self, other):
+        if not isinstance(other, Bukkit):
+            return NotImplemented
+        return len(self) == len(other) and all(map(operator.eq, self, other))
+
+    __hash__ = None
+
+    def get(self, index):
+        items = self.items
+        if items.__class__ is dict:
+            return items.get(index)
+        return items[index] if 0 <= index < len(items) else None
+
+    def set(self, index, value):
+        items = self.items
+        length = len(self)
+        if index < 0:
+            index += length
+            if index < 0:
+                raise IndexError("list assignment index out of range")
+        if items.__class__ is dict:
+            items[index] = value
+            if index >= length:
+                self.size = index + 1
+            return
+        if index - length > SPARSE_GAP:
+            self.items = {i: item for i, item in enumerate(items) if item is not None}
+            self.size = length
+            self.set(index, value)
+            return
+        if items.__class__ is array:
+            if value.__class__ is (int if items.typecode == 'q' else float) and index <= length:
+                try:
+                    if index == length:
+                        items.append(value)
+                    else:
+                        items[index] = value
+                    return
+                except OverflowError:
+                    pass
+            items = self.items = items.tolist()
+        elif not items and index == 0 and value.__class__ in _TYPECODES:
+            self.items = _to_array([value])
+            return
+        if index >= length:
+            items.extend([None] * (index - length))
+            items.append(value)
+        else:
+            items[index] = value
+
+    def __str__(self):
+        return f"[BUKKIT of {len(self)} items]"
+
+
+def _expect_bukkit(name, value):
+    if not isinstance(value, Bukkit):
+        raise InterpreterError(f"{name} requires a BUKKIT, but got {type(value)}")
+    return value
+
+
+def _numbers(name, bukkit):
+    items = _expect_bukkit(name, bukkit).items
+    if items.__class__ is array:
+        return items
+    values = list(bukkit)
+    for value in values:
+        if not isinstance(value, (int, float)):
+            raise InterpreterError(f"{name} requires a BUKKIT of NUMBRs, but it holds {type(value)}")
+    return values
+
+
+def _sumz(bukkit):
+    return sum(_numbers('SUMZ', bukkit))
+
+
+def _biggest(bukkit):
+    values = _numbers('BIGGEST', bukkit)
+    return max(values) if len(values) else None
+
+
+def _smallest(bukkit):
+    values = _numbers('SMALLEST', bukkit)
+    return min(values) if len(values) else None
+
+
+def _slyce(bukkit, start, end):
+    _expect_bukkit('SLYCE', bukkit)
+    if not isinstance(start, int) or not isinstance(end, int):
+        raise InterpreterError("BUKKIT index must be a NUMBR.")
+    length = len(bukkit)
+    start, end = min(max(start, 0), length), min(max(end, 0), length)
+    items = bukkit.items
+    if items.__class__ is dict:
+        return Bukkit.from_values(map(items.get, range(start, end)))
+    return Bukkit(items[start:end])
+
+
+def _quoshunt(left_val, right_val):
+    if right_val == 0: raise InterpreterError("Division by zero")
+    return left_val / right_val
+
+
+_ZIP_OPS = {
+    'SUM OF': operator.add,
+    'DIFF OF': operator.sub,
+    'PRODUKT OF': operator.mul,
+    'QUOSHUNT OF': _quoshunt,
+    'BOTH SAEM': operator.eq,
+    'DIFFRINT': operator.ne,
+}
+
+
+def _zipwif(op, left, right):
+    operation = _ZIP_OPS.get(op)
+    if operation is None:
+        raise InterpreterError(f"ZIPWIF needs one of {', '.join(_ZIP_OPS)}, but got {op!r}")
+    _expect_bukkit('ZIPWIF', left)
+    _expect_bukkit('ZIPWIF', right)
+    if len(left) != len(right):
+        raise InterpreterError(f"ZIPWIF needs BUKKITs of the same length, but got {len(left)} and {len(right)}")
+    if operation is operator.eq or operation is operator.ne:
+        return Bukkit(list(map(operation, left, right)))
+    return Bukkit.from_values(map(operation, _numbers('ZIPWIF', left), _numbers('ZIPWIF', right)))
+
+
+def _parmap(call, function, bukkit):
+    # parallel.py runs interpreters, which import this module.
+    from .parallel import parmap
+    return parmap(call, function, bukkit)
+
+
+# Built-in functions called as `NAME YR arg AN YR arg ...`: name -> (function, argument count).
+BUILTINS = {
+    'SUMZ': (_sumz, 1),
+    'BIGGEST': (_biggest, 1),
+    'SMALLEST': (_smallest, 1),
+    'SLYCE': (_slyce, 3),
+    'ZIPWIF': (_zipwif, 3),
+    'PARMAP': (_parmap, 2),
+}
+# Builtins that call LOL functions; they get the call_function of the backend running them first.
+CALLING_BUILTINS = frozenset({'PARMAP'})
@@ -0,0 +1,373 @@
+from array import array
+
+from . import ast_nodes as ast
+from .interpreter import LOLClass
+
+# Instructions are (opcode, argument) pairs of ints in CodeObject.instructions;
+# jump targets are indices into that array.
+OPNAMES = (
+    'NOP',
+    'LOAD_CONST',         # push consts[arg]
+    'LOAD_NAME',          # push variable names[arg]
+    'LOAD_ME',            # push the current instance
+    'AUTOCALL',           # call TOS if it is a callable without parameters
+    'CHECK_UNDECLARED',   # fail if names[arg] is already declared in the current scope
+    'DEFINE_NAME',        # pop a value into names[arg] of the current scope
+    'STORE_NAME',         # pop a value into the nearest scope declaring names[arg]
+    'BINARY',             # pop right, left; push BINARY_OPS[arg](left, right)
+    'POP_JUMP_IF_FALSE',  # pop a condition; jump to arg if it is FAIL or NOOB
+    'POP_JUMP_IF_TRUE',   # pop a condition; jump to arg unless it is FAIL or NOOB
+    'JUMP',               # jump to arg
+    'POP',                # discard TOS
+    'ENTER_SCOPE',        # run a loop iteration in a new scope nested in the current one
+    'EXIT_SCOPE',         # return to the parent of the current scope
+    'PRINT',              # pop arg values and print them on one line
+    'SMOOSH',             # pop arg values; push them joined as a YARN
+    'READ_LINE',          # push the next line of input, NOOB after the last one
+    'AT_END_OF_INPUT',    # push whether the input is exhausted
+    'BUILD_BUKKIT',       # push an empty BUKKIT
+    'CHECK_BUKKIT',       # fail unless TOS is a BUKKIT (arg 1: assignment message)
+    'BUKKIT_GET',         # pop index, bukkit; push the item
+    'BUKKIT_SET',         # pop index, bukkit, value; store the item
+    'GET_MEMBER',         # pop an instance; push its property or bound method names[arg]
+    'SET_MEMBER',         # pop instance, value; store property names[arg]
+    'MAEK',               # pop a value; push it cast to type consts[arg]
+    'NEW_INSTANCE',       # push a new instance of class names[arg] and run its initializer
+    'INIT_FIELD',         # pop a value into property names[arg] of the instance below it
+    'CHECK_CALL',         # check that TOS is callable with consts[arg] = (name, argument count)
+    'CALL_BUILTIN',       # pop the arguments of built-in consts[arg] = (name, argument count); push its result
+    'CALL',               # pop arg arguments and a callable; push a frame for it
+    'RETURN',             # pop a value and return it to the calling frame
+    'TAIL_CALL',          # like CALL, but the new frame replaces the current one
+    'RAISE',              # raise InterpreterError(consts[arg])
+    'HALT',               # end of the program
+)
+(
+    NOP, LOAD_CONST, LOAD_NAME, LOAD_ME, AUTOCALL, CHECK_UNDECLARED, DEFINE_NAME, STORE_NAME, BINARY,
+    POP_JUMP_IF_FALSE, POP_JUMP_IF_TRUE, JUMP, POP, ENTER_SCOPE, EXIT_SCOPE, PRINT, SMOOSH, READ_LINE,
+    AT_END_OF_INPUT, BUILD_BUKKIT, CHECK_BUKKIT, BUKKIT_GET, BUKKIT_SET, GET_MEMBER, SET_MEMBER, MAEK,
+    NEW_INSTANCE, INIT_FIELD, CHECK_CALL, CALL_BUILTIN, CALL, RETURN, TAIL_CALL, RAISE, HALT,
+) = range(len(OPNAMES))
+
+BINARY_OPS = ('SUM_OF', 'DIFF_OF', 'PRODUKT_OF', 'QUOSHUNT_OF', 'BOTH_SAEM', 'DIFFRINT')
+
+_HAS_CONST = {LOAD_CONST, MAEK, CHECK_CALL, CALL_BUILTIN, RAISE}
+_HAS_NAME = {LOAD_NAME, CHECK_UNDECLARED, DEFINE_NAME, STORE_NAME, GET_MEMBER, SET_MEMBER, NEW_INSTANCE, INIT_FIELD}
+_HAS_JUMP = {POP_JUMP_IF_FALSE, POP_JUMP_IF_TRUE, JUMP}
+
+
+class CodeObject:
+    __slots__ = ('name', 'kind', 'instructions', 'consts', 'names')
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.instructions = array('i')
+        self.consts = []
+        self.names = []
+
+    def __repr__(self):
+        return f"<code {self.kind} {self.name}>"
+
+
+class CompiledProgram:
+    def __init__(self, module, functions, classes):
+        self.module = module
+        self.functions = functions  # id(FuncDefNode) -> CodeObject
+        self.classes = classes      # id(ClassDefNode) -> CodeObject of the property initializers
+
+    def code_objects(self):
+        yield self.module
+        yield from self.functions.values()
+        yield from self.classes.values()
+
+
+class Compiler:
+    def __init__(self):
+        self.functions = {}
+        self.classes = {}
+        self._code = None
+        self._const_index = None
+        self._name_index = None
+        self._loops = []  # (scoped, positions of the JUMPs GTFO emitted) of each enclosing loop
+
+    def compile(self, program: ast.ProgramNode) -> CompiledProgram:
+        module = self._compile_code('<module>', 'module', program.statements, HALT)
+        return CompiledProgram(module, self.functions, self.classes)
+
+    def _compile_code(self, name, kind, statements, terminator):
+        saved = self._code, self._const_index, self._name_index, self._loops
+        self._code, self._const_index, self._name_index, self._loops = CodeObject(name, kind), {}, {}, []
+        try:
+            for stmt in statements:
+                self._compile_statement(stmt)
+            if terminator == RETURN:
+                self._emit(LOAD_CONST, self._const(None))
+            self._emit(terminator)
+            return self._code
+        finally:
+            self._code, self._const_index, self._name_index, self._loops = saved
+
+    def _emit(self, op, arg=0):
+        self._code.instructions.extend((op, arg))
+        return len(self._code.instructions) - 2
+
+    def _patch(self, position, target=None):
+        instructions = self._code.instructions
+        instructions[position + 1] = len(instructions) if target is None else target
+
+    def _const(self, value):
+        consts = self._code.consts
+        try:
+            # repr keeps 0.0 and -0.0 apart; they compare equal but print differently
+            key = (type(value), repr(value) if type(value) is float else value)
+            index = self._const_index.get(key)
+        except TypeError:
+            key = index = None
+        if index is None:
+            index = len(consts)
+            consts.append(value)
+            if key is not None:
+                self._const_index[key] = index
+        return index
+
+    def _name(self, name):
+        index = self._name_index.get(name)
+        if index is None:
+            index = self._name_index[name] = len(self._code.names)
+            self._code.names.append(name)
+        return index
+
+    def _compile_statement(self, node):
+        if isinstance(node, ast.StatementNode):
+            self._compile(node)
+        else:
+            self._compile(node)
+            self._emit(POP)
+
+    def _compile(self, node):
+        method_name = f'_compile_{type(node).__name__}'
+        getattr(self, method_name, self._generic_compile)(node)
+
+    def _compile_value(self, node):
+        self._compile(node)
+        if isinstance(node, (ast.IdentifierNode, ast.MemberAccessNode, ast.FuncCallNode, ast.BukkitAccessNode)):
+            self._emit(AUTOCALL)
+
+    def _generic_compile(self, node):
+        self._emit(RAISE, self._const(f"No _visit_{type(node).__name__} method"))
+
+    def _compile_LiteralNode(self, node: ast.LiteralNode):
+        self._emit(LOAD_CONST, self._const(node.value))
+
+    def _compile_IdentifierNode(self, node: ast.IdentifierNode):
+        self._emit(LOAD_NAME, self._name(node.name))
+
+    def _compile_MeNode(self, node: ast.MeNode):
+        self._emit(LOAD_ME)
+
+    def _compile_BukkitNode(self, node: ast.BukkitNode):
+        self._emit(BUILD_BUKKIT)
+
+    def _compile_BinaryOpNode(self, node: ast.BinaryOpNode):
+        self._compile_value(node.left)
+        self._compile_value(node.right)
+        if node.op in BINARY_OPS:
+            self._emit(BINARY, BINARY_OPS.index(node.op))
+        else:
+            self._emit(RAISE, self._const(f"Unknown binary operator: {node.op}"))
+
+    def _compile_FuncCallNode(self, node: ast.FuncCallNode, op=CALL):
+        self._compile(node.callee)
+        name = getattr(node.callee, 'name', '[unknown]')
+        self._emit(CHECK_CALL, self._const((name, len(node.args))))
+        for arg in node.args:
+            self._compile_value(arg)
+        self._emit(op, len(node.args))
+
+    def _compile_BuiltinCallNode(self, node: ast.BuiltinCallNode):
+        for arg in node.args:
+            self._compile_value(arg)
+        self._emit(CALL_BUILTIN, self._const((node.name, len(node.args))))
+
+    def _compile_MemberAccessNode(self, node: ast.MemberAccessNode):
+        self._compile(node.object)
+        self._emit(GET_MEMBER, self._name(node.member.name))
+
+    def _compile_BukkitAccessNode(self, node: ast.BukkitAccessNode):
+        self._compile_value(node.bukkit)
+        self._emit(CHECK_BUKKIT, 0)
+        self._compile_value(node.index)
+        self._emit(BUKKIT_GET)
+
+    def _compile_SmooshNode(self, node: ast.SmooshNode):
+        for part in node.parts:
+            self._compile_value(part)
+        self._emit(SMOOSH, len(node.parts))
+
+    def _compile_GimmehNode(self, node: ast.GimmehNode):
+        self._emit(READ_LINE)
+
+    def _compile_NoMoarNode(self, node: ast.NoMoarNode):
+        self._emit(AT_END_OF_INPUT)
+
+    def _compile_MaekNode(self, node: ast.MaekNode):
+        self._compile_value(node.target)
+        self._emit(MAEK, self._const(node.target_type))
+
+    def _compile_NewInstanceNode(self, node: ast.NewInstanceNode):
+        self._emit(NEW_INSTANCE, self._name(node.class_name.name))
+
+    def _compile_VarDeclNode(self, node: ast.VarDeclNode):
+        name = self._name(node.name)
+        self._emit(CHECK_UNDECLARED, name)
+        if node.initializer:
+            self._compile_value(node.initializer)
+        else:
+            self._emit(LOAD_CONST, self._const(None))
+        self._emit(DEFINE_NAME, name)
+
+    def _compile_AssignmentNode(self, node: ast.AssignmentNode):
+        self._compile_value(node.expression)
+        target = node.target
+        if isinstance(target, ast.IdentifierNode):
+            self._emit(STORE_NAME, self._name(target.name))
+        elif isinstance(target, ast.MemberAccessNode):
+            self._compile(target.object)
+            self._emit(SET_MEMBER, self._name(target.member.name))
+        elif isinstance(target, ast.BukkitAccessNode):
+            self._compile_value(target.bukkit)
+            self._emit(CHECK_BUKKIT, 1)
+            self._compile_value(target.index)
+            self._emit(BUKKIT_SET)
+        else:
+            self._emit(RAISE, self._const("Invalid assignment target."))
+
+    def _compile_VisibleNode(self, node: ast.VisibleNode):
+        for expr in node.expressions:
+            self._compile_value(expr)
+        self._emit(PRINT, len(node.expressions))
+
+    def _compile_ReturnNode(self, node: ast.ReturnNode):
+        # A LOL call never returns a callable without parameters (FOUND YR auto-calls
+        # those), so the AUTOCALL a plain call would be followed by can be dropped.
+        if isinstance(node.value, ast.FuncCallNode) and self._code.kind in ('function', 'method'):
+            self._compile_FuncCallNode(node.value, TAIL_CALL)
+            return
+        if node.value:
+            self._compile_value(node.value)
+        else:
+            self._emit(LOAD_CONST, self._const(None))
+        self._emit(RETURN)
+
+    def _compile_IfNode(self, node: ast.IfNode):
+        self._compile_value(node.condition)
+        jump_to_else = self._emit(POP_JUMP_IF_FALSE)
+        for stmt in node.if_block:
+            self._compile_statement(stmt)
+        if node.else_block is None:
+            self._patch(jump_to_else)
+            return
+        jump_to_end = self._emit(JUMP)
+        self._patch(jump_to_else)
+        for stmt in node.else_block:
+            self._compile_statement(stmt)
+        self._patch(jump_to_end)
+
+    def _compile_LoopNode(self, node: ast.LoopNode):
+        scoped = ast.loop_is_scoped(node)
+        if node.var is not None:
+            var = self._name(node.var.name)
+            self._emit(LOAD_CONST, self._const(0))
+            self._emit(DEFINE_NAME, var)
+        top = len(self._code.instructions)
+        exits = []
+        if node.condition is not None:
+            self._compile_value(node.condition)
+            exits.append(self._emit(POP_JUMP_IF_TRUE if node.condition_kind == 'TIL' else POP_JUMP_IF_FALSE))
+        if scoped:
+            self._emit(ENTER_SCOPE)
+        self._loops.append((scoped, exits))
+        try:
+            for stmt in node.body:
+                self._compile_statement(stmt)
+        finally:
+            self._loops.pop()
+        if scoped:
+            self._emit(EXIT_SCOPE)
+        if node.update is not None and node.var is not None:
+            self._emit(LOAD_NAME, var)
+            self._emit(LOAD_CONST, self._const(1 if node.update == 'UPPIN' else -1))
+            self._emit(BINARY, BINARY_OPS.index('SUM_OF'))
+            self._emit(STORE_NAME, var)
+        self._emit(JUMP, top)
+        for position in exits:
+            self._patch(position)
+
+    def _compile_BreakNode(self, node: ast.BreakNode):
+        if self._loops:
+            scoped, exits = self._loops[-1]
+            if scoped:
+                self._emit(EXIT_SCOPE)
+            exits.append(self._emit(JUMP))
+        elif self._code.kind in ('function', 'method'):
+            self._emit(LOAD_CONST, self._const(None))
+            self._emit(RETURN)
+        else:
+            self._emit(RAISE, self._const("GTFO outside of a loop or function"))
+
+    def _compile_FuncDefNode(self, node: ast.FuncDefNode):
+        self.functions[id(node)] = self._compile_code(node.name, 'function', node.body, RETURN)
+        self._emit(LOAD_CONST, self._const(node))
+        self._emit(DEFINE_NAME, self._name(node.name))
+
+    def _compile_ClassDefNode(self, node: ast.ClassDefNode):
+        for method in node.methods:
+            self.functions[id(method)] = self._compile_code(method.name, 'method', method.body, RETURN)
+        self.classes[id(node)] = self._compile_initializer(node)
+        self._emit(LOAD_CONST, self._const(LOLClass(node)))
+        self._emit(DEFINE_NAME, self._name(node.name))
+
+    def _compile_initializer(self, node: ast.ClassDefNode):
+        saved = self._code, self._const_index, self._name_index
+        self._code, self._const_index, self._name_index = CodeObject(node.name, 'class'), {}, {}
+        try:
+            for prop in node.properties:
+                if prop.initializer:
+                    self._compile(prop.initializer)
+                else:
+                    self._emit(LOAD_CONST, self._const(None))
+                self._emit(INIT_FIELD, self._name(prop.name))
+            self._emit(RETURN)
+            return self._code
+        finally:
+            self._code, self._const_index, self._name_index = saved
+
+
+def _describe(value):
+    if isinstance(value, (ast.FuncDefNode, LOLClass)):
+        return f"<{type(value).__name__} {value.name}>"
+    return repr(value)
+
+
+def disassemble(code: CodeObject) -> str:
+    lines = [f"{code.kind} {code.name}:"]
+    instructions = code.instructions
+    for pc in range(0, len(instructions), 2):
+        op, arg = instructions[pc], instructions[pc + 1]
+        if op in _HAS_CONST:
+            detail = _describe(code.consts[arg])
+        elif op in _HAS_NAME:
+            detail = code.names[arg]
+        elif op in _HAS_JUMP:
+            detail = f"-> {arg}"
+        elif op == BINARY:
+            detail = BINARY_OPS[arg]
+        else:
+            detail = ''
+        lines.append(f"  {pc:>5} {OPNAMES[op]:<18} {arg:>4}  {detail}".rstrip())
+    return '\n'.join(lines)
+
+
+def disassemble_program(compiled: CompiledProgram) -> str:
+    return '\n\n'.join(disassemble(code) for code in compiled.code_objects())
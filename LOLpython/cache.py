@@ -0,0 +1,115 @@
+import dataclasses
+import hashlib
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import zlib
+
+from . import ast_nodes as ast
+
+# Bump when the meaning of a cached program changes without the AST classes changing.
+CACHE_VERSION = 2
+CACHE_DIRNAME = '__lolcache__'
+MAGIC = b'LOLC'
+
+# magic, interpreter tag (8 bytes), flags, sha256 of the source
+_HEADER = struct.Struct('<4s8sI32s')
+
+
+def _interpreter_tag():
+    # Cached files hold pickled AST nodes, so any change to the node classes invalidates them.
+    layout = sorted(
+        (name, tuple(field.name for field in dataclasses.fields(cls)))
+        for name, cls in vars(ast).items()
+        if isinstance(cls, type) and dataclasses.is_dataclass(cls)
+    )
+    signature = repr((CACHE_VERSION, sys.implementation.cache_tag, pickle.HIGHEST_PROTOCOL, layout))
+    return hashlib.sha256(signature.encode('utf-8')).digest()[:8]
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.writes = 0
+        self.errors = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __str__(self):
+        return (f"cache: {self.hits} hits, {self.misses} misses "
+                f"({self.stale} stale), {self.writes} writes, {self.errors} errors")
+
+
+class ProgramCache:
+    def __init__(self, directory=None):
+        self.directory = directory
+        self.stats = CacheStats()
+        self.tag = _interpreter_tag()
+
+    def cache_path(self, filepath):
+        filepath = os.path.abspath(filepath)
+        stem = os.path.splitext(os.path.basename(filepath))[0]
+        suffix = f'.{sys.implementation.cache_tag}.lolc'
+        if self.directory is None:
+            return os.path.join(os.path.dirname(filepath), CACHE_DIRNAME, stem + suffix)
+        path_hash = hashlib.sha1(filepath.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.directory, f'{stem}-{path_hash}{suffix}')
+
+    # Returns the program for `filepath`, calling parse() only when there is no
+    # valid cached copy for the current source and interpreter.
+    def load(self, filepath, parse, flags=0):
+        with open(filepath, 'rb') as f:
+            digest = hashlib.file_digest(f, 'sha256').digest()
+        path = self.cache_path(filepath)
+        program = self._read(path, digest, flags)
+        if program is not None:
+            self.stats.hits += 1
+            return program
+        self.stats.misses += 1
+        program = parse()
+        self._write(path, digest, flags, program)
+        return program
+
+    def _read(self, path, digest, flags):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            magic, tag, cached_flags, cached_digest = _HEADER.unpack_from(data)
+        except struct.error:
+            magic = None
+        if magic != MAGIC or tag != self.tag or cached_flags != flags or cached_digest != digest:
+            self.stats.stale += 1
+            return None
+        try:
+            program = pickle.loads(zlib.decompress(data[_HEADER.size:]))
+        except Exception:
+            self.stats.errors += 1
+            return None
+        return program if isinstance(program, ast.ProgramNode) else None
+
+    def _write(self, path, digest, flags, program):
+        header = _HEADER.pack(MAGIC, self.tag, flags, digest)
+        try:
+            payload = zlib.compress(pickle.dumps(program, protocol=pickle.HIGHEST_PROTOCOL))
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(header + payload)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, pickle.PicklingError, RecursionError):
+            self.stats.errors += 1
+            return
+        self.stats.writes += 1
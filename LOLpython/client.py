@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+
+# Requests and responses are single lines of JSON on a Unix socket.
+# request:  {"source": str, "name": str} or {"path": str}, optional "stdin": str,
+#           "args": [interpreter options], "timeout": seconds
+# response: {"status": int, "stdout": str, "stderr": str, "elapsed": seconds, "cached": bool}
+# This module only needs the standard library, so that a client starts fast.
+
+
+def default_socket_path():
+    return os.path.join(tempfile.gettempdir(), f'lolpython-{os.getuid()}.sock')
+
+
+def encode_message(message):
+    return json.dumps(message).encode('utf-8') + b'\n'
+
+
+def decode_message(line):
+    return json.loads(line.decode('utf-8'))
+
+
+def send_request(request, socket_path=None):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path or default_socket_path())
+        sock.sendall(encode_message(request))
+        sock.shutdown(socket.SHUT_WR)
+        with sock.makefile('rb') as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError("the server closed the connection without a response")
+    return decode_message(line)
+
+
+def _parse_args(argv):
+    arg_parser = argparse.ArgumentParser(
+        prog='python -m LOLpython.client',
+        epilog='other options (e.g. --backend vm -O) are passed to the interpreter on the server')
+    arg_parser.add_argument('filepath')
+    arg_parser.add_argument('--socket', metavar='PATH',
+                            help=f'socket of the server (default: {default_socket_path()})')
+    arg_parser.add_argument('--stdin', metavar='FILE',
+                            help="send FILE as the script's standard input, '-' for our own")
+    arg_parser.add_argument('--timeout', type=float, metavar='S',
+                            help="stop the script after S seconds (default: the server's limit)")
+    arg_parser.add_argument('--send-path', action='store_true',
+                            help='let the server read the script instead of sending its source')
+    return arg_parser.parse_known_args(argv)
+
+
+def main(argv=None):
+    args, interpreter_args = _parse_args(sys.argv[1:] if argv is None else argv)
+    request = {'args': interpreter_args}
+    try:
+        if args.send_path:
+            request['path'] = os.path.abspath(args.filepath)
+        else:
+            with open(args.filepath, 'r', encoding='utf-8') as f:
+                request['source'] = f.read()
+            request['name'] = args.filepath
+        if args.stdin == '-':
+            request['stdin'] = sys.stdin.read()
+        elif args.stdin:
+            with open(args.stdin, 'r', encoding='utf-8') as f:
+                request['stdin'] = f.read()
+    except FileNotFoundError as e:
+        print(f"Error: File not found at '{e.filename}'")
+        sys.exit(1)
+    if args.timeout is not None:
+        request['timeout'] = args.timeout
+    try:
+        response = send_request(request, args.socket)
+    except OSError as e:
+        print(f"Error: cannot reach the LOLpython server: {e}", file=sys.stderr)
+        sys.exit(1)
+    sys.stdout.write(response['stdout'])
+    sys.stderr.write(response['stderr'])
+    sys.exit(response['status'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,506 @@
+from functools import partial
+
+from . import ast_nodes as ast
+from .bukkit import BUILTINS, CALLING_BUILTINS, Bukkit
+from .errors import InterpreterError
+from .inline_cache import CallSite, MemberSite
+from .input import StreamSource
+from .memo import MISSING
+from .output import StreamSink
+from .interpreter import LOLCallable, LOLClass, LOLInstance, Scope, format_value, smoosh
+
+# Statement closures return _NEXT to fall through, _BREAK for GTFO, anything else
+# is a FOUND YR value.
+_NEXT = object()
+_BREAK = object()
+
+_CALLABLE_TYPES = (ast.FuncDefNode, LOLCallable)
+
+_ARITHMETIC = {
+    'SUM_OF': lambda a, b: a + b,
+    'DIFF_OF': lambda a, b: a - b,
+    'PRODUKT_OF': lambda a, b: a * b,
+}
+
+
+# Compiles the AST once into nested closures fn(scope, instance) and runs them.
+# Scoping, auto-calls of zero-argument callables and error messages follow Interpreter.
+class ClosureInterpreter:
+    def __init__(self, memo=None, output=None, input=None):
+        self.global_scope = Scope()
+        self._bodies = {}
+        self._initializers = {}
+        # See Interpreter.bindings_version; every declaration here is by name.
+        self.bindings_version = 0
+        self.inline_caches = []
+        self.memo = memo
+        self.output = StreamSink() if output is None else output
+        self.input = StreamSource() if input is None else input
+
+    def interpret(self, node: ast.ProgramNode):
+        self.compile(node)()
+
+    def compile(self, node: ast.ProgramNode):
+        block = self._compile_block(node.statements)
+        global_scope = self.global_scope
+        output = self.output
+
+        def run_program():
+            try:
+                result = block(global_scope, None)
+            finally:
+                output.flush()
+            if result is _BREAK:
+                raise InterpreterError("GTFO outside of a loop or function")
+            if result is not _NEXT:
+                raise InterpreterError("Return statement ('FOUND YR') outside of a function")
+        return run_program
+
+    def _compile(self, node):
+        method_name = f'_compile_{type(node).__name__}'
+        compiler = getattr(self, method_name, self._generic_compile)
+        return compiler(node)
+
+    def _compile_value(self, node):
+        raw = self._compile(node)
+        if not isinstance(node, (ast.IdentifierNode, ast.MemberAccessNode, ast.FuncCallNode, ast.BukkitAccessNode)):
+            return raw
+        call = self._call
+
+        def value(scope, instance):
+            result = raw(scope, instance)
+            if result.__class__ is LOLCallable and not result.func_def.params:
+                return call(result.func_def, (), scope, instance, result.instance)
+            return result
+        return value
+
+    def _generic_compile(self, node):
+        message = f"No _visit_{type(node).__name__} method"
+
+        def unsupported(scope, instance):
+            raise InterpreterError(message)
+        return unsupported
+
+    def _compile_statement(self, node):
+        if isinstance(node, ast.StatementNode):
+            return self._compile(node)
+        expression = self._compile(node)
+
+        def statement(scope, instance):
+            expression(scope, instance)
+            return _NEXT
+        return statement
+
+    def _compile_block(self, statements):
+        compiled = tuple(self._compile_statement(stmt) for stmt in statements)
+        if not compiled:
+            return lambda scope, instance: _NEXT
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def block(scope, instance):
+            for stmt in compiled:
+                result = stmt(scope, instance)
+                if result is not _NEXT:
+                    return result
+            return _NEXT
+        return block
+
+    # Calls `callee` with argument values, for builtins such as PARMAP.
+    def call_function(self, callee, args):
+        args = [lambda scope, instance, value=value: value for value in args]
+        return self._call(callee.func_def, args, self.global_scope, None, callee.instance)
+
+    def _call(self, func_def, args, caller_scope, caller_instance, instance):
+        params = func_def.params
+        if len(args) != len(params):
+            raise InterpreterError(
+                f"Function '{func_def.name}' expected {len(params)} arguments, but got {len(args)}."
+            )
+        call_scope = Scope(parent=self.global_scope if instance is None else caller_scope)
+        variables = call_scope.variables
+        for param, arg in zip(params, args):
+            variables[param.name] = arg(caller_scope, caller_instance)
+        if func_def.pure and self.memo is not None:
+            return self._memoized_call(func_def, call_scope, instance)
+        result = self._bodies[id(func_def)](call_scope, instance)
+        return None if result is _NEXT or result is _BREAK else result
+
+    def _memoized_call(self, func_def, call_scope, instance):
+        memo = self.memo
+        key = memo.key(func_def, [call_scope.variables[param.name] for param in func_def.params])
+        if key is not None:
+            value = memo.lookup(key)
+            if value is not MISSING:
+                return value
+        result = self._bodies[id(func_def)](call_scope, instance)
+        result = None if result is _NEXT or result is _BREAK else result
+        if key is not None:
+            memo.store(key, result)
+        return result
+
+    def _compile_LiteralNode(self, node: ast.LiteralNode):
+        value = node.value
+        return lambda scope, instance: value
+
+    def _compile_IdentifierNode(self, node: ast.IdentifierNode):
+        name = node.name
+
+        def identifier(scope, instance):
+            current = scope
+            while current is not None:
+                variables = current.variables
+                if name in variables:
+                    value = variables[name]
+                    break
+                current = current.parent
+            else:
+                raise InterpreterError(f"Undeclared variable '{name}'")
+            if value.__class__ is ast.FuncDefNode:
+                return LOLCallable(value)
+            if value is None and not scope.in_frame_of(current):
+                raise InterpreterError(f"Undeclared variable '{name}'")
+            return value
+        return identifier
+
+    def _compile_VarDeclNode(self, node: ast.VarDeclNode):
+        name = node.name
+        initializer = self._compile_value(node.initializer) if node.initializer else None
+
+        interpreter = self
+
+        def declare(scope, instance):
+            if name in scope.variables:
+                raise InterpreterError(f"Variable '{name}' already declared.")
+            interpreter.bindings_version += 1
+            scope.variables[name] = initializer(scope, instance) if initializer else None
+            return _NEXT
+        return declare
+
+    def _compile_AssignmentNode(self, node: ast.AssignmentNode):
+        expression = self._compile_value(node.expression)
+        target = node.target
+        if isinstance(target, ast.IdentifierNode):
+            name = target.name
+            interpreter = self
+
+            def assign_variable(scope, instance):
+                value = expression(scope, instance)
+                current = scope
+                while current is not None:
+                    variables = current.variables
+                    if name in variables:
+                        if variables[name].__class__ in _CALLABLE_TYPES or value.__class__ in _CALLABLE_TYPES:
+                            interpreter.bindings_version += 1
+                        variables[name] = value
+                        return _NEXT
+                    current = current.parent
+                raise InterpreterError(f"Undeclared variable '{name}'")
+            return assign_variable
+
+        if isinstance(target, ast.MemberAccessNode):
+            obj_fn = self._compile(target.object)
+            member = target.member.name
+
+            def assign_member(scope, instance):
+                value = expression(scope, instance)
+                obj = obj_fn(scope, instance)
+                if not isinstance(obj, LOLInstance):
+                    raise InterpreterError("Can only assign to properties of an instance.")
+                obj.set_field(member, value)
+                return _NEXT
+            return assign_member
+
+        if isinstance(target, ast.BukkitAccessNode):
+            bukkit_fn = self._compile_value(target.bukkit)
+            index_fn = self._compile_value(target.index)
+
+            def assign_item(scope, instance):
+                value = expression(scope, instance)
+                bukkit_obj = bukkit_fn(scope, instance)
+                if not isinstance(bukkit_obj, Bukkit):
+                    raise InterpreterError("Can only perform indexed assignment on a BUKKIT.")
+                index = index_fn(scope, instance)
+                if not isinstance(index, int):
+                    raise InterpreterError("BUKKIT index must be a NUMBR.")
+                bukkit_obj.set(index, value)
+                return _NEXT
+            return assign_item
+
+        def invalid(scope, instance):
+            expression(scope, instance)
+            raise InterpreterError("Invalid assignment target.")
+        return invalid
+
+    def _compile_VisibleNode(self, node: ast.VisibleNode):
+        expressions = tuple(self._compile_value(expr) for expr in node.expressions)
+        write = self.output.write
+
+        def visible(scope, instance):
+            write(" ".join([format_value(expr(scope, instance)) for expr in expressions]))
+            return _NEXT
+        return visible
+
+    def _compile_BinaryOpNode(self, node: ast.BinaryOpNode):
+        left, right, op = self._compile_value(node.left), self._compile_value(node.right), node.op
+
+        if op in _ARITHMETIC or op == 'QUOSHUNT_OF':
+            def check(left_val, right_val):
+                if not isinstance(left_val, (int, float)) or not isinstance(right_val, (int, float)):
+                    raise InterpreterError(
+                        f"Arithmetic operations require NUMBRs, but got {type(left_val)} and {type(right_val)}"
+                    )
+
+        if op in _ARITHMETIC:
+            apply = _ARITHMETIC[op]
+
+            def arithmetic(scope, instance):
+                left_val, right_val = left(scope, instance), right(scope, instance)
+                check(left_val, right_val)
+                return apply(left_val, right_val)
+            return arithmetic
+
+        if op == 'QUOSHUNT_OF':
+            def quoshunt(scope, instance):
+                left_val, right_val = left(scope, instance), right(scope, instance)
+                check(left_val, right_val)
+                if right_val == 0: raise InterpreterError("Division by zero")
+                return left_val / right_val
+            return quoshunt
+
+        if op == 'BOTH_SAEM':
+            return lambda scope, instance: left(scope, instance) == right(scope, instance)
+        if op == 'DIFFRINT':
+            return lambda scope, instance: left(scope, instance) != right(scope, instance)
+
+        def unknown(scope, instance):
+            left(scope, instance), right(scope, instance)
+            raise InterpreterError(f"Unknown binary operator: {op}")
+        return unknown
+
+    def _compile_ReturnNode(self, node: ast.ReturnNode):
+        if not node.value:
+            return lambda scope, instance: None
+        return self._compile_value(node.value)
+
+    def _compile_FuncCallNode(self, node: ast.FuncCallNode):
+        callee_fn = self._compile(node.callee)
+        args = tuple(self._compile_value(arg) for arg in node.args)
+        name = getattr(node.callee, 'name', '[unknown]')
+        call = self._call
+
+        def func_call(scope, instance):
+            callee = callee_fn(scope, instance)
+            if not isinstance(callee, LOLCallable):
+                raise InterpreterError(f"'{name}' is not a function or method.")
+            return call(callee.func_def, args, scope, instance, callee.instance)
+
+        if not isinstance(node.callee, ast.IdentifierNode):
+            return func_call
+        site = CallSite(name)
+        self.inline_caches.append(site)
+        interpreter = self
+
+        if node.callee.depth is None:
+            def cached_dynamic_call(scope, instance):
+                if site.scope is scope and site.version == interpreter.bindings_version:
+                    site.hits += 1
+                    return call(site.func_def, args, scope, instance, site.instance)
+                site.misses += 1
+                version = interpreter.bindings_version
+                callee = callee_fn(scope, instance)
+                if not isinstance(callee, LOLCallable):
+                    raise InterpreterError(f"'{name}' is not a function or method.")
+                site.update(None, scope, version, callee)
+                return call(callee.func_def, args, scope, instance, callee.instance)
+            return cached_dynamic_call
+
+        global_variables = self.global_scope.variables
+        is_global = node.callee.depth == 1
+
+        def cached_call(scope, instance):
+            guard = (global_variables if is_global else scope.variables).get(name)
+            if guard is site.guard:
+                site.hits += 1
+                return call(site.func_def, args, scope, instance, site.instance)
+            site.misses += 1
+            callee = callee_fn(scope, instance)
+            if not isinstance(callee, LOLCallable):
+                raise InterpreterError(f"'{name}' is not a function or method.")
+            if guard.__class__ in _CALLABLE_TYPES:
+                site.update(guard, None, 0, callee)
+            return call(callee.func_def, args, scope, instance, callee.instance)
+        return cached_call
+
+    def _compile_FuncDefNode(self, node: ast.FuncDefNode):
+        self._bodies[id(node)] = self._compile_block(node.body)
+        name = node.name
+        interpreter = self
+
+        def define(scope, instance):
+            interpreter.bindings_version += 1
+            scope.set(name, node)
+            return _NEXT
+        return define
+
+    def _compile_ClassDefNode(self, node: ast.ClassDefNode):
+        for method in node.methods:
+            self._compile_FuncDefNode(method)
+        lol_class = LOLClass(node)
+        self._initializers[id(node)] = tuple(
+            (index, self._compile(initializer) if initializer else None)
+            for index, initializer in lol_class.initializers
+        )
+        name = node.name
+        interpreter = self
+
+        def define(scope, instance):
+            interpreter.bindings_version += 1
+            scope.set(name, lol_class)
+            return _NEXT
+        return define
+
+    def _compile_IfNode(self, node: ast.IfNode):
+        condition = self._compile_value(node.condition)
+        if_block = self._compile_block(node.if_block)
+        if node.else_block is None:
+            def if_then(scope, instance):
+                if condition(scope, instance) not in (False, None):
+                    return if_block(scope, instance)
+                return _NEXT
+            return if_then
+
+        else_block = self._compile_block(node.else_block)
+
+        def if_else(scope, instance):
+            if condition(scope, instance) not in (False, None):
+                return if_block(scope, instance)
+            return else_block(scope, instance)
+        return if_else
+
+    def _compile_BreakNode(self, node: ast.BreakNode):
+        return lambda scope, instance: _BREAK
+
+    def _compile_LoopNode(self, node: ast.LoopNode):
+        body = self._compile_block(node.body)
+        scoped = ast.loop_is_scoped(node)
+        condition = self._compile_value(node.condition) if node.condition is not None else None
+        until = node.condition_kind == 'TIL'
+        var = node.var.name if node.var is not None else None
+        step = 1 if node.update == 'UPPIN' else -1
+
+        def loop(scope, instance):
+            if var is not None:
+                scope.variables[var] = 0
+            while True:
+                if condition is not None and (condition(scope, instance) not in (False, None)) == until:
+                    return _NEXT
+                result = body(Scope(parent=scope, loop=True) if scoped else scope, instance)
+                if result is not _NEXT:
+                    return _NEXT if result is _BREAK else result
+                if var is not None:
+                    value = scope.variables[var]
+                    if not isinstance(value, (int, float)):
+                        raise InterpreterError(
+                            f"Arithmetic operations require NUMBRs, but got {type(value)} and {type(step)}"
+                        )
+                    scope.variables[var] = value + step
+        return loop
+
+    def _compile_BukkitNode(self, node: ast.BukkitNode):
+        return lambda scope, instance: Bukkit()
+
+    def _compile_BukkitAccessNode(self, node: ast.BukkitAccessNode):
+        bukkit_fn = self._compile_value(node.bukkit)
+        index_fn = self._compile_value(node.index)
+
+        def bukkit_access(scope, instance):
+            bukkit_obj = bukkit_fn(scope, instance)
+            if not isinstance(bukkit_obj, Bukkit):
+                raise InterpreterError("Can only perform indexed access on a BUKKIT.")
+            index = index_fn(scope, instance)
+            if not isinstance(index, int):
+                raise InterpreterError("BUKKIT index must be a NUMBR.")
+            return bukkit_obj.get(index)
+        return bukkit_access
+
+    def _compile_BuiltinCallNode(self, node: ast.BuiltinCallNode):
+        function = BUILTINS[node.name][0]
+        if node.name in CALLING_BUILTINS:
+            function = partial(function, self.call_function)
+        args = tuple(self._compile_value(arg) for arg in node.args)
+
+        def builtin_call(scope, instance):
+            return function(*[arg(scope, instance) for arg in args])
+        return builtin_call
+
+    def _compile_SmooshNode(self, node: ast.SmooshNode):
+        parts = tuple(self._compile_value(part) for part in node.parts)
+
+        def smoosh_parts(scope, instance):
+            return smoosh([part(scope, instance) for part in parts])
+        return smoosh_parts
+
+    def _compile_GimmehNode(self, node: ast.GimmehNode):
+        readline = self.input.readline
+        return lambda scope, instance: readline()
+
+    def _compile_NoMoarNode(self, node: ast.NoMoarNode):
+        at_end = self.input.at_end
+        return lambda scope, instance: at_end()
+
+    def _compile_MaekNode(self, node: ast.MaekNode):
+        target_fn = self._compile_value(node.target)
+        target_type = node.target_type
+        to_numbr = target_type.upper() == 'NUMBR'
+
+        def maek(scope, instance):
+            target_val = target_fn(scope, instance)
+            if to_numbr and isinstance(target_val, Bukkit):
+                return len(target_val)
+            raise InterpreterError(f"Cannot MAEK {type(target_val)} A {target_type}")
+        return maek
+
+    def _compile_NewInstanceNode(self, node: ast.NewInstanceNode):
+        class_name = node.class_name.name
+        initializers = self._initializers
+
+        def new_instance(scope, instance):
+            lol_class = scope.get(class_name)
+            if not isinstance(lol_class, LOLClass):
+                raise InterpreterError(f"'{class_name}' is not a class.")
+            obj = LOLInstance(lol_class)
+            values = obj.values
+            for index, initializer in initializers[id(lol_class.class_def)]:
+                values[index] = initializer(scope, instance) if initializer else None
+            return obj
+        return new_instance
+
+    def _compile_MemberAccessNode(self, node: ast.MemberAccessNode):
+        obj_fn = self._compile(node.object)
+        member_name = node.member.name
+        site = MemberSite(member_name)
+        self.inline_caches.append(site)
+
+        def member_access(scope, instance):
+            obj = obj_fn(scope, instance)
+            if not isinstance(obj, LOLInstance):
+                raise InterpreterError("Can only access properties or methods on an instance.")
+            if obj.lol_class is site.lol_class:
+                site.hits += 1
+                entry = site.entry
+            else:
+                entry = site.lookup(obj.lol_class)
+            if entry.__class__ is int:
+                return obj.values[entry]
+            if entry is not None:
+                return obj.bind(entry)
+            return obj.get_member(member_name)
+        return member_access
+
+    def _compile_MeNode(self, node: ast.MeNode):
+        def me(scope, instance):
+            if instance is None:
+                raise InterpreterError("'ME' can only be used inside a method.")
+            return instance
+        return me
@@ -0,0 +1,156 @@
+import json
+import sys
+from collections import Counter
+
+from . import ast_nodes as ast
+from .bukkit import Bukkit
+from .errors import LOLPythonError
+
+# statement(node)                   before a statement runs
+# call(func_def, instance)          before a LOL function or method runs
+# return(func_def, value)           after it returned
+# alloc(kind, value, size)          'instance', 'bukkit' (new) or 'grow' (items added to a BUKKIT)
+# error(exception)                  when the program stops with an error
+HOOK_EVENTS = ('statement', 'call', 'return', 'alloc', 'error')
+
+
+class _TracedDispatch(dict):
+    # Wraps each visitor of `base` with the hooks for its node class, so that an
+    # Interpreter without hooks keeps its plain dispatch table and pays nothing.
+    def __init__(self, base, hooks):
+        super().__init__()
+        self.base = base
+        self.hooks = hooks
+
+    def __missing__(self, node_class):
+        visitor = self.base[node_class]
+        on_statement = self.hooks['statement']
+        on_alloc = self.hooks['alloc']
+
+        if node_class is ast.ProgramNode:
+            on_error = self.hooks['error']
+
+            def traced(interpreter, node):
+                try:
+                    return visitor(interpreter, node)
+                except LOLPythonError as error:
+                    for hook in on_error:
+                        hook(error)
+                    raise
+        elif node_class in (ast.NewInstanceNode, ast.BukkitNode, ast.BuiltinCallNode):
+            def traced(interpreter, node):
+                if node.line is not None:
+                    for hook in on_statement:
+                        hook(node)
+                value = visitor(interpreter, node)
+                if isinstance(value, Bukkit):
+                    for hook in on_alloc:
+                        hook('bukkit', value, len(value))
+                elif node_class is ast.NewInstanceNode:
+                    for hook in on_alloc:
+                        hook('instance', value, len(value.values))
+                return value
+        else:
+            def traced(interpreter, node):
+                if node.line is not None:
+                    for hook in on_statement:
+                        hook(node)
+                return visitor(interpreter, node)
+
+        self[node_class] = traced
+        return traced
+
+
+def install_hooks(interpreter, hooks):
+    cls = type(interpreter)
+    execute_function, assign_item = cls._execute_function, cls._assign_item
+    on_call, on_return, on_alloc = hooks['call'], hooks['return'], hooks['alloc']
+
+    def traced_execute_function(func_def, args, instance=None):
+        for hook in on_call:
+            hook(func_def, instance)
+        value = execute_function(interpreter, func_def, args, instance)
+        for hook in on_return:
+            hook(func_def, value)
+        return value
+
+    def traced_assign_item(target, value):
+        bukkit_obj, added = assign_item(interpreter, target, value)
+        if added:
+            for hook in on_alloc:
+                hook('grow', bukkit_obj, added)
+        return bukkit_obj, added
+
+    interpreter._dispatch = _TracedDispatch(interpreter._dispatch, hooks)
+    interpreter._execute_function = traced_execute_function
+    interpreter._assign_item = traced_assign_item
+
+
+def uninstall_hooks(interpreter):
+    interpreter._dispatch = interpreter._dispatch.base
+    del interpreter._execute_function
+    del interpreter._assign_item
+
+
+# Counts what a run did through the hooks of an Interpreter; `dump` writes the
+# counters as JSON.
+class CounterCollector:
+    def __init__(self):
+        self.statements = Counter()
+        self.calls = Counter()
+        self.returns = 0
+        self.instances = Counter()
+        self.bukkits = 0
+        self.bukkit_items_added = 0
+        self.errors = Counter()
+
+    def attach(self, interpreter):
+        interpreter.add_hook('statement', self._statement)
+        interpreter.add_hook('call', self._call)
+        interpreter.add_hook('return', self._return)
+        interpreter.add_hook('alloc', self._alloc)
+        interpreter.add_hook('error', self._error)
+        return self
+
+    def _statement(self, node):
+        self.statements[type(node).__name__] += 1
+
+    def _call(self, func_def, instance):
+        self.calls[func_def.name if instance is None else f"{instance.lol_class.name}'Z {func_def.name}"] += 1
+
+    def _return(self, func_def, value):
+        self.returns += 1
+
+    def _alloc(self, kind, value, size):
+        if kind == 'instance':
+            self.instances[value.lol_class.name] += 1
+        elif kind == 'bukkit':
+            self.bukkits += 1
+        else:
+            self.bukkit_items_added += size
+
+    def _error(self, error):
+        self.errors[type(error).__name__] += 1
+
+    def as_dict(self):
+        return {
+            'statements': sum(self.statements.values()),
+            'statements_by_type': dict(self.statements),
+            'calls': sum(self.calls.values()),
+            'calls_by_function': dict(self.calls),
+            'returns': self.returns,
+            'instances': sum(self.instances.values()),
+            'instances_by_class': dict(self.instances),
+            'bukkits': self.bukkits,
+            'bukkit_items_added': self.bukkit_items_added,
+            'errors': dict(self.errors),
+        }
+
+    def dump(self, path):
+        if path == '-':
+            json.dump(self.as_dict(), sys.stderr, indent=2, sort_keys=True)
+            sys.stderr.write('\n')
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2, sort_keys=True)
+            f.write('\n')
@@ -0,0 +1,96 @@
+# Distinct callees or classes a site remembers before it is treated as megamorphic.
+MAX_POLYMORPHIC = 4
+
+# Guard of a call site that has not cached anything; never the value of a binding.
+_EMPTY = object()
+
+
+def _state(shapes, megamorphic):
+    if megamorphic:
+        return 'megamorphic'
+    if not shapes:
+        return 'uninitialized'
+    return 'monomorphic' if shapes == 1 else 'polymorphic'
+
+
+class CallSite:
+    # Caches the callee of `name YR ...`. Resolved names are guarded by the
+    # identity of the value in their slot (`guard`); names looked up through the
+    # scope chain are guarded by (`scope`, `version`), the interpreter's binding
+    # version at the time of the lookup.
+    __slots__ = ('name', 'guard', 'scope', 'version', 'func_def', 'instance',
+                 'hits', 'misses', 'targets', 'megamorphic')
+    kind = 'call'
+
+    def __init__(self, name):
+        self.name = name
+        self.guard = _EMPTY
+        self.scope = self.func_def = self.instance = None
+        self.version = -1
+        self.hits = self.misses = 0
+        self.targets = set()
+        self.megamorphic = False
+
+    def update(self, guard, scope, version, callee):
+        self.guard, self.scope, self.version = guard, scope, version
+        self.func_def, self.instance = callee.func_def, callee.instance
+        if not self.megamorphic:
+            self.targets.add(id(callee.func_def))
+            if len(self.targets) > MAX_POLYMORPHIC:
+                self.megamorphic = True
+                self.targets.clear()
+
+    @property
+    def state(self):
+        return _state(len(self.targets), self.megamorphic)
+
+
+class MemberSite:
+    # Caches how `obj'Z name` resolves per LOLClass: a slot index for a property,
+    # the FuncDefNode for a method, or None when the instance must be asked (the
+    # name is an added property or missing). The first class seen is kept in
+    # `lol_class`/`entry` for the monomorphic fast path.
+    __slots__ = ('name', 'lol_class', 'entry', 'entries', 'hits', 'misses', 'megamorphic')
+    kind = 'member'
+
+    def __init__(self, name):
+        self.name = name
+        self.lol_class = self.entry = None
+        self.entries = {}
+        self.hits = self.misses = 0
+        self.megamorphic = False
+
+    def lookup(self, lol_class):
+        entries = self.entries
+        if lol_class in entries:
+            self.hits += 1
+            return entries[lol_class]
+        self.misses += 1
+        entry = lol_class.fields.get(self.name)
+        if entry is None:
+            entry = lol_class.methods.get(self.name)
+        if len(entries) < MAX_POLYMORPHIC:
+            entries[lol_class] = entry
+            if self.lol_class is None:
+                self.lol_class, self.entry = lol_class, entry
+        else:
+            self.megamorphic = True
+        return entry
+
+    @property
+    def state(self):
+        return _state(len(self.entries), self.megamorphic)
+
+
+def format_ic_stats(sites):
+    sites = [site for site in sites if site.hits or site.misses]
+    hits = sum(site.hits for site in sites)
+    lookups = hits + sum(site.misses for site in sites)
+    lines = [f"inline caches: {len(sites)} sites, {hits}/{lookups} hits"
+             + (f" ({100 * hits / lookups:.1f}%)" if lookups else "")]
+    sites.sort(key=lambda site: site.hits + site.misses, reverse=True)
+    for site in sites:
+        total = site.hits + site.misses
+        lines.append(f"  {site.kind:<6} {site.name:<20} {site.state:<13} "
+                     f"{site.hits:>10} hits {site.misses:>8} misses {100 * site.hits / total:6.1f}%")
+    return '\n'.join(lines)
@@ -0,0 +1,93 @@
+import sys
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+
+# Sources give GIMMEH one line at a time without its line ending (\n or \r\n),
+# and None once the input is exhausted; at_end() answers NO MOAR.
+class StreamSource:
+    # Reads up to `buffer_size` bytes at a time from the binary buffer of
+    # `stream` (with read1 where there is one, so a pipe hands over what it has
+    # rather than blocking until the buffer is full), decodes the complete lines
+    # among them in one go and pops them off a reversed list, so memory holds
+    # about one buffer however long the input is. Without a stream, the
+    # sys.stdin current at the first read is used; text streams without a
+    # buffer (io.StringIO) are read the same way. Bytes that are not UTF-8 are
+    # replaced rather than failing the script halfway.
+    def __init__(self, stream=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._read = None
+        self._lines = []  # lines of the current buffer not read yet, last first
+        self._tail = []   # the reads since the last newline, joined once one comes
+        self._exhausted = False
+
+    def readline(self):
+        if self._lines or self._fill():
+            return self._lines.pop()
+        return None
+
+    def at_end(self):
+        return not self._lines and not self._fill()
+
+    def _fill(self):
+        while not self._lines:
+            if self._exhausted:
+                return False
+            if self._read is None:
+                stream = self.stream or sys.stdin
+                reader = getattr(stream, 'buffer', stream)
+                self._read = getattr(reader, 'read1', reader.read)
+            chunk = self._read(self.buffer_size)
+            if chunk:
+                cut = chunk.rfind(b'\n' if chunk.__class__ is bytes else '\n') + 1
+                if not cut:
+                    # No line ends in this read; keep reading.
+                    self._tail.append(chunk)
+                    continue
+                tail = self._tail
+                tail.append(chunk[:cut])
+                complete = chunk[:0].join(tail)
+                self._tail = [chunk[cut:]] if cut < len(chunk) else []
+            else:
+                # The last line need not end with a newline.
+                self._exhausted = True
+                if not self._tail:
+                    return False
+                complete = chunk.join(self._tail)
+                self._tail = []
+            text = complete.decode('utf-8', 'replace') if complete.__class__ is bytes else complete
+            if '\r' in text:
+                text = text.replace('\r\n', '\n')
+            lines = text.split('\n')
+            if not lines[-1]:
+                lines.pop()
+            lines.reverse()
+            self._lines = lines
+        return True
+
+    def close(self):
+        pass
+
+
+class FileSource(StreamSource):
+    def __init__(self, path, buffer_size=DEFAULT_BUFFER_SIZE):
+        super().__init__(open(path, 'rb'), buffer_size)
+
+    def close(self):
+        self.stream.close()
+
+
+class ListSource:
+    # Hands out the given lines, e.g. to feed a script in memory; empty by default.
+    def __init__(self, lines=()):
+        self._lines = list(reversed(lines))
+
+    def readline(self):
+        return self._lines.pop() if self._lines else None
+
+    def at_end(self):
+        return not self._lines
+
+    def close(self):
+        pass
@@ -1,21 +1,92 @@
+import operator
+
 from . import ast_nodes as ast
+from .bukkit import BUILTINS, CALLING_BUILTINS, Bukkit
 from .errors import InterpreterError
+from .hooks import HOOK_EVENTS, install_hooks, uninstall_hooks
+from .inline_cache import CallSite, MemberSite
+from .input import StreamSource
+from .memo import MISSING
+from .output import StreamSink
+from .rope import Rope, concat
 
 
 class ReturnSignal(Exception):
     def __init__(self, value): self.value = value
 
 
-class LOLInstance:
+class BreakSignal(Exception):
+    pass
+
+
+class LOLClass:
+    # Runtime form of a ClassDefNode: methods by name (the first definition wins,
+    # as with the old linear scan) and a fixed property -> slot layout.
     def __init__(self, class_def: ast.ClassDefNode):
         self.class_def = class_def
-        self.fields = {}
+        self.name = class_def.name
+        self.methods = {}
+        for method in class_def.methods:
+            self.methods.setdefault(method.name, method)
+        self.layout = {}
+        for prop in class_def.properties:
+            self.layout.setdefault(prop.name, len(self.layout))
+        # A method hides a property of the same name when read.
+        self.fields = {name: index for name, index in self.layout.items() if name not in self.methods}
+        self.initializers = tuple((self.layout[prop.name], prop.initializer) for prop in class_def.properties)
+
+    def __str__(self):
+        return str(self.class_def)
+
+
+class LOLInstance:
+    # Declared properties live in `values` by class layout; properties added
+    # later by assignment go to the `extra` dict, created on first use.
+    __slots__ = ('lol_class', 'values', 'extra', 'bound')
+
+    def __init__(self, lol_class: LOLClass):
+        self.lol_class = lol_class
+        self.values = [None] * len(lol_class.layout)
+        self.extra = None
+        self.bound = None
+
+    def get_member(self, name):
+        lol_class = self.lol_class
+        index = lol_class.fields.get(name)
+        if index is not None:
+            return self.values[index]
+        method = lol_class.methods.get(name)
+        if method is not None:
+            return self.bind(method)
+        if self.extra is not None and name in self.extra:
+            return self.extra[name]
+        raise InterpreterError(f"Instance of '{lol_class.name}' has no property or method named '{name}'.")
+
+    def bind(self, method):
+        bound = self.bound
+        if bound is None:
+            bound = self.bound = {}
+        elif method.name in bound:
+            return bound[method.name]
+        bound[method.name] = callable_ = LOLCallable(method, instance=self)
+        return callable_
+
+    def set_field(self, name, value):
+        index = self.lol_class.layout.get(name)
+        if index is not None:
+            self.values[index] = value
+        elif self.extra is None:
+            self.extra = {name: value}
+        else:
+            self.extra[name] = value
 
     def __str__(self):
-        return f"[instance of {self.class_def.name}]"
+        return f"[instance of {self.lol_class.name}]"
 
 
 class LOLCallable:
+    __slots__ = ('func_def', 'instance')
+
     def __init__(self, func_def: ast.FuncDefNode, instance=None):
         self.func_def = func_def
         self.instance = instance
@@ -24,33 +95,164 @@ class LOLCallable:
         return f"[callable {self.func_def.name}]"
 
 
+def format_value(val):
+    if val is None:
+        return "NOOB"
+    if isinstance(val, bool):
+        return "WIN" if val else "FAIL"
+    return str(val)
+
+
+# SMOOSH: every value as a YARN, joined lazily once the result is long (see rope.py).
+def smoosh(values):
+    return concat([value if value.__class__ is str or value.__class__ is Rope else format_value(value)
+                   for value in values])
+
+
+_CALLABLE_TYPES = (ast.FuncDefNode, LOLCallable)
+
+
+def _quoshunt(left_val, right_val):
+    if right_val == 0: raise InterpreterError("Division by zero")
+    return left_val / right_val
+
+
+_ARITHMETIC_OPS = frozenset(('SUM_OF', 'DIFF_OF', 'PRODUKT_OF', 'QUOSHUNT_OF'))
+_BINARY_OPS = {
+    'SUM_OF': operator.add,
+    'DIFF_OF': operator.sub,
+    'PRODUKT_OF': operator.mul,
+    'QUOSHUNT_OF': _quoshunt,
+    'BOTH_SAEM': operator.eq,
+    'DIFFRINT': operator.ne,
+}
+# How often a BinaryOpNode is re-specialised after its operand types change
+# before it stays on the generic path for other types.
+MAX_REQUICKEN = 4
+
+# Marks a slot whose variable has not been declared (yet) in this scope.
+UNSET = object()
+
+
 class Scope:
-    def __init__(self, parent=None):
+    # Names listed in `layout` (from the resolver) live in the fixed-size `slots`
+    # array; anything else falls back to the `variables` dict. A `loop` scope
+    # holds one iteration of a loop body and belongs to the frame it runs in.
+    def __init__(self, parent=None, layout=None, loop=False):
         self.parent = parent
         self.variables = {}
+        self.layout = layout
+        self.slots = [UNSET] * len(layout) if layout else None
+        self.loop = loop
+
+    def adopt_layout(self, layout):
+        if self.layout:
+            for name, slot in self.layout.items():
+                if self.slots[slot] is not UNSET:
+                    self.variables[name] = self.slots[slot]
+        self.layout = layout
+        self.slots = [UNSET] * len(layout)
+        for name, slot in layout.items():
+            if name in self.variables:
+                self.slots[slot] = self.variables.pop(name)
 
     def get(self, name):
-        if name in self.variables: return self.variables[name]
-        if self.parent: return self.parent.get(name)
+        scope = self
+        while scope is not None:
+            if scope.layout and name in scope.layout:
+                value = scope.slots[scope.layout[name]]
+                if value is not UNSET: return value
+            elif name in scope.variables:
+                return scope.variables[name]
+            scope = scope.parent
         return None
 
     def set(self, name, value):
-        self.variables[name] = value
+        if self.layout and name in self.layout:
+            self.slots[self.layout[name]] = value
+        else:
+            self.variables[name] = value
 
     def has(self, name):
+        if self.layout and name in self.layout:
+            return self.slots[self.layout[name]] is not UNSET
         return name in self.variables
 
+    # Whether `name` is declared in this frame: here or in the scopes the loops
+    # this scope is an iteration of run in.
+    def declares(self, name):
+        scope = self
+        while not scope.has(name):
+            if not scope.loop:
+                return False
+            scope = scope.parent
+        return True
+
+    # Whether `scope` is this one, or the scope the loops this one is an iteration of run in.
+    def in_frame_of(self, scope):
+        current = self
+        while current is not scope:
+            if not current.loop:
+                return False
+            current = current.parent
+        return True
+
+
+class _DispatchTable(dict):
+    # node class -> the _visit_ function of `interpreter_class`, looked up on first use.
+    def __init__(self, interpreter_class):
+        super().__init__()
+        self.interpreter_class = interpreter_class
+
+    def __missing__(self, node_class):
+        cls = self.interpreter_class
+        visitor = self[node_class] = getattr(cls, f'_visit_{node_class.__name__}', cls._generic_visit)
+        return visitor
+
+
+_DISPATCH_TABLES = {}
+
 
 class Interpreter:
-    def __init__(self):
+    def __init__(self, memo=None, output=None, input=None):
         self.global_scope = Scope()
         self.current_scope = self.global_scope
         self.current_instance = None
+        # Bumped whenever a binding that holds (or held) a callable changes, and on
+        # declarations by name; call sites looked up through the scope chain check it.
+        self.bindings_version = 0
+        self._call_sites = {}
+        self._member_sites = {}
+        self.inline_caches = []
+        # memo.MemoTable answering calls to functions marked pure, or None.
+        self.memo = memo
+        # Where VISIBLE writes its lines; see output.py.
+        self.output = StreamSink() if output is None else output
+        # Where GIMMEH reads its lines; see input.py.
+        self.input = StreamSource() if input is None else input
+        cls = type(self)
+        if cls not in _DISPATCH_TABLES:
+            _DISPATCH_TABLES[cls] = _DispatchTable(cls)
+        self._dispatch = _DISPATCH_TABLES[cls]
+        # event -> callbacks once a hook is added; see hooks.py.
+        self._hooks = None
 
     def interpret(self, node: ast.ASTNode):
-        method_name = f'_visit_{type(node).__name__}'
-        visitor = getattr(self, method_name, self._generic_visit)
-        return visitor(node)
+        return self._dispatch[node.__class__](self, node)
+
+    def add_hook(self, event, callback):
+        if event not in HOOK_EVENTS:
+            raise ValueError(f"Unknown hook event {event!r}, expected one of {', '.join(HOOK_EVENTS)}")
+        if self._hooks is None:
+            self._hooks = {name: [] for name in HOOK_EVENTS}
+            install_hooks(self, self._hooks)
+        self._hooks[event].append(callback)
+
+    def remove_hook(self, event, callback):
+        self._hooks[event].remove(callback)
+        if not any(self._hooks.values()):
+            uninstall_hooks(self)
+            self._hooks = None
 
     def _evaluate_and_call(self, node):
         value = self.interpret(node)
@@ -63,17 +265,32 @@ class Interpreter:
         raise InterpreterError(f"No _visit_{type(node).__name__} method")
 
     def _visit_ProgramNode(self, node: ast.ProgramNode):
+        if node.layout is not None:
+            self.global_scope.adopt_layout(node.layout)
         try:
             for statement in node.statements:
                 self.interpret(statement)
         except ReturnSignal:
             raise InterpreterError("Return statement ('FOUND YR') outside of a function")
+        except BreakSignal:
+            raise InterpreterError("GTFO outside of a loop or function")
+        finally:
+            self.output.flush()
 
     def _visit_AssignmentNode(self, node: ast.AssignmentNode):
         value = self._evaluate_and_call(node.expression)
         target = node.target
         if isinstance(target, ast.IdentifierNode):
+            if target.slot is not None:
+                scope = self.current_scope if target.depth == 0 else self.global_scope
+                old = scope.slots[target.slot]
+                if old is not UNSET:
+                    if old.__class__ in _CALLABLE_TYPES or value.__class__ in _CALLABLE_TYPES:
+                        self.bindings_version += 1
+                    scope.slots[target.slot] = value
+                    return
             var_name = target.name
+            self.bindings_version += 1
             scope = self.current_scope
             while scope:
                 if scope.has(var_name):
@@ -85,23 +302,37 @@ class Interpreter:
             obj = self.interpret(target.object)
             if not isinstance(obj, LOLInstance):
                 raise InterpreterError("Can only assign to properties of an instance.")
-            obj.fields[target.member.name] = value
+            obj.set_field(target.member.name, value)
         elif isinstance(target, ast.BukkitAccessNode):
-            bukkit_obj = self._evaluate_and_call(target.bukkit)
-            if not isinstance(bukkit_obj, list):
-                raise InterpreterError("Can only perform indexed assignment on a BUKKIT.")
-            index = self._evaluate_and_call(target.index)
-            if not isinstance(index, int):
-                raise InterpreterError("BUKKIT index must be a NUMBR.")
-            while len(bukkit_obj) <= index:
-                bukkit_obj.append(None)
-            bukkit_obj[index] = value
+            self._assign_item(target, value)
         else:
             raise InterpreterError("Invalid assignment target.")
 
+    # Returns the BUKKIT and the number of items the assignment added to it.
+    def _assign_item(self, target: ast.BukkitAccessNode, value):
+        bukkit_obj = self._evaluate_and_call(target.bukkit)
+        if not isinstance(bukkit_obj, Bukkit):
+            raise InterpreterError("Can only perform indexed assignment on a BUKKIT.")
+        index = self._evaluate_and_call(target.index)
+        if not isinstance(index, int):
+            raise InterpreterError("BUKKIT index must be a NUMBR.")
+        length = len(bukkit_obj)
+        bukkit_obj.set(index, value)
+        return bukkit_obj, len(bukkit_obj) - length
+
     def _visit_VarDeclNode(self, node: ast.VarDeclNode):
+        if node.slot is not None:
+            slots = self.current_scope.slots
+            if slots[node.slot] is not UNSET:
+                raise InterpreterError(f"Variable '{node.name}' already declared.")
+            value = self._evaluate_and_call(node.initializer) if node.initializer else None
+            if value.__class__ in _CALLABLE_TYPES:
+                self.bindings_version += 1
+            slots[node.slot] = value
+            return
         if self.current_scope.has(node.name):
             raise InterpreterError(f"Variable '{node.name}' already declared.")
+        self.bindings_version += 1
         value = None
         if node.initializer:
             value = self._evaluate_and_call(node.initializer)
@@ -110,53 +341,74 @@ class Interpreter:
     def _visit_VisibleNode(self, node: ast.VisibleNode):
         outputs = []
         for expr in node.expressions:
-            val = self._evaluate_and_call(expr)
-            if val is None:
-                outputs.append("NOOB")
-            elif isinstance(val, bool):
-                outputs.append("WIN" if val else "FAIL")
-            elif isinstance(val, LOLInstance):
-                outputs.append(str(val))
-            elif isinstance(val, list):
-                outputs.append(f"[BUKKIT of {len(val)} items]")
-            else:
-                outputs.append(str(val))
-        print(" ".join(outputs))
+            outputs.append(format_value(self._evaluate_and_call(expr)))
+        self.output.write(" ".join(outputs))
 
     def _visit_BinaryOpNode(self, node: ast.BinaryOpNode):
         left_val = self._evaluate_and_call(node.left)
         right_val = self._evaluate_and_call(node.right)
-        if node.op in ('SUM_OF', 'DIFF_OF', 'PRODUKT_OF', 'QUOSHUNT_OF'):
+        quick = node.quick
+        if quick is not None and left_val.__class__ is quick[0] and right_val.__class__ is quick[1]:
+            return quick[2](left_val, right_val)
+        return self._binary_generic(node, left_val, right_val, quick)
+
+    # Checks operand types, then specialises the node for them: later evaluations
+    # with the same operand classes skip straight to the operation.
+    def _binary_generic(self, node, left_val, right_val, quick):
+        if node.op in _ARITHMETIC_OPS:
             if not isinstance(left_val, (int, float)) or not isinstance(right_val, (int, float)):
                 raise InterpreterError(
                     f"Arithmetic operations require NUMBRs, but got {type(left_val)} and {type(right_val)}"
                 )
-        if node.op == 'SUM_OF': return left_val + right_val
-        if node.op == 'DIFF_OF': return left_val - right_val
-        if node.op == 'PRODUKT_OF': return left_val * right_val
-        if node.op == 'QUOSHUNT_OF':
-            if right_val == 0: raise InterpreterError("Division by zero")
-            return left_val / right_val
-        if node.op == 'BOTH_SAEM': return left_val == right_val
-        if node.op == 'DIFFRINT': return left_val != right_val
-        raise InterpreterError(f"Unknown binary operator: {node.op}")
+        operation = _BINARY_OPS.get(node.op)
+        if operation is None:
+            raise InterpreterError(f"Unknown binary operator: {node.op}")
+        count = 0 if quick is None else quick[3] + 1
+        if count <= MAX_REQUICKEN:
+            node.quick = (left_val.__class__, right_val.__class__, operation, count)
+        return operation(left_val, right_val)
 
     def _visit_ReturnNode(self, node: ast.ReturnNode):
         value = self._evaluate_and_call(node.value) if node.value else None
         raise ReturnSignal(value)
 
     def _visit_FuncCallNode(self, node: ast.FuncCallNode):
-        callee = self.interpret(node.callee)
+        callee_node = node.callee
+        if callee_node.__class__ is not ast.IdentifierNode:
+            callee = self.interpret(callee_node)
+        else:
+            site = self._call_sites.get(id(node))
+            if site is None:
+                site = self._call_sites[id(node)] = CallSite(callee_node.name)
+                self.inline_caches.append(site)
+            if callee_node.slot is not None:
+                scope = self.current_scope if callee_node.depth == 0 else self.global_scope
+                guard = scope.slots[callee_node.slot]
+                if guard is site.guard:
+                    site.hits += 1
+                    return self._execute_function(site.func_def, node.args, instance=site.instance)
+                scope = None
+            else:
+                guard, scope = None, self.current_scope
+                if site.scope is scope and site.version == self.bindings_version:
+                    site.hits += 1
+                    return self._execute_function(site.func_def, node.args, instance=site.instance)
+            site.misses += 1
+            callee = self.interpret(callee_node)
+            if isinstance(callee, LOLCallable) and (scope is not None or guard.__class__ in _CALLABLE_TYPES):
+                site.update(guard, scope, self.bindings_version, callee)
         if not isinstance(callee, LOLCallable):
             name = getattr(node.callee, 'name', '[unknown]')
             raise InterpreterError(f"'{name}' is not a function or method.")
         return self._execute_function(callee.func_def, node.args, instance=callee.instance)
 
     def _visit_FuncDefNode(self, node: ast.FuncDefNode):
+        self.bindings_version += 1
         self.current_scope.set(node.name, node)
 
     def _visit_ClassDefNode(self, node: ast.ClassDefNode):
-        self.current_scope.set(node.name, node)
+        self.bindings_version += 1
+        self.current_scope.set(node.name, LOLClass(node))
 
     def _visit_IfNode(self, node: ast.IfNode):
         condition_val = self._evaluate_and_call(node.condition)
@@ -168,27 +420,121 @@ class Interpreter:
             for stmt in node.else_block:
                 self.interpret(stmt)
 
+    def _visit_BreakNode(self, node: ast.BreakNode):
+        raise BreakSignal()
+
+    def _visit_LoopNode(self, node: ast.LoopNode):
+        var = node.var
+        if var is not None:
+            if var.slot is not None:
+                self.current_scope.slots[var.slot] = 0
+            else:
+                self.current_scope.set(var.name, 0)
+        try:
+            if var is not None and var.slot is not None and not ast.loop_is_scoped(node):
+                condition = node.condition
+                if condition is None or (
+                        isinstance(condition, ast.BinaryOpNode) and condition.op in ('BOTH_SAEM', 'DIFFRINT')
+                        and isinstance(condition.left, ast.IdentifierNode) and condition.left.name == var.name
+                        and isinstance(condition.right, ast.LiteralNode)):
+                    self._run_counter_loop(node)
+                    return
+            self._run_loop(node)
+        except BreakSignal:
+            pass
+
+    # UPPIN/NERFIN over a slot, compared with a literal (or unbounded), in a body
+    # that declares nothing: no scope, no condition dispatch, no name lookups.
+    def _run_counter_loop(self, node: ast.LoopNode):
+        slots, slot = self.current_scope.slots, node.var.slot
+        step = 1 if node.update == 'UPPIN' else -1
+        condition = node.condition
+        bounded = condition is not None
+        if bounded:
+            limit = condition.right.value
+            stop_if_equal = (condition.op == 'BOTH_SAEM') == (node.condition_kind == 'TIL')
+        body, interpret = node.body, self.interpret
+        while True:
+            if bounded and (slots[slot] == limit) == stop_if_equal:
+                return
+            for stmt in body:
+                interpret(stmt)
+            value = slots[slot]
+            if value.__class__ is not int and not isinstance(value, (int, float)):
+                raise InterpreterError(
+                    f"Arithmetic operations require NUMBRs, but got {type(value)} and {type(step)}"
+                )
+            slots[slot] = value + step
+
+    def _run_loop(self, node: ast.LoopNode):
+        var, condition = node.var, node.condition
+        until = node.condition_kind == 'TIL'
+        step = 1 if node.update == 'UPPIN' else -1
+        scoped = ast.loop_is_scoped(node)
+        loop_scope = self.current_scope
+        while True:
+            if condition is not None and (self._evaluate_and_call(condition) not in (False, None)) == until:
+                return
+            if scoped:
+                self.current_scope = Scope(parent=loop_scope, loop=True)
+            try:
+                for stmt in node.body:
+                    self.interpret(stmt)
+            finally:
+                self.current_scope = loop_scope
+            if var is not None:
+                if var.slot is not None:
+                    value = loop_scope.slots[var.slot]
+                else:
+                    value = loop_scope.get(var.name)
+                if not isinstance(value, (int, float)):
+                    raise InterpreterError(
+                        f"Arithmetic operations require NUMBRs, but got {type(value)} and {type(step)}"
+                    )
+                if var.slot is not None:
+                    loop_scope.slots[var.slot] = value + step
+                else:
+                    loop_scope.set(var.name, value + step)
+
     def _visit_BukkitNode(self, node: ast.BukkitNode):
-        return []
+        return Bukkit()
 
     def _visit_BukkitAccessNode(self, node: ast.BukkitAccessNode):
         bukkit_obj = self._evaluate_and_call(node.bukkit)
-        if not isinstance(bukkit_obj, list):
+        if not isinstance(bukkit_obj, Bukkit):
             raise InterpreterError("Can only perform indexed access on a BUKKIT.")
         index = self._evaluate_and_call(node.index)
         if not isinstance(index, int):
             raise InterpreterError("BUKKIT index must be a NUMBR.")
-        if 0 <= index < len(bukkit_obj):
-            return bukkit_obj[index]
-        return None
+        return bukkit_obj.get(index)
+
+    def _visit_BuiltinCallNode(self, node: ast.BuiltinCallNode):
+        function = BUILTINS[node.name][0]
+        args = [self._evaluate_and_call(arg) for arg in node.args]
+        if node.name in CALLING_BUILTINS:
+            return function(self.call_function, *args)
+        return function(*args)
+
+    def _visit_SmooshNode(self, node: ast.SmooshNode):
+        return smoosh([self._evaluate_and_call(part) for part in node.parts])
+
+    def _visit_GimmehNode(self, node: ast.GimmehNode):
+        return self.input.readline()
+
+    def _visit_NoMoarNode(self, node: ast.NoMoarNode):
+        return self.input.at_end()
 
     def _visit_MaekNode(self, node: ast.MaekNode):
         target_val = self._evaluate_and_call(node.target)
         if node.target_type.upper() == 'NUMBR':
-            if isinstance(target_val, list):
+            if isinstance(target_val, Bukkit):
                 return len(target_val)
         raise InterpreterError(f"Cannot MAEK {type(target_val)} A {node.target_type}")
 
+    # Calls `callee` with argument values, for builtins such as PARMAP.
+    def call_function(self, callee: LOLCallable, args: list):
+        return self._execute_function(callee.func_def, [ast.LiteralNode(arg) for arg in args], callee.instance)
+
     def _execute_function(self, func_def: ast.FuncDefNode, args: list, instance=None):
         if len(args) != len(func_def.params):
             raise InterpreterError(
@@ -196,12 +542,20 @@ class Interpreter:
             )
 
         previous_scope, previous_instance = self.current_scope, self.current_instance
+        arg_values = [self._evaluate_and_call(arg_expr) for arg_expr in args]
+        key = None
+        if func_def.pure and self.memo is not None:
+            key = self.memo.key(func_def, arg_values)
+            if key is not None:
+                value = self.memo.lookup(key)
+                if value is not MISSING:
+                    return value
+
         parent_scope = self.global_scope if instance is None else previous_scope
-        call_scope = Scope(parent=parent_scope)
+        call_scope = Scope(parent=parent_scope, layout=func_def.layout)
         self.current_scope, self.current_instance = call_scope, instance
 
-        for param, arg_expr in zip(func_def.params, args):
-            arg_value = self._interpret_in_scope(arg_expr, previous_scope, previous_instance)
+        for param, arg_value in zip(func_def.params, arg_values):
             self.current_scope.set(param.name, arg_value)
 
         return_value = None
@@ -210,51 +564,63 @@ class Interpreter:
                 self.interpret(stmt)
         except ReturnSignal as ret:
             return_value = ret.value
+        except BreakSignal:
+            pass
 
         self.current_scope, self.current_instance = previous_scope, previous_instance
+        if key is not None:
+            self.memo.store(key, return_value)
         return return_value
 
-    def _interpret_in_scope(self, node, scope, instance):
-        original_scope, original_instance = self.current_scope, self.current_instance
-        self.current_scope, self.current_instance = scope, instance
-        result = self._evaluate_and_call(node)
-        self.current_scope, self.current_instance = original_scope, original_instance
-        return result
-
     def _visit_LiteralNode(self, node: ast.LiteralNode):
         return node.value
 
     def _visit_IdentifierNode(self, node: ast.IdentifierNode):
+        if node.slot is not None:
+            value = (self.current_scope if node.depth == 0 else self.global_scope).slots[node.slot]
+            if value is not UNSET:
+                if isinstance(value, ast.FuncDefNode):
+                    return LOLCallable(value)
+                if value is None and node.depth:
+                    raise InterpreterError(f"Undeclared variable '{node.name}'")
+                return value
         var_name = node.name
         value = self.current_scope.get(var_name)
         if isinstance(value, ast.FuncDefNode):
             return LOLCallable(value)
-        if value is None and not self.current_scope.has(var_name):
+        if value is None and not self.current_scope.declares(var_name):
             raise InterpreterError(f"Undeclared variable '{var_name}'")
         return value
 
     def _visit_NewInstanceNode(self, node: ast.NewInstanceNode):
         class_name = node.class_name.name
-        class_def = self.current_scope.get(class_name)
-        if not isinstance(class_def, ast.ClassDefNode):
+        lol_class = self.current_scope.get(class_name)
+        if not isinstance(lol_class, LOLClass):
             raise InterpreterError(f"'{class_name}' is not a class.")
-        instance = LOLInstance(class_def)
-        for prop in class_def.properties:
-            value = self.interpret(prop.initializer) if prop.initializer else None
-            instance.fields[prop.name] = value
+        instance = LOLInstance(lol_class)
+        values = instance.values
+        for index, initializer in lol_class.initializers:
+            values[index] = self.interpret(initializer) if initializer else None
         return instance
 
     def _visit_MemberAccessNode(self, node: ast.MemberAccessNode):
         obj = self.interpret(node.object)
         if not isinstance(obj, LOLInstance):
             raise InterpreterError("Can only access properties or methods on an instance.")
-        member_name = node.member.name
-        for method in obj.class_def.methods:
-            if method.name == member_name:
-                return LOLCallable(method, instance=obj)
-        if member_name in obj.fields:
-            return obj.fields[member_name]
-        raise InterpreterError(f"Instance of '{obj.class_def.name}' has no property or method named '{member_name}'.")
+        site = self._member_sites.get(id(node))
+        if site is None:
+            site = self._member_sites[id(node)] = MemberSite(node.member.name)
+            self.inline_caches.append(site)
+        if obj.lol_class is site.lol_class:
+            site.hits += 1
+            entry = site.entry
+        else:
+            entry = site.lookup(obj.lol_class)
+        if entry.__class__ is int:
+            return obj.values[entry]
+        if entry is not None:
+            return obj.bind(entry)
+        return obj.get_member(site.name)
 
     def _visit_MeNode(self, node: ast.MeNode):
         if self.current_instance is None:
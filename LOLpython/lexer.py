@@ -1,9 +1,88 @@
+import mmap
 import re
 from collections import namedtuple
+from contextlib import contextmanager
 from .errors import LexerError
 
 Token = namedtuple('Token', ['type', 'value', 'line', 'column'])
 
+TOKEN_SPECS = [
+    ('SKIP', r'[ \t]+'),
+    ('NEWLINE', r'\n+'),
+    ('COMMENT', r'BTW.*'),
+
+    ('O_RLY', r'O RLY\?'),
+    ('YA_RLY', r'YA RLY'),
+    ('NO_WAI', r'NO WAI'),
+    ('NO_MOAR', r'NO MOAR'),
+    ('OIC', r'OIC'),
+    ('BUKKIT', r'BUKKIT'),
+    ('MAEK', r'MAEK'),
+
+    ('HOW_IZ_I', r'HOW IZ I'),
+    ('IF_U_SAY_SO', r'IF U SAY SO'),
+    ('FOUND_YR', r'FOUND YR'),
+    ('HOW_DUZ_I', r'HOW DUZ I'),
+    ('A_NEW', r'A NEW'),
+
+    ('IM_IN_YR', r'IM IN YR'),
+    ('IM_OUTTA_YR', r'IM OUTTA YR'),
+    ('UPPIN', r'UPPIN'),
+    ('NERFIN', r'NERFIN'),
+    ('TIL', r'TIL'),
+    ('WILE', r'WILE'),
+    ('GTFO', r'GTFO'),
+    ('ME', r'ME'),
+    ('YR', r'YR'),
+
+    ('HAI', r'HAI 1\.2'),
+    ('KTHXBYE', r'KTHXBYE'),
+    ('KTHX', r'KTHX'),
+    ('I_HAS_A', r'I HAS A'),
+    ('ITZ', r'ITZ'),
+    ('R', r'R'),
+    ('SUM_OF', r'SUM OF'),
+    ('DIFF_OF', r'DIFF OF'),
+    ('PRODUKT_OF', r'PRODUKT OF'),
+    ('QUOSHUNT_OF', r'QUOSHUNT OF'),
+    ('BOTH_SAEM', r'BOTH SAEM'),
+    ('DIFFRINT', r'DIFFRINT'),
+    ('AN', r'AN'),
+    ('VISIBLE', r'VISIBLE'),
+    ('SMOOSH', r'SMOOSH'),
+    ('MKAY', r'MKAY'),
+    ('GIMMEH', r'GIMMEH'),
+
+    ('YARN', r'"[^"]*"'),
+    ('NUMBR', r'-?\d+\.\d+|-?\d+'),
+    ('TROOF', r'WIN|FAIL'),
+
+    ('POSSESSIVE_Z', r"'Z"),
+    ('IDENTIFIER', r'[a-zA-Z][a-zA-Z0-9_]*'),
+]
+
+# Integer token kinds are the group numbers of the master pattern, so
+# TOKEN_TYPES[kind] gives back the name used in Token.type. Kind 0 is EOF.
+TOKEN_TYPES = ('EOF',) + tuple(token_type for token_type, _ in TOKEN_SPECS)
+TOKEN_KINDS = {token_type: kind for kind, token_type in enumerate(TOKEN_TYPES)}
+
+# Alternation is tried left to right, which keeps the priority of TOKEN_SPECS.
+MASTER_PATTERN = re.compile('|'.join(f'(?P<{token_type}>{pattern})' for token_type, pattern in TOKEN_SPECS))
+
+# Same groups for bytes-like sources (mmap); CRLF is accepted as a newline there
+# because the file is not decoded through universal newlines.
+MASTER_PATTERN_BYTES = re.compile(
+    MASTER_PATTERN.pattern
+    .replace(r'(?P<NEWLINE>\n+)', r'(?P<NEWLINE>(?:\r?\n)+)')
+    .replace(r'(?P<COMMENT>BTW.*)', r'(?P<COMMENT>BTW[^\r\n]*)')
+    .encode('ascii')
+)
+
+EOF = TOKEN_KINDS['EOF']
+SKIP = TOKEN_KINDS['SKIP']
+NEWLINE = TOKEN_KINDS['NEWLINE']
+YARN = TOKEN_KINDS['YARN']
+
 
 class Lexer:
     def __init__(self, code: str):
@@ -12,75 +91,97 @@ class Lexer:
         self.column = 1
         self.pos = 0
 
-    def _get_token(self, token_specs):
-        for token_type, pattern in token_specs:
-            regex = re.compile(pattern)
-            match = regex.match(self.code, self.pos)
-            if match:
-                value = match.group(0)
-                token = Token(token_type, value, self.line, self.column)
-                self.pos = match.end(0)
-                lines = value.split('\n')
-                if len(lines) > 1:
-                    self.line += len(lines) - 1
-                    self.column = len(lines[-1]) + 1
-                else:
-                    self.column += len(value)
-                return token
-        return None
+    # Yields (kind, value, line, column) with integer kinds; SKIP and EOF are not emitted.
+    def scan(self):
+        if isinstance(self.code, str):
+            return self._scan(range(len(TOKEN_TYPES)))
+        return self._scan_bytes(range(len(TOKEN_TYPES)))
 
-    def tokenize(self) -> list[Token]:
-        tokens = []
-        token_specs = [
-            ('SKIP', r'[ \t]+'),
-            ('NEWLINE', r'\n+'),
-            ('COMMENT', r'BTW.*'),
-
-            ('O_RLY', r'O RLY\?'),
-            ('YA_RLY', r'YA RLY'),
-            ('NO_WAI', r'NO WAI'),
-            ('OIC', r'OIC'),
-            ('BUKKIT', r'BUKKIT'),
-            ('MAEK', r'MAEK'),
-
-            ('HOW_IZ_I', r'HOW IZ I'),
-            ('IF_U_SAY_SO', r'IF U SAY SO'),
-            ('FOUND_YR', r'FOUND YR'),
-            ('HOW_DUZ_I', r'HOW DUZ I'),
-            ('A_NEW', r'A NEW'),
-            ('ME', r'ME'),
-            ('YR', r'YR'),
-
-            ('HAI', r'HAI 1\.2'),
-            ('KTHXBYE', r'KTHXBYE'),
-            ('KTHX', r'KTHX'),
-            ('I_HAS_A', r'I HAS A'),
-            ('ITZ', r'ITZ'),
-            ('R', r'R'),
-            ('SUM_OF', r'SUM OF'),
-            ('DIFF_OF', r'DIFF OF'),
-            ('PRODUKT_OF', r'PRODUKT OF'),
-            ('QUOSHUNT_OF', r'QUOSHUNT OF'),
-            ('BOTH_SAEM', r'BOTH SAEM'),
-            ('DIFFRINT', r'DIFFRINT'),
-            ('AN', r'AN'),
-            ('VISIBLE', r'VISIBLE'),
-
-            ('YARN', r'"[^"]*"'),
-            ('NUMBR', r'-?\d+\.\d+|-?\d+'),
-            ('TROOF', r'WIN|FAIL'),
-
-            ('POSSESSIVE_Z', r"'Z"),
-            ('IDENTIFIER', r'[a-zA-Z][a-zA-Z0-9_]*'),
-        ]
-
-        while self.pos < len(self.code):
-            token = self._get_token(token_specs)
-            if token is None:
+    def stream(self):
+        if isinstance(self.code, str):
+            yield from map(Token._make, self._scan(TOKEN_TYPES))
+        else:
+            yield from map(Token._make, self._scan_bytes(TOKEN_TYPES))
+        yield Token('EOF', 'EOF', self.line, self.column)
+
+    def _scan(self, kinds):
+        code, match = self.code, MASTER_PATTERN.match
+        end = len(code)
+        pos, line = self.pos, self.line
+        line_start = pos - self.column + 1
+        while pos < end:
+            m = match(code, pos)
+            if m is None:
+                self.pos, self.line, self.column = pos, line, pos - line_start + 1
+                raise LexerError(
+                    f"Unexpected character '{code[pos]}' at line {self.line}, column {self.column}"
+                )
+            kind = m.lastindex
+            stop = m.end()
+            if kind != SKIP:
+                yield kinds[kind], m.group(), line, pos - line_start + 1
+                if kind == NEWLINE:
+                    line += stop - pos
+                    line_start = stop
+                elif kind == YARN:
+                    newlines = code.count('\n', pos, stop)
+                    if newlines:
+                        line += newlines
+                        line_start = code.rfind('\n', pos, stop) + 1
+            pos = stop
+        self.pos, self.line, self.column = pos, line, pos - line_start + 1
+
+    # Same as _scan over UTF-8 bytes. Columns count characters, so the byte/char
+    # difference of non-ASCII text on the current line is kept in `shift`.
+    def _scan_bytes(self, kinds):
+        code, match = self.code, MASTER_PATTERN_BYTES.match
+        end = len(code)
+        pos, line = self.pos, self.line
+        line_start, shift = pos - self.column + 1, 0
+        while pos < end:
+            m = match(code, pos)
+            if m is None:
+                self.pos, self.line, self.column = pos, line, pos - line_start - shift + 1
+                char = bytes(code[pos:pos + 4]).decode('utf-8', 'replace')[0]
                 raise LexerError(
-                    f"Unexpected character '{self.code[self.pos]}' at line {self.line}, column {self.column}"
+                    f"Unexpected character '{char}' at line {self.line}, column {self.column}"
                 )
-            if token.type != 'SKIP':
-                tokens.append(token)
-        tokens.append(Token('EOF', 'EOF', self.line, self.column))
-        return tokens
+            kind = m.lastindex
+            stop = m.end()
+            if kind != SKIP:
+                raw = m.group()
+                if kind == NEWLINE:
+                    newlines = raw.count(b'\n')
+                    yield kinds[kind], '\n' * newlines, line, pos - line_start - shift + 1
+                    line += newlines
+                    line_start, shift = stop, 0
+                    pos = stop
+                    continue
+                value = raw.decode('utf-8')
+                if b'\r\n' in raw:
+                    value = value.replace('\r\n', '\n')
+                yield kinds[kind], value, line, pos - line_start - shift + 1
+                if kind == YARN and b'\n' in raw:
+                    line += raw.count(b'\n')
+                    line_start = pos + raw.rfind(b'\n') + 1
+                    shift = (stop - line_start) - (len(value) - value.rfind('\n') - 1)
+                else:
+                    shift += len(raw) - len(value)
+            pos = stop
+        self.pos, self.line, self.column = pos, line, pos - line_start - shift + 1
+
+    def tokenize(self) -> list[Token]:
+        return list(self.stream())
+
+
+# Yields a read-only memory map of the file for Lexer; empty files cannot be mapped.
+@contextmanager
+def map_source(path):
+    with open(path, 'rb') as f:
+        try:
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b''
+            return
+        with source:
+            yield source
@@ -1,40 +1,248 @@
+import argparse
+import os
 import sys
 from .parser import Parser
 from .interpreter import Interpreter
+from .closure_compiler import ClosureInterpreter
+from .vm import DEFAULT_MAX_DEPTH, VirtualMachine
+from .bytecode import Compiler, disassemble_program
+from .cache import ProgramCache
+from .resolver import Resolver
+from .optimizer import Optimizer
+from .memo import DEFAULT_MEMO_SIZE, MemoTable
+from .output import DEFAULT_BUFFER_SIZE, FileSink, StreamSink
+from .input import DEFAULT_BUFFER_SIZE as DEFAULT_INPUT_BUFFER_SIZE, FileSource, StreamSource
+from .profiler import Profiler, ProfilingInterpreter
+from .hooks import CounterCollector
+from .batch import run_batch
+from . import parallel
+from .ast_nodes import dump
+from .inline_cache import format_ic_stats
 from .errors import LOLPythonError
-from .lexer import Lexer
+from .lexer import Lexer, map_source
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python -m lolpython.main <filepath>")
-        sys.exit(1)
+BACKENDS = {
+    'tree': Interpreter,
+    'closure': ClosureInterpreter,
+    'vm': VirtualMachine,
+}
 
-    filepath = sys.argv[1]
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            code = f.read()
-    except FileNotFoundError:
-        print(f"Error: File not found at '{filepath}'")
-        sys.exit(1)
 
+def parse_args(argv):
+    arg_parser = argparse.ArgumentParser(prog='python -m LOLpython.main')
+    arg_parser.add_argument('filepath', nargs='?')
+    arg_parser.add_argument('--batch', metavar='DIR',
+                            help='run every .lol script under DIR in a pool of worker processes')
+    arg_parser.add_argument('-j', '--jobs', type=int, metavar='N',
+                            help='worker processes for --batch (default: the number of CPUs)')
+    arg_parser.add_argument('--batch-output', metavar='DIR',
+                            help='write the stdout and stderr of every --batch script to DIR')
+    arg_parser.add_argument('--stream', action='store_true',
+                            help='lex a memory-mapped source on demand while parsing')
+    arg_parser.add_argument('--backend', choices=sorted(BACKENDS), default='tree',
+                            help='execution backend (default: tree-walking interpreter)')
+    arg_parser.add_argument('--disassemble', action='store_true',
+                            help='print the bytecode of the program instead of running it')
+    arg_parser.add_argument('--cache', action='store_true',
+                            help='reuse parsed programs stored in __lolcache__ next to the script')
+    arg_parser.add_argument('--cache-dir', metavar='DIR',
+                            help='keep cached programs in DIR (implies --cache)')
+    arg_parser.add_argument('--cache-stats', action='store_true',
+                            help='print cache hit/miss statistics to stderr')
+    arg_parser.add_argument('-O', '--optimize', action='store_true',
+                            help='fold constant expressions and drop dead branches before running')
+    arg_parser.add_argument('--dump-ast', action='store_true',
+                            help='print the (optimized) syntax tree instead of running it')
+    arg_parser.add_argument('--ic-stats', action='store_true',
+                            help='print inline cache hit rates per call and member-access site to stderr')
+    arg_parser.add_argument('--max-depth', type=int, metavar='N',
+                            help=f'limit on nested LOL calls for the vm backend (default: {DEFAULT_MAX_DEPTH})')
+    arg_parser.add_argument('--memoize', action='store_true',
+                            help='answer repeated calls to pure functions from an LRU table')
+    arg_parser.add_argument('--memo-size', type=int, default=DEFAULT_MEMO_SIZE, metavar='N',
+                            help=f'results kept by --memoize (default: {DEFAULT_MEMO_SIZE})')
+    arg_parser.add_argument('--memo-stats', action='store_true',
+                            help='print memoization hits, misses and evictions to stderr')
+    arg_parser.add_argument('--output', metavar='FILE',
+                            help='write the output of VISIBLE to FILE instead of stdout')
+    arg_parser.add_argument('--buffer-size', type=int, default=DEFAULT_BUFFER_SIZE, metavar='N',
+                            help=f'characters of VISIBLE output collected before a write, 0 to write '
+                                 f'every line (default: {DEFAULT_BUFFER_SIZE})')
+    arg_parser.add_argument('--input', metavar='FILE',
+                            help='read the lines of GIMMEH from FILE instead of stdin')
+    arg_parser.add_argument('--input-buffer-size', type=int, default=DEFAULT_INPUT_BUFFER_SIZE, metavar='N',
+                            help=f'bytes of input read at a time for GIMMEH (default: {DEFAULT_INPUT_BUFFER_SIZE})')
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='print calls, time per function and statement hits per line to stderr '
+                                 'and write collapsed stacks for flamegraph tools (tree backend)')
+    arg_parser.add_argument('--profile-stacks', metavar='FILE',
+                            help='where --profile writes collapsed stacks (default: the script path with .folded)')
+    arg_parser.add_argument('--profile-interval', type=float, metavar='MS',
+                            help='sample the LOL stack every MS milliseconds instead of timing every call')
+    arg_parser.add_argument('--counters', metavar='FILE',
+                            help="count statements, calls, allocations and errors and write them as JSON "
+                                 "to FILE at exit, '-' for stderr (tree backend)")
+    arg_parser.add_argument('--parmap-workers', type=int, metavar='N',
+                            help='processes used by PARMAP, 1 to map serially (default: the number of CPUs)')
+    arg_parser.add_argument('--parmap-threshold', type=int, default=parallel.PARALLEL_THRESHOLD, metavar='N',
+                            help=f'BUKKITs shorter than N are mapped serially by PARMAP '
+                                 f'(default: {parallel.PARALLEL_THRESHOLD})')
+    args = arg_parser.parse_args(argv)
+    if args.parmap_workers is not None and args.parmap_workers < 1:
+        arg_parser.error("--parmap-workers must be positive")
+    if (args.filepath is None) == (args.batch is None):
+        arg_parser.error("expected either a script path or --batch DIR")
+    if (args.jobs is not None or args.batch_output) and not args.batch:
+        arg_parser.error("--jobs and --batch-output require --batch")
+    if args.jobs is not None and args.jobs < 1:
+        arg_parser.error("--jobs must be positive")
+    if args.batch and (args.output or args.profile_stacks or args.counters not in (None, '-')):
+        arg_parser.error("--batch writes the output of every script separately, "
+                         "--output, --profile-stacks and --counters FILE cannot be used with it")
+    if args.counters and args.backend != 'tree':
+        arg_parser.error("--counters is only available for the tree backend")
+    if (args.profile_stacks or args.profile_interval is not None) and not args.profile:
+        arg_parser.error("--profile-stacks and --profile-interval require --profile")
+    if args.profile and args.backend != 'tree':
+        arg_parser.error("--profile is only available for the tree backend")
+    if args.profile_interval is not None and args.profile_interval <= 0:
+        arg_parser.error("--profile-interval must be positive")
+    if args.buffer_size < 0:
+        arg_parser.error("--buffer-size must not be negative")
+    if args.input_buffer_size < 1:
+        arg_parser.error("--input-buffer-size must be positive")
+    if args.memo_size < 1:
+        arg_parser.error("--memo-size must be positive")
+    if args.memo_stats and not args.memoize:
+        arg_parser.error("--memo-stats requires --memoize")
+    if args.max_depth is not None and args.backend != 'vm':
+        arg_parser.error("--max-depth requires --backend vm")
+    if args.ic_stats and args.backend == 'vm':
+        arg_parser.error("--ic-stats is not available for the vm backend")
+    return args
+
+
+def parse_source(code):
+    lexer = Lexer(code)
+    tokens = lexer.tokenize()
+    parser = Parser(tokens)
+    return parser.parse()
+
+
+def _parse_file(filepath, stream=False):
+    if stream:
+        with map_source(filepath) as source:
+            return Parser(Lexer(source).stream()).parse()
+
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return parse_source(f.read())
+
+
+# Cached programs are stored after optimization, so the flag is part of the cache key.
+_CACHE_OPTIMIZED = 1
+
+
+def _load_program(filepath, stream=False, optimizer=None):
+    program = _parse_file(filepath, stream=stream)
+    if optimizer is not None:
+        optimizer.optimize(program)
+    return program
+
+
+def _write_profile(profiler, stacks_path):
+    print(profiler.format_table(), file=sys.stderr)
+    with open(stacks_path, 'w', encoding='utf-8') as f:
+        f.write(profiler.collapsed_stacks())
+    print(f"profile: collapsed stacks written to {stacks_path}", file=sys.stderr)
+
+
+# Runs one script as described by the parsed arguments and returns the exit
+# status. `load(optimizer)`, if given, returns the program instead of reading
+# args.filepath, which then only names the script.
+def run_file(args, load=None):
+    filepath = args.filepath
     try:
-        lexer = Lexer(code)
-        tokens = lexer.tokenize()
+        optimizer = Optimizer() if args.optimize else None
+        if load is not None:
+            ast = load(optimizer)
+        elif args.cache or args.cache_dir:
+            cache = ProgramCache(args.cache_dir)
+            flags = _CACHE_OPTIMIZED if optimizer else 0
+            ast = cache.load(filepath, lambda: _load_program(filepath, args.stream, optimizer), flags)
+            if args.cache_stats:
+                print(cache.stats, file=sys.stderr)
+        else:
+            ast = _load_program(filepath, args.stream, optimizer)
+        Resolver().resolve(ast)
+
+        if args.dump_ast:
+            print(dump(ast))
+            if optimizer is not None and optimizer.stats.nodes_before:
+                print(optimizer.stats, file=sys.stderr)
+            return 0
 
-        parser = Parser(tokens)
-        ast = parser.parse()
+        if args.disassemble:
+            print(disassemble_program(Compiler().compile(ast)))
+            return 0
 
-        interpreter = Interpreter()
-        interpreter.interpret(ast)
+        parallel.configure(args.parmap_workers, args.parmap_threshold)
+        options = {}
+        if args.max_depth is not None:
+            options['max_depth'] = args.max_depth
+        if args.memoize:
+            options['memo'] = MemoTable(args.memo_size)
+        if args.input:
+            options['input'] = FileSource(args.input, args.input_buffer_size)
+        else:
+            options['input'] = StreamSource(buffer_size=args.input_buffer_size)
+        if args.output:
+            options['output'] = FileSink(args.output, args.buffer_size)
+        else:
+            options['output'] = StreamSink(buffer_size=args.buffer_size)
+        profiler = None
+        if args.profile:
+            interval = None if args.profile_interval is None else args.profile_interval / 1000
+            profiler = Profiler(interval)
+            interpreter = ProfilingInterpreter(profiler, **options)
+        else:
+            interpreter = BACKENDS[args.backend](**options)
+        counters = CounterCollector().attach(interpreter) if args.counters else None
+        try:
+            interpreter.interpret(ast)
+        finally:
+            options['output'].close()
+            options['input'].close()
+            if profiler is not None:
+                _write_profile(profiler, args.profile_stacks or os.path.splitext(filepath)[0] + '.folded')
+            if counters is not None:
+                counters.dump(args.counters)
+            if args.ic_stats:
+                print(format_ic_stats(interpreter.inline_caches), file=sys.stderr)
+            if args.memo_stats:
+                print(interpreter.memo.stats, file=sys.stderr)
 
         print("Interpretation finished successfully.")
+        return 0
 
+    except FileNotFoundError as e:
+        print(f"Error: File not found at '{e.filename or filepath}'")
+        return 1
     except LOLPythonError as e:
         print(f"An error occurred: {e}", file=sys.stderr)
-        sys.exit(1)
+        return 1
     except Exception as e:
         print(f"An unexpected internal error occurred: {e}", file=sys.stderr)
-        sys.exit(1)
+        return 1
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.batch:
+        status = run_batch(args, args.batch, args.jobs, args.batch_output)
+    else:
+        status = run_file(args)
+    if status:
+        sys.exit(status)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,78 @@
+from collections import OrderedDict
+
+DEFAULT_MEMO_SIZE = 4096
+
+# Returned by MemoTable.lookup when there is no entry; never a LOL value.
+MISSING = object()
+
+# Only immutable values are memoized: a cached BUKKIT or instance would be
+# shared between calls.
+_VALUE_TYPES = frozenset((int, float, str, bool, type(None)))
+
+
+def memo_key(func_def, args):
+    key = [id(func_def)]
+    for arg in args:
+        cls = arg.__class__
+        if cls not in _VALUE_TYPES:
+            return None
+        # The class keeps 1, 1.0 and WIN apart; repr keeps 0.0 and -0.0 apart.
+        key.append((cls, repr(arg) if cls is float else arg))
+    return tuple(key)
+
+
+class MemoStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.uncacheable = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __str__(self):
+        return (f"memo: {self.hits} hits, {self.misses} misses, {self.stores} stores, "
+                f"{self.evictions} evictions, {self.uncacheable} uncacheable calls")
+
+
+# Results of calls to pure functions (see purity.py), keyed by memo_key and
+# evicted least recently used first once `maxsize` entries are stored.
+class MemoTable:
+    def __init__(self, maxsize=DEFAULT_MEMO_SIZE):
+        if maxsize < 1:
+            raise ValueError("memo size must be positive")
+        self.maxsize = maxsize
+        self.stats = MemoStats()
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def key(self, func_def, args):
+        key = memo_key(func_def, args)
+        if key is None:
+            self.stats.uncacheable += 1
+        return key
+
+    def lookup(self, key):
+        entries = self._entries
+        value = entries.get(key, MISSING)
+        if value is MISSING:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+            entries.move_to_end(key)
+        return value
+
+    def store(self, key, value):
+        if value.__class__ not in _VALUE_TYPES:
+            return
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        self.stats.stores += 1
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.stats.evictions += 1
@@ -0,0 +1,152 @@
+from . import ast_nodes as ast
+from .errors import InterpreterError
+from .interpreter import Interpreter
+
+
+class OptimizerStats:
+    def __init__(self):
+        self.nodes_before = 0
+        self.nodes_after = 0
+        self.folded = 0
+        self.branches_removed = 0
+        self.declarations_removed = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __str__(self):
+        return (f"optimizer: removed {self.nodes_before - self.nodes_after} of {self.nodes_before} nodes "
+                f"({self.folded} folded operations, {self.branches_removed} resolved O RLY?, "
+                f"{self.declarations_removed} unused declarations)")
+
+
+def _is_pure_initializer(node):
+    return node is None or isinstance(node, (ast.LiteralNode, ast.BukkitNode))
+
+
+def _collect_names(node, references, declarations):
+    pending = [node]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, ast.IdentifierNode):
+            references.add(node.name)
+        elif isinstance(node, (ast.VarDeclNode, ast.FuncDefNode, ast.ClassDefNode)):
+            declarations[node.name] = declarations.get(node.name, 0) + 1
+        pending.extend(ast.iter_child_nodes(node))
+
+
+# Folds BinaryOpNodes over literals, splices the taken branch of O RLY? on a
+# literal condition into the enclosing block and drops I HAS A declarations with
+# a pure initializer whose name is never used. Operations that would fail (type
+# errors, division by zero) are left in place so they still fail at run time.
+class Optimizer:
+    def __init__(self):
+        self.stats = OptimizerStats()
+        self._evaluator = Interpreter()
+
+    def optimize(self, program: ast.ProgramNode) -> ast.ProgramNode:
+        self.stats.nodes_before = ast.count_nodes(program)
+        program.statements = self._block(program.statements)
+        references, declarations = set(), {}
+        _collect_names(program, references, declarations)
+        self._unused = {
+            name for name, count in declarations.items() if count == 1 and name not in references
+        }
+        program.statements = self._drop_unused(program.statements)
+        self.stats.nodes_after = ast.count_nodes(program)
+        return program
+
+    def _block(self, statements):
+        result = []
+        for stmt in statements:
+            if isinstance(stmt, ast.IfNode):
+                stmt.condition = self._expression(stmt.condition)
+                if isinstance(stmt.condition, ast.LiteralNode):
+                    self.stats.branches_removed += 1
+                    taken = stmt.if_block if stmt.condition.value not in (False, None) else stmt.else_block
+                    result.extend(self._block(taken or []))
+                    continue
+                stmt.if_block = self._block(stmt.if_block)
+                if stmt.else_block is not None:
+                    stmt.else_block = self._block(stmt.else_block)
+            else:
+                stmt = self._statement(stmt)
+            result.append(stmt)
+        return result
+
+    def _statement(self, node):
+        if isinstance(node, ast.VarDeclNode):
+            if node.initializer:
+                node.initializer = self._expression(node.initializer)
+        elif isinstance(node, ast.AssignmentNode):
+            node.expression = self._expression(node.expression)
+            node.target = self._expression(node.target)
+        elif isinstance(node, ast.VisibleNode):
+            node.expressions = [self._expression(expr) for expr in node.expressions]
+        elif isinstance(node, ast.ReturnNode):
+            if node.value:
+                node.value = self._expression(node.value)
+        elif isinstance(node, ast.LoopNode):
+            if node.condition is not None:
+                node.condition = self._expression(node.condition)
+            node.body = self._block(node.body)
+        elif isinstance(node, ast.FuncDefNode):
+            node.body = self._block(node.body)
+        elif isinstance(node, ast.ClassDefNode):
+            for method in node.methods:
+                method.body = self._block(method.body)
+            for prop in node.properties:
+                if prop.initializer:
+                    prop.initializer = self._expression(prop.initializer)
+        else:
+            node = self._expression(node)
+        return node
+
+    def _expression(self, node):
+        if isinstance(node, ast.BinaryOpNode):
+            node.left = self._expression(node.left)
+            node.right = self._expression(node.right)
+            if isinstance(node.left, ast.LiteralNode) and isinstance(node.right, ast.LiteralNode):
+                try:
+                    value = self._evaluator.interpret(node)
+                except InterpreterError:
+                    return node
+                self.stats.folded += 1
+                return ast.LiteralNode(value=value)
+        elif isinstance(node, ast.FuncCallNode):
+            node.callee = self._expression(node.callee)
+            node.args = [self._expression(arg) for arg in node.args]
+        elif isinstance(node, ast.BuiltinCallNode):
+            node.args = [self._expression(arg) for arg in node.args]
+        elif isinstance(node, ast.MemberAccessNode):
+            node.object = self._expression(node.object)
+        elif isinstance(node, ast.BukkitAccessNode):
+            node.bukkit = self._expression(node.bukkit)
+            node.index = self._expression(node.index)
+        elif isinstance(node, ast.MaekNode):
+            node.target = self._expression(node.target)
+        elif isinstance(node, ast.SmooshNode):
+            node.parts = [self._expression(part) for part in node.parts]
+            if all(isinstance(part, ast.LiteralNode) for part in node.parts):
+                self.stats.folded += 1
+                return ast.LiteralNode(value=str(self._evaluator.interpret(node)))
+        return node
+
+    def _drop_unused(self, statements):
+        result = []
+        for stmt in statements:
+            if isinstance(stmt, ast.VarDeclNode):
+                if stmt.name in self._unused and _is_pure_initializer(stmt.initializer):
+                    self.stats.declarations_removed += 1
+                    continue
+            elif isinstance(stmt, ast.IfNode):
+                stmt.if_block = self._drop_unused(stmt.if_block)
+                if stmt.else_block is not None:
+                    stmt.else_block = self._drop_unused(stmt.else_block)
+            elif isinstance(stmt, (ast.LoopNode, ast.FuncDefNode)):
+                stmt.body = self._drop_unused(stmt.body)
+            elif isinstance(stmt, ast.ClassDefNode):
+                for method in stmt.methods:
+                    method.body = self._drop_unused(method.body)
+            result.append(stmt)
+        return result
@@ -0,0 +1,81 @@
+import sys
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+# Sinks receive every VISIBLE line without its newline through write() and are
+# flushed by the backends when a program ends, whether it finished or failed.
+class StreamSink:
+    # Collects lines and writes them to `stream` in one call once `buffer_size`
+    # characters are pending; 0 writes every line as it comes. Without a stream,
+    # the sys.stdout current at the time of each write is used.
+    def __init__(self, stream=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._lines = []
+        self._pending = 0
+        self.lines_written = 0
+
+    def write(self, line):
+        self._lines.append(line)
+        self._pending += len(line) + 1
+        if self._pending >= self.buffer_size:
+            self._write_pending()
+
+    def _write_pending(self):
+        if self._lines:
+            stream = self.stream or sys.stdout
+            stream.write('\n'.join(self._lines) + '\n')
+            self.lines_written += len(self._lines)
+            self._lines.clear()
+            self._pending = 0
+
+    def flush(self):
+        self._write_pending()
+        (self.stream or sys.stdout).flush()
+
+    def close(self):
+        self.flush()
+
+
+class FileSink(StreamSink):
+    def __init__(self, path, buffer_size=DEFAULT_BUFFER_SIZE):
+        super().__init__(open(path, 'w', encoding='utf-8'), buffer_size)
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.stream.close()
+
+
+class CollectSink:
+    # Keeps every line in memory, e.g. to compare the output of two backends.
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+    def getvalue(self):
+        return ''.join(line + '\n' for line in self.lines)
+
+
+class CallbackSink:
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, line):
+        self.callback(line)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
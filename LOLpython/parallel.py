@@ -0,0 +1,156 @@
+import atexit
+import os
+import pickle
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from . import ast_nodes as ast
+from .bukkit import Bukkit
+from .errors import InterpreterError
+from .interpreter import Interpreter, LOLCallable
+from .output import CollectSink
+from .resolver import Resolver
+
+# Inputs shorter than this are mapped in the calling process: below it, sending
+# the function and items to the pool costs more than it saves.
+PARALLEL_THRESHOLD = 2048
+# Chunks per worker, so that workers which finish early pick up more work.
+CHUNKS_PER_WORKER = 4
+# Prepared interpreters kept per process, least recently used dropped first.
+PREPARED_CACHE_SIZE = 16
+
+# Items that arrive in a worker unchanged; anything else (instances, BUKKITs,
+# functions) would be a copy there, so such inputs are mapped serially.
+_PORTABLE_TYPES = (int, float, str, bool, type(None))
+
+_in_worker = False
+# payload -> (Interpreter with the shipped functions defined, function to call), in every process.
+_prepared = OrderedDict()
+
+
+def _ship(func_def):
+    # The function and every pure function it reads, transitively; the names
+    # are bound again in the interpreter that receives them.
+    shipped, pending = {}, [func_def]
+    while pending:
+        current = pending.pop()
+        if current.name not in shipped:
+            shipped[current.name] = current
+            pending.extend(current.pure_callees or ())
+    return pickle.dumps(list(shipped.values()), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _prepare(payload):
+    prepared = _prepared.get(payload)
+    if prepared is not None:
+        _prepared.move_to_end(payload)
+        return prepared
+    func_defs = pickle.loads(payload)
+    program = Resolver().resolve(ast.ProgramNode(statements=list(func_defs)))
+    interpreter = Interpreter(output=CollectSink())
+    interpreter.interpret(program)
+    prepared = _prepared[payload] = (interpreter, func_defs[0])
+    if len(_prepared) > PREPARED_CACHE_SIZE:
+        _prepared.popitem(last=False)
+    return prepared
+
+
+def _check_results(results):
+    for result in results:
+        # In a worker a function value would refer to the copy of its definition
+        # made there; refused everywhere so that results do not depend on the pool.
+        if isinstance(result, (LOLCallable, ast.FuncDefNode)):
+            raise InterpreterError("PARMAP results cannot be functions")
+    return results
+
+
+def _map_chunk(payload, items):
+    interpreter, func_def = _prepare(payload)
+    return _check_results([interpreter.call_function(LOLCallable(func_def), [item]) for item in items])
+
+
+# Makes PARMAP map in this process from now on. Called in the workers of
+# PARMAP's own pool and of the batch and server pools, which cannot or should
+# not start pools of their own.
+def map_serially():
+    global _in_worker
+    _in_worker = True
+
+
+# Maps a pure LOL function of one argument over a BUKKIT, on a process pool for
+# large inputs. The function and the pure functions it calls are pickled and
+# defined in a fresh Interpreter in each worker; chunks of items go out with
+# that payload and the results are put back together in order. Otherwise the
+# function is called with `call`, the call_function of the backend running
+# the script, so its memo, call depth limit, hooks and profiler all apply.
+class ParallelMap:
+    def __init__(self, workers=None, threshold=PARALLEL_THRESHOLD):
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self._executor = None
+        self._payloads = {}
+
+    def __call__(self, call, function, bukkit):
+        func_def = self._check(function, bukkit)
+        items = list(bukkit)
+        if (_in_worker or self.workers < 2 or len(items) < self.threshold
+                or not all(item.__class__ in _PORTABLE_TYPES for item in items)):
+            return Bukkit.from_values(_check_results([call(function, [item]) for item in items]))
+
+        payload = self._payloads.get(id(func_def))
+        if payload is None or payload[0] is not func_def:
+            payload = self._payloads[id(func_def)] = (func_def, _ship(func_def))
+        payload = payload[1]
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=map_serially)
+        size = -(-len(items) // (self.workers * CHUNKS_PER_WORKER))
+        chunks = [items[start:start + size] for start in range(0, len(items), size)]
+        results = []
+        for chunk in self._executor.map(partial(_map_chunk, payload), chunks):
+            results.extend(chunk)
+        return Bukkit.from_values(results)
+
+    @staticmethod
+    def _check(function, bukkit):
+        if not isinstance(function, LOLCallable) or function.instance is not None:
+            raise InterpreterError(f"PARMAP needs a function, but got {type(function)}")
+        func_def = function.func_def
+        if len(func_def.params) != 1:
+            raise InterpreterError(
+                f"PARMAP needs a function of one argument, but '{func_def.name}' takes {len(func_def.params)}")
+        if not func_def.pure:
+            raise InterpreterError(f"PARMAP needs a pure function, but '{func_def.name}' is not pure")
+        if not isinstance(bukkit, Bukkit):
+            raise InterpreterError(f"PARMAP requires a BUKKIT, but got {type(bukkit)}")
+        return func_def
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+_default = None
+
+
+def configure(workers=None, threshold=PARALLEL_THRESHOLD):
+    global _default
+    if _default is not None:
+        _default.close()
+    _prepared.clear()
+    _default = ParallelMap(workers, threshold)
+    return _default
+
+
+def parmap(call, function, bukkit):
+    if _default is None:
+        configure()
+    return _default(call, function, bukkit)
+
+
+@atexit.register
+def _shutdown():
+    if _default is not None:
+        _default.close()
@@ -1,18 +1,51 @@
+import re
+import sys
+
 from . import ast_nodes as ast
+from .bukkit import BUILTINS
 from .errors import ParserError
 
+# :{name} in a YARN literal reads the variable `name`.
+_INTERPOLATION = re.compile(r':\{([a-zA-Z][a-zA-Z0-9_]*)\}')
+# Tokens that end a SMOOSH without MKAY at the end of a line or block.
+_SMOOSH_TERMINATORS = ('MKAY', 'NEWLINE', 'EOF', 'KTHXBYE', 'COMMENT', 'IF_U_SAY_SO', 'OIC', 'NO_WAI', 'KTHX',
+                       'IM_OUTTA_YR', 'O_RLY')
+
 
 class Parser:
-    def __init__(self, tokens: list):
-        self.tokens = tokens
-        self.pos = 0
+    # Tokens are pulled on demand, so `tokens` may be a list or a generator such as
+    # Lexer.stream(); only the current token and one token of lookahead are kept.
+    def __init__(self, tokens):
+        self._tokens = iter(tokens)
+        self._eof = None
+        self._next = None
+        self._token = self._pull()
+
+    def _pull(self):
+        token = next(self._tokens, None)
+        if token is None:
+            if self._eof is None:
+                raise ParserError("Unexpected end of input")
+            return self._eof
+        if token.type == 'EOF':
+            self._eof = token
+        return token
 
     def _current(self):
-        return self.tokens[self.pos]
+        return self._token
+
+    def _peek(self):
+        if self._next is None:
+            self._next = self._pull()
+        return self._next
 
     def _advance(self):
-        self.pos += 1
-        return self.tokens[self.pos - 1]
+        token = self._token
+        if self._next is None:
+            self._token = self._pull()
+        else:
+            self._token, self._next = self._next, None
+        return token
 
     def _eat(self, token_type):
         token = self._current()
@@ -20,6 +53,10 @@ class Parser:
             return self._advance()
         raise ParserError(f"Expected token {token_type} but got {token.type} at line {token.line}")
 
+    def _name(self):
+        # Interned so that every node naming the same variable shares one string.
+        return sys.intern(self._eat('IDENTIFIER').value)
+
     def _consume_whitespace(self):
         while self._current().type in ('NEWLINE', 'COMMENT'):
             self._advance()
@@ -41,12 +78,23 @@ class Parser:
         return statements
 
     def _parse_statement(self):
+        token = self._current()
+        stmt = self._parse_statement_body()
+        stmt.line, stmt.column = token.line, token.column
+        return stmt
+
+    def _parse_statement_body(self):
         token_type = self._current().type
         if token_type == 'I_HAS_A': return self._parse_var_decl()
         if token_type == 'VISIBLE': return self._parse_visible()
         if token_type == 'HOW_IZ_I': return self._parse_func_def()
         if token_type == 'HOW_DUZ_I': return self._parse_class_def()
         if token_type == 'FOUND_YR': return self._parse_return()
+        if token_type == 'IM_IN_YR': return self._parse_loop()
+        if token_type == 'GIMMEH': return self._parse_gimmeh()
+        if token_type == 'GTFO':
+            self._advance()
+            return ast.BreakNode()
 
         expr = self._parse_expression()
         self._consume_whitespace()
@@ -87,7 +135,7 @@ class Parser:
                     index = self._parse_postfix_expression()
                     expr = ast.BukkitAccessNode(bukkit=expr, index=index)
                 else:
-                    member = ast.IdentifierNode(name=self._eat('IDENTIFIER').value)
+                    member = ast.IdentifierNode(name=self._name())
                     expr = ast.MemberAccessNode(object=expr, member=member)
             else:
                 break
@@ -98,11 +146,11 @@ class Parser:
         if token.type in ('NUMBR', 'YARN', 'TROOF'):
             return self._parse_literal()
         if token.type == 'IDENTIFIER':
-            if token.value == 'A' and self.tokens[self.pos + 1].type == 'BUKKIT':
+            if token.value == 'A' and self._peek().type == 'BUKKIT':
                 self._advance()
                 self._advance()
                 return ast.BukkitNode()
-            return ast.IdentifierNode(name=self._advance().value)
+            return ast.IdentifierNode(name=sys.intern(self._advance().value))
         if token.type == 'A_NEW':
             return self._parse_new_instance()
         if token.type == 'ME':
@@ -113,6 +161,11 @@ class Parser:
             return ast.BukkitNode()
         if token.type == 'MAEK':
             return self._parse_maek()
+        if token.type == 'SMOOSH':
+            return self._parse_smoosh()
+        if token.type == 'NO_MOAR':
+            self._advance()
+            return ast.NoMoarNode()
         raise ParserError(f"Unexpected token when parsing a primary expression: {token}")
 
     def _parse_if_statement(self, condition):
@@ -129,34 +182,61 @@ class Parser:
         self._eat('OIC')
         return ast.IfNode(condition=condition, if_block=if_block, else_block=else_block)
 
+    def _parse_loop(self):
+        line = self._eat('IM_IN_YR').line
+        label = self._name()
+        update = var = condition_kind = condition = None
+        if self._current().type in ('UPPIN', 'NERFIN'):
+            update = self._advance().type
+            self._eat('YR')
+            var = ast.IdentifierNode(name=self._name())
+        if self._current().type in ('TIL', 'WILE'):
+            condition_kind = self._advance().type
+            condition = self._parse_expression()
+        self._consume_whitespace()
+        body = self._parse_statement_list(('IM_OUTTA_YR',))
+        self._eat('IM_OUTTA_YR')
+        end_label = self._name()
+        if end_label != label:
+            raise ParserError(f"Loop '{label}' opened at line {line} is closed with IM OUTTA YR {end_label}")
+        return ast.LoopNode(label=label, update=update, var=var, condition_kind=condition_kind,
+                            condition=condition, body=body)
+
     def _parse_var_decl(self):
         self._eat('I_HAS_A')
-        name = self._eat('IDENTIFIER').value
+        name = self._name()
         initializer = None
         if self._current().type == 'ITZ':
             self._eat('ITZ')
             initializer = self._parse_expression()
         return ast.VarDeclNode(name=name, initializer=initializer)
 
+    def _parse_gimmeh(self):
+        self._eat('GIMMEH')
+        target = self._parse_postfix_expression()
+        if not isinstance(target, (ast.IdentifierNode, ast.MemberAccessNode, ast.BukkitAccessNode)):
+            raise ParserError(f"Invalid GIMMEH target at line {self._current().line}.")
+        return ast.AssignmentNode(target=target, expression=ast.GimmehNode())
+
     def _parse_visible(self):
         self._eat('VISIBLE')
         expressions = [self._parse_expression()]
-        terminators = ('NEWLINE', 'EOF', 'KTHXBYE', 'COMMENT', 'IF_U_SAY_SO', 'OIC', 'NO_WAI', 'KTHX')
+        terminators = ('NEWLINE', 'EOF', 'KTHXBYE', 'COMMENT', 'IF_U_SAY_SO', 'OIC', 'NO_WAI', 'KTHX', 'IM_OUTTA_YR')
         while self._current().type not in terminators:
             expressions.append(self._parse_expression())
         return ast.VisibleNode(expressions=expressions)
 
     def _parse_func_def(self):
         self._eat('HOW_IZ_I')
-        name = self._eat('IDENTIFIER').value
+        name = self._name()
         params = []
         if self._current().type == 'YR':
             self._eat('YR')
-            params.append(ast.IdentifierNode(name=self._eat('IDENTIFIER').value))
+            params.append(ast.IdentifierNode(name=self._name()))
             while self._current().type == 'AN':
                 self._eat('AN')
                 self._eat('YR')
-                params.append(ast.IdentifierNode(name=self._eat('IDENTIFIER').value))
+                params.append(ast.IdentifierNode(name=self._name()))
         self._consume_whitespace()
         body = self._parse_statement_list(('IF_U_SAY_SO',))
         self._eat('IF_U_SAY_SO')
@@ -164,17 +244,20 @@ class Parser:
 
     def _parse_class_def(self):
         self._eat('HOW_DUZ_I')
-        name = self._eat('IDENTIFIER').value
+        name = self._name()
         self._consume_whitespace()
         properties, methods = [], []
         while self._current().type not in ('KTHX', 'EOF'):
-            token_type = self._current().type
-            if token_type == 'I_HAS_A':
-                properties.append(self._parse_var_decl())
-            elif token_type == 'HOW_IZ_I':
-                methods.append(self._parse_func_def())
+            token = self._current()
+            if token.type == 'I_HAS_A':
+                member = self._parse_var_decl()
+                properties.append(member)
+            elif token.type == 'HOW_IZ_I':
+                member = self._parse_func_def()
+                methods.append(member)
             else:
                 raise ParserError(f"Unexpected token in class body: {self._current()}")
+            member.line, member.column = token.line, token.column
             self._consume_whitespace()
         self._eat('KTHX')
         return ast.ClassDefNode(name=name, properties=properties, methods=methods)
@@ -182,7 +265,7 @@ class Parser:
     def _parse_return(self):
         self._eat('FOUND_YR')
         value = None
-        terminators = ('NEWLINE', 'COMMENT', 'IF_U_SAY_SO', 'OIC', 'NO_WAI', 'KTHX')
+        terminators = ('NEWLINE', 'COMMENT', 'IF_U_SAY_SO', 'OIC', 'NO_WAI', 'KTHX', 'IM_OUTTA_YR')
         if self._current().type not in terminators:
             value = self._parse_expression()
         return ast.ReturnNode(value=value)
@@ -200,17 +283,33 @@ class Parser:
         if self._current().type == 'YR':
             self._eat('YR')
             if self._current().type not in (
-            'NEWLINE', 'COMMENT', 'R', 'IF_U_SAY_SO', 'KTHXBYE', 'OIC', 'NO_WAI', 'KTHX'):
+            'NEWLINE', 'COMMENT', 'R', 'IF_U_SAY_SO', 'KTHXBYE', 'OIC', 'NO_WAI', 'KTHX', 'IM_OUTTA_YR'):
                 args.append(self._parse_expression())
                 while self._current().type == 'AN':
                     self._eat('AN')
                     self._eat('YR')
                     args.append(self._parse_expression())
+        if isinstance(callee, ast.IdentifierNode) and callee.name in BUILTINS:
+            arg_count = BUILTINS[callee.name][1]
+            if len(args) != arg_count:
+                raise ParserError(f"Built-in '{callee.name}' expected {arg_count} arguments, but got {len(args)}.")
+            return ast.BuiltinCallNode(name=callee.name, args=args)
         return ast.FuncCallNode(callee=callee, args=args)
 
+    def _parse_smoosh(self):
+        self._eat('SMOOSH')
+        parts = [self._parse_expression()]
+        while self._current().type not in _SMOOSH_TERMINATORS:
+            if self._current().type == 'AN':
+                self._advance()
+            parts.append(self._parse_expression())
+        if self._current().type == 'MKAY':
+            self._advance()
+        return ast.SmooshNode(parts=parts)
+
     def _parse_new_instance(self):
         self._eat('A_NEW')
-        class_name = ast.IdentifierNode(name=self._eat('IDENTIFIER').value)
+        class_name = ast.IdentifierNode(name=self._name())
         return ast.NewInstanceNode(class_name=class_name)
 
     def _parse_literal(self):
@@ -219,7 +318,20 @@ class Parser:
             val = token.value
             return ast.LiteralNode(value=int(val) if '.' not in val else float(val))
         if token.type == 'YARN':
-            return ast.LiteralNode(value=token.value[1:-1])
+            return self._parse_yarn(token.value[1:-1])
         if token.type == 'TROOF':
             return ast.LiteralNode(value=True if token.value == 'WIN' else False)
         raise ParserError(f"Invalid literal token: {token}")
+
+    def _parse_yarn(self, text):
+        pieces = _INTERPOLATION.split(text)
+        if len(pieces) == 1:
+            return ast.LiteralNode(value=text)
+        # split() alternates text and names: "a :{x} b" -> ['a ', 'x', ' b'].
+        parts = []
+        for index, piece in enumerate(pieces):
+            if index % 2:
+                parts.append(ast.IdentifierNode(name=sys.intern(piece)))
+            elif piece:
+                parts.append(ast.LiteralNode(value=piece))
+        return ast.SmooshNode(parts=parts)
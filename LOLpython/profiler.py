@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import Counter
+
+from . import ast_nodes as ast
+from .interpreter import Interpreter
+
+MODULE = '<module>'
+
+
+class FunctionStats:
+    __slots__ = ('name', 'line', 'calls', 'inclusive', 'exclusive', 'samples', 'own_samples')
+
+    def __init__(self, name, line):
+        self.name = name
+        self.line = line
+        self.calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.samples = 0
+        self.own_samples = 0
+
+    @property
+    def label(self):
+        return self.name if self.line is None else f"{self.name} (line {self.line})"
+
+
+# Records calls, per-line statement hits and the stack of LOL functions being
+# run. Deterministic mode times every call; with `interval` (seconds) calls are
+# only counted and a thread samples the stack instead, which estimates time.
+# Stacks are kept in the collapsed format of flamegraph.pl: frames joined by ';'
+# mapped to microseconds of exclusive time, or to a sample count.
+class Profiler:
+    def __init__(self, interval=None):
+        self.interval = interval
+        self.functions = {MODULE: FunctionStats(MODULE, None)}
+        self.lines = Counter()
+        self.stacks = Counter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self._names = [MODULE]
+        # [stats, start time, time spent in callees] per running function
+        self._frames = [[self.functions[MODULE], 0.0, 0.0]]
+        self._active = Counter({MODULE: 1})
+        self._sampler = None
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._frames[0][1] = time.perf_counter()
+        if self.interval is not None:
+            self._sampler = threading.Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        self._running = False
+        if self._sampler is not None:
+            self._sampler.join()
+        stats, start, callees = self._frames[0]
+        self.elapsed = time.perf_counter() - start
+        stats.calls = 1
+        stats.inclusive = self.elapsed
+        stats.exclusive = self.elapsed - callees
+        if self.interval is None:
+            self.stacks[MODULE] += round(stats.exclusive * 1e6)
+
+    def enter(self, name, line):
+        stats = self.functions.get(name)
+        if stats is None:
+            stats = self.functions[name] = FunctionStats(name, line)
+        stats.calls += 1
+        self._names.append(name)
+        if self.interval is None:
+            self._active[name] += 1
+            self._frames.append([stats, time.perf_counter(), 0.0])
+
+    def exit(self):
+        if self.interval is not None:
+            self._names.pop()
+            return
+        stats, start, callees = self._frames.pop()
+        elapsed = time.perf_counter() - start
+        self._frames[-1][2] += elapsed
+        name = self._names[-1]
+        self._active[name] -= 1
+        # Recursive activations are already covered by the outermost one.
+        if not self._active[name]:
+            stats.inclusive += elapsed
+        stats.exclusive += elapsed - callees
+        self.stacks[';'.join(self._names)] += round((elapsed - callees) * 1e6)
+        self._names.pop()
+
+    def _sample(self):
+        while self._running:
+            time.sleep(self.interval)
+            names = tuple(self._names)
+            self.samples += 1
+            self.stacks[';'.join(names)] += 1
+            functions = self.functions
+            for name in set(names):
+                functions[name].samples += 1
+            functions[names[-1]].own_samples += 1
+
+    def format_table(self, limit=20):
+        lines = []
+        functions = sorted(self.functions.values(), key=lambda stats: stats.exclusive, reverse=True)
+        total_calls = sum(stats.calls for stats in functions) - 1
+        lines.append(f"profile: {total_calls} calls in {self.elapsed:.3f}s")
+        if self.interval is None:
+            lines.append(f"  {'calls':>10} {'inclusive':>11} {'exclusive':>11}  function")
+            for stats in functions[:limit]:
+                lines.append(f"  {stats.calls:>10} {stats.inclusive:>10.4f}s {stats.exclusive:>10.4f}s  {stats.label}")
+        else:
+            functions.sort(key=lambda stats: stats.own_samples, reverse=True)
+            samples = self.samples or 1
+            lines.append(f"  {self.samples} samples every {self.interval * 1000:g} ms")
+            lines.append(f"  {'calls':>10} {'total %':>9} {'own %':>9}  function")
+            for stats in functions[:limit]:
+                lines.append(f"  {stats.calls:>10} {100 * stats.samples / samples:>8.1f}% "
+                             f"{100 * stats.own_samples / samples:>8.1f}%  {stats.label}")
+        lines.append(f"  {'line':>10} {'hits':>11}")
+        for line, hits in sorted(self.lines.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            lines.append(f"  {line:>10} {hits:>11}")
+        return '\n'.join(lines)
+
+    def collapsed_stacks(self):
+        return ''.join(f"{stack} {value}\n" for stack, value in sorted(self.stacks.items()) if value > 0)
+
+
+# Interpreter that reports every LOL call and executed statement to a Profiler.
+class ProfilingInterpreter(Interpreter):
+    def __init__(self, profiler=None, **options):
+        super().__init__(**options)
+        self.profiler = Profiler() if profiler is None else profiler
+
+    def interpret(self, node: ast.ASTNode):
+        line = node.line
+        if line is not None:
+            self.profiler.lines[line] += 1
+        if node.__class__ is ast.ProgramNode:
+            self.profiler.start()
+            try:
+                return super().interpret(node)
+            finally:
+                self.profiler.stop()
+        return super().interpret(node)
+
+    def _execute_function(self, func_def: ast.FuncDefNode, args: list, instance=None):
+        name = func_def.name if instance is None else f"{instance.lol_class.name}'Z {func_def.name}"
+        self.profiler.enter(name, func_def.line)
+        try:
+            return super()._execute_function(func_def, args, instance)
+        finally:
+            self.profiler.exit()
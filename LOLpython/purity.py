@@ -0,0 +1,91 @@
+from . import ast_nodes as ast
+
+# Statements and expressions a pure function body may contain. Anything else
+# (VISIBLE, ME, members, instances, nested definitions) makes it impure.
+_PURE_NODES = (
+    ast.LiteralNode, ast.IdentifierNode, ast.BinaryOpNode, ast.FuncCallNode, ast.BuiltinCallNode, ast.BukkitNode,
+    ast.BukkitAccessNode, ast.MaekNode, ast.SmooshNode, ast.VarDeclNode, ast.AssignmentNode, ast.ReturnNode,
+    ast.IfNode, ast.LoopNode, ast.BreakNode,
+)
+
+
+def _global_bindings(program):
+    declared, assigned = {}, set()
+    pending = [program]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.VarDeclNode, ast.FuncDefNode, ast.ClassDefNode)):
+            declared[node.name] = declared.get(node.name, 0) + 1
+        elif isinstance(node, ast.AssignmentNode) and isinstance(node.target, ast.IdentifierNode):
+            assigned.add(node.target.name)
+        pending.extend(ast.iter_child_nodes(node))
+    return declared, assigned
+
+
+def _read_names(func_def):
+    names, pending = set(), list(func_def.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, ast.IdentifierNode):
+            names.add(node.name)
+        pending.extend(ast.iter_child_nodes(node))
+    return names
+
+
+def _declared_names(func_def):
+    names, pending = set(), list(func_def.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, ast.VarDeclNode):
+            names.add(node.name)
+        pending.extend(ast.iter_child_nodes(node))
+    return names
+
+
+def _is_pure(func_def, pure, globals_):
+    # Names declared in loop bodies with their own scope have no slot in the
+    # layout, but live in scopes of this call all the same.
+    local = set(func_def.layout or ()) | _declared_names(func_def)
+    params = {param.name for param in func_def.params}
+    pending = list(func_def.body)
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, _PURE_NODES):
+            return False
+        if isinstance(node, ast.AssignmentNode):
+            if not isinstance(node.target, ast.IdentifierNode) or node.target.name not in local:
+                return False
+        elif isinstance(node, ast.IdentifierNode):
+            name = node.name
+            # A local that is read before its I HAS A falls back to the global of the same name.
+            if name not in pure and name not in params and (name not in local or name in globals_):
+                return False
+        pending.extend(ast.iter_child_nodes(node))
+    return True
+
+
+# Runs at the end of Resolver.resolve: sets FuncDefNode.pure on top-level
+# functions whose result depends only on their arguments. Such a function
+# declares and assigns nothing outside its own frame, prints nothing, does not
+# touch instances or BUKKIT items, and reads no globals other than functions
+# that are themselves pure and bound exactly once. Returns the names of the
+# pure functions.
+def mark_pure_functions(program: ast.ProgramNode):
+    declared, assigned = _global_bindings(program)
+    candidates = {
+        stmt.name: stmt for stmt in program.statements
+        if isinstance(stmt, ast.FuncDefNode) and declared[stmt.name] == 1 and stmt.name not in assigned
+    }
+    pure = set(candidates)
+    changed = True
+    while changed:
+        changed = False
+        for name in list(pure):
+            if not _is_pure(candidates[name], pure, program.layout or {}):
+                pure.discard(name)
+                changed = True
+    for name, func_def in candidates.items():
+        func_def.pure = name in pure
+        func_def.pure_callees = [candidates[callee] for callee in sorted(_read_names(func_def) & pure)] \
+            if func_def.pure else None
+    return pure
@@ -0,0 +1,179 @@
+from . import ast_nodes as ast
+from .bukkit import BUILTINS
+from .errors import InterpreterError
+from .purity import mark_pure_functions
+
+
+class _Body:
+    def __init__(self, kind, layout):
+        self.kind = kind          # 'program', 'function', 'method' or 'loop'
+        self.layout = layout      # name -> slot of every name this body can declare
+        self.declared = set()     # names certainly declared at this point
+        self.seen = set()         # names possibly declared at this point
+
+
+def _declarations(statements, names):
+    for stmt in statements:
+        if isinstance(stmt, (ast.VarDeclNode, ast.FuncDefNode, ast.ClassDefNode)):
+            names.append(stmt.name)
+        elif isinstance(stmt, ast.IfNode):
+            _declarations(stmt.if_block, names)
+            _declarations(stmt.else_block or (), names)
+        elif isinstance(stmt, ast.LoopNode):
+            if stmt.var is not None:
+                names.append(stmt.var.name)
+            if not ast.loop_is_scoped(stmt):
+                _declarations(stmt.body, names)
+    return names
+
+
+# Calls of a builtin's name always reach the builtin (see Parser._finish_call),
+# so the name cannot be given to anything else.
+def _check_not_builtin(name):
+    if name in BUILTINS:
+        raise InterpreterError(f"'{name}' is a built-in function and cannot be declared or assigned.")
+
+
+def _make_layout(names):
+    layout = {}
+    for name in names:
+        layout.setdefault(name, len(layout))
+    return layout
+
+
+def _may_return(statements):
+    for stmt in statements:
+        if isinstance(stmt, ast.ReturnNode):
+            return True
+        if isinstance(stmt, ast.IfNode):
+            if _may_return(stmt.if_block) or _may_return(stmt.else_block or ()):
+                return True
+        elif isinstance(stmt, ast.LoopNode) and _may_return(stmt.body):
+            return True
+    return False
+
+
+# Runs after Parser.parse: gives every function frame (and the global frame) a
+# fixed slot layout and annotates identifiers with their (depth, slot) address.
+# Methods see their caller's scope, so names they do not declare stay unresolved
+# and are looked up by name at run time, as does everything in a loop body that
+# runs in its own scope per iteration. Redeclarations and uses of undeclared
+# globals in top-level code that would certainly fail when reached are reported
+# here with the interpreter's messages; function bodies may never run, so their
+# redeclarations are left to call time. Declaring or assigning a builtin's name
+# is an error anywhere. Last, pure functions are
+# marked (purity.py).
+class Resolver:
+    def __init__(self):
+        self._globals = None
+
+    def resolve(self, program: ast.ProgramNode) -> ast.ProgramNode:
+        program.layout = _make_layout(_declarations(program.statements, []))
+        self._globals = program.layout
+        self._resolve_block(program.statements, _Body('program', program.layout), True)
+        mark_pure_functions(program)
+        return program
+
+    def _resolve_function(self, node: ast.FuncDefNode, kind):
+        names = [param.name for param in node.params]
+        node.layout = _make_layout(_declarations(node.body, names))
+        body = _Body(kind, node.layout)
+        for param in node.params:
+            _check_not_builtin(param.name)
+            param.depth, param.slot = 0, node.layout[param.name]
+            body.declared.add(param.name)
+            body.seen.add(param.name)
+        self._resolve_block(node.body, body, True)
+
+    def _resolve_block(self, statements, body, unconditional):
+        for stmt in statements:
+            self._resolve_statement(stmt, body, unconditional)
+            if unconditional and _may_return((stmt,)):
+                unconditional = False
+
+    def _declare(self, name, body, unconditional):
+        if body.kind == 'loop':
+            return
+        body.seen.add(name)
+        if unconditional:
+            body.declared.add(name)
+
+    def _resolve_statement(self, node, body, unconditional):
+        if isinstance(node, ast.VarDeclNode):
+            _check_not_builtin(node.name)
+            if body.kind == 'program' and unconditional and node.name in body.declared:
+                raise InterpreterError(f"Variable '{node.name}' already declared.")
+            node.slot = body.layout.get(node.name)
+            if node.initializer:
+                self._resolve_expression(node.initializer, body, unconditional)
+            self._declare(node.name, body, unconditional)
+        elif isinstance(node, ast.AssignmentNode):
+            if isinstance(node.target, ast.IdentifierNode):
+                _check_not_builtin(node.target.name)
+            self._resolve_expression(node.expression, body, unconditional)
+            self._resolve_expression(node.target, body, unconditional)
+        elif isinstance(node, ast.VisibleNode):
+            for expr in node.expressions:
+                self._resolve_expression(expr, body, unconditional)
+        elif isinstance(node, ast.ReturnNode):
+            if node.value:
+                self._resolve_expression(node.value, body, unconditional)
+        elif isinstance(node, ast.IfNode):
+            self._resolve_expression(node.condition, body, unconditional)
+            self._resolve_block(node.if_block, body, False)
+            self._resolve_block(node.else_block or (), body, False)
+        elif isinstance(node, ast.LoopNode):
+            if node.var is not None:
+                _check_not_builtin(node.var.name)
+                self._resolve_identifier(node.var, body, False)
+                self._declare(node.var.name, body, unconditional)
+            if node.condition is not None:
+                self._resolve_expression(node.condition, body, False)
+            if ast.loop_is_scoped(node):
+                self._resolve_block(node.body, _Body('loop', {}), False)
+            else:
+                self._resolve_block(node.body, body, False)
+        elif isinstance(node, ast.FuncDefNode):
+            _check_not_builtin(node.name)
+            self._declare(node.name, body, unconditional)
+            self._resolve_function(node, 'function')
+        elif isinstance(node, ast.ClassDefNode):
+            _check_not_builtin(node.name)
+            self._declare(node.name, body, unconditional)
+            for method in node.methods:
+                self._resolve_function(method, 'method')
+        else:
+            self._resolve_expression(node, body, unconditional)
+
+    def _resolve_expression(self, node, body, unconditional):
+        if isinstance(node, ast.IdentifierNode):
+            self._resolve_identifier(node, body, unconditional)
+        elif isinstance(node, ast.BinaryOpNode):
+            self._resolve_expression(node.left, body, unconditional)
+            self._resolve_expression(node.right, body, unconditional)
+        elif isinstance(node, ast.FuncCallNode):
+            self._resolve_expression(node.callee, body, unconditional)
+            for arg in node.args:
+                self._resolve_expression(arg, body, unconditional)
+        elif isinstance(node, ast.BuiltinCallNode):
+            for arg in node.args:
+                self._resolve_expression(arg, body, unconditional)
+        elif isinstance(node, ast.MemberAccessNode):
+            self._resolve_expression(node.object, body, unconditional)
+        elif isinstance(node, ast.BukkitAccessNode):
+            self._resolve_expression(node.bukkit, body, unconditional)
+            self._resolve_expression(node.index, body, unconditional)
+        elif isinstance(node, ast.MaekNode):
+            self._resolve_expression(node.target, body, unconditional)
+        elif isinstance(node, ast.SmooshNode):
+            for part in node.parts:
+                self._resolve_expression(part, body, unconditional)
+
+    def _resolve_identifier(self, node, body, unconditional):
+        name = node.name
+        if name in body.layout:
+            node.depth, node.slot = 0, body.layout[name]
+        elif body.kind == 'function' and name in self._globals:
+            node.depth, node.slot = 1, self._globals[name]
+        if body.kind == 'program' and unconditional and name not in body.seen:
+            raise InterpreterError(f"Undeclared variable '{name}'")
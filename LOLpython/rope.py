@@ -0,0 +1,75 @@
+from itertools import islice
+
+# SMOOSH results shorter than this are joined into a str right away.
+FLAT_LIMIT = 256
+
+
+# A YARN built by SMOOSH that has not been joined yet: the first `count` pieces
+# (str or Rope) of a piece list. Appending to the newest Rope of a list extends
+# that list in place, which older Ropes on it cannot see as they stop at their
+# own count, so building a YARN piece by piece in a loop takes linear time and
+# memory; appending to an older one copies its pieces first. The text is joined
+# the first time a Rope is printed, compared or hashed, and kept.
+class Rope:
+    __slots__ = ('pieces', 'count', 'length', '_flat')
+
+    def __init__(self, pieces, length):
+        self.pieces = pieces
+        self.count = len(pieces)
+        self.length = length
+        self._flat = None
+
+    def __str__(self):
+        flat = self._flat
+        if flat is None:
+            flat = self._flat = ''.join(_leaves(self))
+        return flat
+
+    def __eq__(self, other):
+        cls = other.__class__
+        if cls is Rope:
+            return self.length == other.length and str(self) == str(other)
+        if cls is str:
+            return self.length == len(other) and str(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __repr__(self):
+        return f"Rope({str(self)!r})"
+
+
+def _leaves(rope):
+    # Ropes nest when one is SMOOSHed after something else; walked without recursion.
+    stack = [islice(rope.pieces, rope.count)]
+    while stack:
+        for piece in stack[-1]:
+            if piece.__class__ is str:
+                yield piece
+            elif piece._flat is not None:
+                yield piece._flat
+            else:
+                stack.append(islice(piece.pieces, piece.count))
+                break
+        else:
+            stack.pop()
+
+
+# Joins YARNs (str or Rope), lazily once the result reaches FLAT_LIMIT characters.
+def concat(pieces):
+    length = 0
+    for piece in pieces:
+        length += len(piece) if piece.__class__ is str else piece.length
+    if length < FLAT_LIMIT:
+        # A Rope is never shorter than FLAT_LIMIT, so these are all str.
+        return ''.join(pieces)
+    first, rest = pieces[0], pieces[1:]
+    if len(rest) > 1 and all(piece.__class__ is str for piece in rest):
+        # One piece per SMOOSH keeps the per-piece overhead down.
+        rest = [''.join(rest)]
+    if first.__class__ is Rope and first.count == len(first.pieces):
+        buffer = first.pieces
+        buffer.extend(rest)
+        return Rope(buffer, length)
+    return Rope([first] + rest, length)
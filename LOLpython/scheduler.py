@@ -0,0 +1,223 @@
+import argparse
+import heapq
+import itertools
+import os
+import sys
+import time
+import tracemalloc
+
+from .batch import find_scripts
+from .bytecode import Compiler
+from .errors import InterpreterError, LOLPythonError
+from .input import ListSource
+from .lexer import Lexer
+from .output import CollectSink
+from .parser import Parser
+from .resolver import Resolver
+from .vm import VirtualMachine
+
+DEFAULT_SLICE = 1000
+POLICIES = ('round-robin', 'priority')
+
+
+class Task:
+    def __init__(self, name, vm, priority=0, max_steps=None, max_memory=None):
+        self.name = name
+        self.vm = vm
+        self.priority = priority
+        self.max_steps = max_steps
+        self.max_memory = max_memory
+        self.status = 'ready'       # 'ready', 'done' or 'failed'
+        self.error = None
+        self.slices = 0
+        self.cpu_time = 0.0
+        self.full_slices = 0        # slices that used their whole budget,
+        self.full_slice_time = 0.0  # and the time they took
+        self.memory = 0             # net bytes allocated by its slices, if traced
+        self.created = time.perf_counter()
+        self.finished = None
+        self.max_wait = 0.0
+        self._last_run = self.created
+
+    @property
+    def steps(self):
+        return self.vm.steps
+
+    @property
+    def output(self):
+        return self.vm.output
+
+
+def _jain_index(values):
+    values = [value for value in values if value > 0]
+    if not values:
+        return 1.0
+    return sum(values) ** 2 / (len(values) * sum(value * value for value in values))
+
+
+class SchedulerStats:
+    def __init__(self, tasks, elapsed):
+        self.tasks = len(tasks)
+        self.failed = sum(task.status == 'failed' for task in tasks)
+        self.steps = sum(task.steps for task in tasks)
+        self.slices = sum(task.slices for task in tasks)
+        self.elapsed = elapsed
+        # Jain's index of the time per full slice: 1.0 when every task got the
+        # same CPU time for the same budget.
+        self.fairness = _jain_index([task.full_slice_time / task.full_slices
+                                     for task in tasks if task.full_slices])
+        self.max_wait = max((task.max_wait for task in tasks), default=0.0)
+
+    def __str__(self):
+        elapsed = self.elapsed or 1e-9
+        return (f"scheduler: {self.tasks} scripts ({self.failed} failed), {self.steps} steps in "
+                f"{self.slices} slices, {self.elapsed:.3f}s, {self.steps / elapsed:,.0f} steps/s, "
+                f"{self.tasks / elapsed:.1f} scripts/s, fairness {self.fairness:.3f}, "
+                f"longest wait {self.max_wait * 1000:.1f} ms")
+
+
+# Runs many programs in one thread by giving each VirtualMachine `slice_steps`
+# instructions at a time. 'round-robin' takes turns in spawn order; 'priority'
+# always runs a ready task of the highest priority, taking turns among equals.
+# A task that exceeds its step quota, or whose slices allocated more than its
+# memory quota in total (measured with tracemalloc, which only runs while such
+# a quota is set), fails with an InterpreterError. A task that raises fails
+# with that error while the others keep running.
+class Scheduler:
+    def __init__(self, slice_steps=DEFAULT_SLICE, policy='round-robin'):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown scheduling policy {policy!r}, expected one of {', '.join(POLICIES)}")
+        self.slice_steps = slice_steps
+        self.policy = policy
+        self.tasks = []
+        self._ready = []
+        self._order = itertools.count()
+
+    # Scripts share the process, so a task reads no input unless given a source of its own.
+    def spawn(self, program, name=None, priority=0, max_steps=None, max_memory=None, **options):
+        vm = VirtualMachine(output=options.pop('output', None) or CollectSink(),
+                            input=options.pop('input', None) or ListSource(), **options)
+        vm.start(Compiler().compile(program))
+        task = Task(name or f'task-{len(self.tasks)}', vm, priority, max_steps, max_memory)
+        self.tasks.append(task)
+        self._push(task)
+        return task
+
+    def _push(self, task):
+        rank = -task.priority if self.policy == 'priority' else 0
+        heapq.heappush(self._ready, (rank, next(self._order), task))
+
+    def run(self):
+        start = time.perf_counter()
+        tracing = any(task.max_memory is not None for task in self.tasks) and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        try:
+            while self._ready:
+                self.run_slice()
+        finally:
+            if tracing:
+                tracemalloc.stop()
+        return SchedulerStats(self.tasks, time.perf_counter() - start)
+
+    # Runs the next ready task for one slice; returns it, or None if no task is ready.
+    def run_slice(self):
+        if not self._ready:
+            return None
+        task = heapq.heappop(self._ready)[2]
+        budget = self.slice_steps
+        if task.max_steps is not None:
+            budget = min(budget, task.max_steps - task.steps)
+        traced = task.max_memory is not None and tracemalloc.is_tracing()
+        if traced:
+            before = tracemalloc.get_traced_memory()[0]
+        now = time.perf_counter()
+        task.max_wait = max(task.max_wait, now - task._last_run)
+        try:
+            finished = task.vm.run_slice(budget)
+            if traced:
+                task.memory += tracemalloc.get_traced_memory()[0] - before
+            if not finished:
+                if task.max_steps is not None and task.steps >= task.max_steps:
+                    raise InterpreterError(f"Script '{task.name}' exceeded its quota of {task.max_steps} steps")
+                if traced and task.memory > task.max_memory:
+                    raise InterpreterError(
+                        f"Script '{task.name}' exceeded its quota of {task.max_memory} bytes of memory")
+        except Exception as e:
+            # A crash, even a bug in the VM, only fails its own task.
+            task.status, task.error = 'failed', e
+            finished = True
+        finally:
+            task._last_run = time.perf_counter()
+            task.cpu_time += task._last_run - now
+            task.slices += 1
+        if not finished and budget == self.slice_steps:
+            task.full_slices += 1
+            task.full_slice_time += task._last_run - now
+        if finished:
+            task.vm.finished = True
+            task.vm.output.flush()
+            if task.status == 'ready':
+                task.status = 'done'
+            task.finished = task._last_run
+        else:
+            self._push(task)
+        return task
+
+
+def _load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return Resolver().resolve(Parser(Lexer(f.read()).tokenize()).parse())
+
+
+def _parse_args(argv):
+    arg_parser = argparse.ArgumentParser(prog='python -m LOLpython.scheduler')
+    arg_parser.add_argument('paths', nargs='+', metavar='PATH',
+                            help='scripts to run, or directories whose .lol scripts to run')
+    arg_parser.add_argument('--slice', type=int, default=DEFAULT_SLICE, metavar='N',
+                            help=f'instructions a script runs before the next one (default: {DEFAULT_SLICE})')
+    arg_parser.add_argument('--policy', choices=POLICIES, default='round-robin')
+    arg_parser.add_argument('--max-steps', type=int, metavar='N',
+                            help='stop scripts that run more than N instructions')
+    arg_parser.add_argument('--max-memory', type=int, metavar='BYTES',
+                            help='stop scripts that allocate more than BYTES (traced with tracemalloc)')
+    arg_parser.add_argument('--quiet', '-q', action='store_true',
+                            help='only print failures and the statistics, not the output of every script')
+    args = arg_parser.parse_args(argv)
+    if args.slice < 1:
+        arg_parser.error("--slice must be positive")
+    if args.max_steps is not None and args.max_steps < 1:
+        arg_parser.error("--max-steps must be positive")
+    if args.max_memory is not None and args.max_memory < 1:
+        arg_parser.error("--max-memory must be positive")
+    return args
+
+
+def main(argv=None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    scheduler = Scheduler(args.slice, args.policy)
+    status = 0
+    for path in args.paths:
+        for script in find_scripts(path) if os.path.isdir(path) else [path]:
+            try:
+                program = _load(script)
+            except (OSError, LOLPythonError) as e:
+                print(f"FAIL {script}: {e}", file=sys.stderr)
+                status = 1
+                continue
+            scheduler.spawn(program, script, max_steps=args.max_steps, max_memory=args.max_memory)
+    stats = scheduler.run()
+    for task in scheduler.tasks:
+        if not args.quiet:
+            print(f"== {task.name} ({task.status}, {task.steps} steps, {task.slices} slices)")
+            sys.stdout.write(task.output.getvalue())
+        if task.error is not None:
+            print(f"FAIL {task.name}: {task.error}", file=sys.stderr)
+            status = 1
+    print(stats, file=sys.stderr)
+    if status:
+        sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
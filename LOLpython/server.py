@@ -0,0 +1,341 @@
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import math
+import multiprocessing
+import os
+import pickle
+import signal
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import main as lol_main
+from .parallel import map_serially
+from .client import decode_message, default_socket_path, encode_message
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_CACHE_SIZE = 256
+# Longest request line (script source and stdin) the server reads.
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+TIMEOUT_STATUS = 124
+
+# Options that write files next to the script or outside the response.
+_REJECTED_OPTIONS = {
+    'batch': '--batch',
+    'output': '--output',
+    'cache': '--cache',
+    'cache_dir': '--cache-dir',
+    'profile': '--profile',
+}
+
+
+def _check_options(args):
+    for name, option in _REJECTED_OPTIONS.items():
+        if getattr(args, name):
+            raise ValueError(f"{option} cannot be used through the server")
+    if args.counters not in (None, '-'):
+        raise ValueError("--counters FILE cannot be used through the server, use --counters -")
+
+
+def _execute(job):
+    # Runs in a worker: `program` is the pickled parse of the source if the
+    # server had it cached, and the response carries a new one otherwise.
+    new_program = None
+
+    def load(optimizer):
+        nonlocal new_program
+        if job['program'] is not None:
+            return pickle.loads(job['program'])
+        program = lol_main.parse_source(job['source'])
+        if optimizer is not None:
+            optimizer.optimize(program)
+        # Stored before the resolver annotates it, like ProgramCache does.
+        new_program = pickle.dumps(program, protocol=pickle.HIGHEST_PROTOCOL)
+        return program
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved_stdin = sys.stdin
+    sys.stdin = io.StringIO(job['stdin'])
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                args = lol_main.parse_args([job['name']] + job['args'])
+                _check_options(args)
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 2
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                status = 2
+            else:
+                status = lol_main.run_file(args, load)
+    finally:
+        sys.stdin = saved_stdin
+    return {
+        'status': status,
+        'stdout': stdout.getvalue(),
+        'stderr': stderr.getvalue(),
+        'elapsed': time.perf_counter() - start,
+        'program': new_program,
+    }
+
+
+def _worker_main(conn):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # Daemon processes cannot start PARMAP's pool.
+    map_serially()
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        conn.send(_execute(job))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self):
+        with contextlib.suppress(OSError):
+            self.conn.send(None)
+        self.process.join(1)
+        self.kill()
+
+    def kill(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ServerStats:
+    def __init__(self):
+        self.requests = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __str__(self):
+        return (f"server: {self.requests} requests, {self.failed} failed, {self.timeouts} timed out, "
+                f"program cache {self.cache_hits} hits, {self.cache_misses} misses")
+
+
+# Accepts requests (see client.py) on a Unix socket and runs each in a fresh
+# Interpreter on one of `workers` forked processes, which have imported the
+# interpreter already. A request may ask for a shorter timeout than the
+# server's; a worker that exceeds it is killed and replaced. Parsed programs are kept by the server, keyed by the hash of
+# their source, and sent to whichever worker runs that source next.
+class InterpreterServer:
+    def __init__(self, socket_path=None, workers=None, timeout=DEFAULT_TIMEOUT,
+                 cache_size=DEFAULT_CACHE_SIZE, log=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.worker_count = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.log = log
+        self.stats = ServerStats()
+        self._programs = OrderedDict()
+        self._context = multiprocessing.get_context()
+        self._workers = []
+        self._idle = None
+        self._threads = None
+        self._server = None
+
+    async def start(self):
+        self._idle = asyncio.Queue()
+        # Each busy worker has a thread waiting for its answer.
+        self._threads = ThreadPoolExecutor(self.worker_count)
+        for _ in range(self.worker_count):
+            self._add_worker()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, self.socket_path, limit=MAX_REQUEST_SIZE)
+        # Requests can name any file the server may read.
+        os.chmod(self.socket_path, 0o600)
+
+    def _add_worker(self):
+        worker = _Worker(self._context)
+        self._workers.append(worker)
+        self._idle.put_nowait(worker)
+
+    def _replace_worker(self, worker):
+        worker.kill()
+        self._workers.remove(worker)
+        self._add_worker()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for worker in self._workers:
+            worker.stop()
+        self._workers.clear()
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+
+    async def _handle(self, reader, writer):
+        try:
+            line = await reader.readline()
+            try:
+                request = decode_message(line)
+                response = await self.run(request)
+            except (ValueError, KeyError, TypeError, OSError) as e:
+                response = {'status': 2, 'stdout': '', 'stderr': f"Error: bad request: {e}\n",
+                            'elapsed': 0.0, 'cached': False}
+            writer.write(encode_message(response))
+            await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_source(self, request):
+        if 'source' in request:
+            return request['source'], request.get('name', '<source>')
+        path = request['path']
+        loop = asyncio.get_running_loop()
+        try:
+            source = await loop.run_in_executor(None, _read_file, path)
+        except FileNotFoundError:
+            return None, path
+        return source, path
+
+    async def run(self, request):
+        self.stats.requests += 1
+        timeout = float(request.get('timeout', self.timeout))
+        if not math.isfinite(timeout) or timeout <= 0:
+            raise ValueError(f"timeout must be a positive number of seconds, but got {timeout!r}")
+        timeout = min(timeout, self.timeout)
+        source, name = await self._read_source(request)
+        if source is None:
+            self.stats.failed += 1
+            return {'status': 1, 'stdout': f"Error: File not found at '{name}'\n", 'stderr': '',
+                    'elapsed': 0.0, 'cached': False}
+        args = [str(arg) for arg in request.get('args', [])]
+        optimized = '-O' in args or '--optimize' in args
+        key = (hashlib.sha256(source.encode('utf-8')).digest(), optimized)
+        program = self._programs.get(key)
+        if program is not None:
+            self._programs.move_to_end(key)
+            self.stats.cache_hits += 1
+        else:
+            self.stats.cache_misses += 1
+        job = {
+            'name': name,
+            'source': source,
+            'program': program,
+            'stdin': str(request.get('stdin', '')),
+            'args': args,
+        }
+
+        loop = asyncio.get_running_loop()
+        worker = await self._idle.get()
+        answered = False
+        try:
+            worker.conn.send(job)
+            if await loop.run_in_executor(self._threads, worker.conn.poll, timeout):
+                result = await loop.run_in_executor(self._threads, worker.conn.recv)
+                answered = True
+            else:
+                self.stats.timeouts += 1
+                result = {'status': TIMEOUT_STATUS, 'stdout': '', 'elapsed': timeout, 'program': None,
+                          'stderr': f"An error occurred: the script did not finish within {timeout:g} seconds\n"}
+        except (EOFError, OSError) as e:
+            result = {'status': 1, 'stdout': '', 'elapsed': 0.0, 'program': None,
+                      'stderr': f"An unexpected internal error occurred: the worker stopped ({e})\n"}
+        finally:
+            # A worker that did not answer may still be running the script.
+            if answered:
+                self._idle.put_nowait(worker)
+            else:
+                self._replace_worker(worker)
+
+        if result['program'] is not None:
+            self._programs[key] = result['program']
+            if len(self._programs) > self.cache_size:
+                self._programs.popitem(last=False)
+        if result['status']:
+            self.stats.failed += 1
+        if self.log is not None:
+            print(f"{result['status']:>3} {result['elapsed']:8.3f}s {'cached' if program else 'parsed'} {name}",
+                  file=self.log, flush=True)
+        return {
+            'status': result['status'],
+            'stdout': result['stdout'],
+            'stderr': result['stderr'],
+            'elapsed': result['elapsed'],
+            'cached': program is not None,
+        }
+
+
+def _read_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _parse_args(argv):
+    arg_parser = argparse.ArgumentParser(prog='python -m LOLpython.server')
+    arg_parser.add_argument('--socket', metavar='PATH',
+                            help=f'Unix socket to listen on (default: {default_socket_path()})')
+    arg_parser.add_argument('-j', '--workers', type=int, metavar='N',
+                            help='worker processes running scripts (default: the number of CPUs)')
+    arg_parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, metavar='S',
+                            help=f'seconds a script may run unless the request says otherwise '
+                                 f'(default: {DEFAULT_TIMEOUT:g})')
+    arg_parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE, metavar='N',
+                            help=f'parsed programs kept in memory (default: {DEFAULT_CACHE_SIZE})')
+    arg_parser.add_argument('-q', '--quiet', action='store_true',
+                            help='do not log every request to stderr')
+    args = arg_parser.parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        arg_parser.error("--workers must be positive")
+    if args.timeout <= 0:
+        arg_parser.error("--timeout must be positive")
+    if args.cache_size < 1:
+        arg_parser.error("--cache-size must be positive")
+    return args
+
+
+async def _serve(args):
+    server = InterpreterServer(args.socket, args.workers, args.timeout, args.cache_size,
+                               log=None if args.quiet else sys.stderr)
+    await server.start()
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, task.cancel)
+    print(f"LOLpython server listening on {server.socket_path} with {server.worker_count} workers",
+          file=sys.stderr, flush=True)
+    try:
+        await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await server.close()
+        print(server.stats, file=sys.stderr)
+
+
+def main(argv=None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    asyncio.run(_serve(args))
+
+
+if __name__ == "__main__":
+    main()
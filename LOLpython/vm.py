@@ -0,0 +1,414 @@
+from . import ast_nodes as ast
+from .bytecode import (
+    LOAD_CONST, LOAD_NAME, LOAD_ME, AUTOCALL, CHECK_UNDECLARED, DEFINE_NAME, STORE_NAME, BINARY,
+    POP_JUMP_IF_FALSE, POP_JUMP_IF_TRUE, JUMP, POP, ENTER_SCOPE, EXIT_SCOPE, PRINT, SMOOSH, READ_LINE,
+    AT_END_OF_INPUT, BUILD_BUKKIT, CHECK_BUKKIT, BUKKIT_GET, BUKKIT_SET, GET_MEMBER, SET_MEMBER, MAEK,
+    NEW_INSTANCE, INIT_FIELD, CHECK_CALL, CALL_BUILTIN, CALL, RETURN, TAIL_CALL, RAISE, HALT, NOP,
+    CodeObject, Compiler, CompiledProgram,
+)
+from .bukkit import BUILTINS, CALLING_BUILTINS, Bukkit
+from .errors import InterpreterError
+from .interpreter import LOLCallable, LOLClass, LOLInstance, Scope, format_value, smoosh
+from .input import StreamSource
+from .memo import MISSING
+from .output import StreamSink
+
+DEFAULT_MAX_DEPTH = 100_000
+
+_SUM_OF, _DIFF_OF, _PRODUKT_OF, _QUOSHUNT_OF, _BOTH_SAEM, _DIFFRINT = range(6)
+
+# The frame call_function returns to: HALT hands the result back to Python.
+_RETURN_TO_BUILTIN = CodeObject('<builtin>', 'function')
+_RETURN_TO_BUILTIN.instructions.extend((HALT, 0))
+
+
+def _check_numbrs(left_val, right_val):
+    if not isinstance(left_val, (int, float)) or not isinstance(right_val, (int, float)):
+        raise InterpreterError(
+            f"Arithmetic operations require NUMBRs, but got {type(left_val)} and {type(right_val)}"
+        )
+
+
+# Runs bytecode from bytecode.Compiler on a value stack. LOL calls push a saved
+# (code, pc, scope, instance, memo key) frame instead of recursing, and FOUND YR
+# is a plain RETURN instruction, so neither Python recursion nor ReturnSignal is
+# involved. `FOUND YR f YR ...` is a TAIL_CALL that reuses the frame, and at most
+# `max_depth` frames may be live at once. A frame whose memo key is not None
+# stores the value it returns in `memo`.
+# All of that state lives on the VM between calls of run_slice, so a program
+# can be run a number of instructions at a time (see scheduler.py).
+class VirtualMachine:
+    def __init__(self, max_depth=DEFAULT_MAX_DEPTH, memo=None, output=None, input=None):
+        self.global_scope = Scope()
+        self.max_depth = max_depth
+        self.memo = memo
+        self.output = StreamSink() if output is None else output
+        self.input = StreamSource() if input is None else input
+        self.steps = 0
+        self.finished = False
+        self._program = None
+        self._state = None
+        self._stack = None
+        self._frames = None
+
+    def interpret(self, node: ast.ProgramNode):
+        self.run(Compiler().compile(node))
+
+    def run(self, program: CompiledProgram):
+        self.start(program)
+        self.run_slice()
+
+    def start(self, program: CompiledProgram):
+        self._program = program
+        self._state = (program.module, 0, self.global_scope, None)
+        self._stack, self._frames = [], []
+        self.steps = 0
+        self.finished = False
+
+    # Executes at most `budget` instructions (all of them if None) and returns
+    # whether the program has finished. Output is flushed when it finishes or fails.
+    def run_slice(self, budget=None):
+        if self.finished:
+            return True
+        budget = -1 if budget is None else budget
+        try:
+            remaining = self._execute(budget)
+        except BaseException:
+            self.finished = True
+            self.output.flush()
+            raise
+        self.steps += budget - remaining
+        if self.finished:
+            self.output.flush()
+        return self.finished
+
+    # Calls `callee` with argument values, for builtins such as PARMAP. Its
+    # frames go on top of the running program's, so max_depth and the memo
+    # apply as for CALL, and it runs to completion whatever the slice budget.
+    def call_function(self, callee, args):
+        func_def = callee.func_def
+        if len(args) != len(func_def.params):
+            raise InterpreterError(
+                f"Function '{func_def.name}' expected {len(func_def.params)} arguments, but got {len(args)}."
+            )
+        memo = self.memo
+        key = None
+        if func_def.pure and memo is not None:
+            key = memo.key(func_def, args)
+            if key is not None:
+                value = memo.lookup(key)
+                if value is not MISSING:
+                    return value
+        frames = self._frames
+        if len(frames) >= self.max_depth:
+            raise InterpreterError(f"Maximum call depth of {self.max_depth} exceeded")
+        frames.append((_RETURN_TO_BUILTIN, 0, None, None, key))
+        scope = Scope(parent=self.global_scope)
+        for param, value in zip(func_def.params, args):
+            scope.variables[param.name] = value
+        state, finished = self._state, self.finished
+        self._state = (self._program.functions[id(func_def)], 0, scope, callee.instance)
+        try:
+            remaining = self._execute(-1)
+        finally:
+            self._state, self.finished = state, finished
+        self.steps += -1 - remaining
+        return self._stack.pop()
+
+    def _execute(self, budget):
+        program = self._program
+        functions, classes = program.functions, program.classes
+        max_depth = self.max_depth
+        memo = self.memo
+        write = self.output.write
+        global_scope = self.global_scope
+        stack, frames = self._stack, self._frames
+        push, pop = stack.append, stack.pop
+
+        code, pc, scope, instance = self._state
+        instructions, consts, names = code.instructions, code.consts, code.names
+
+        # A negative budget never reaches 0.
+        while budget:
+            budget -= 1
+            op = instructions[pc]
+            arg = instructions[pc + 1]
+            pc += 2
+
+            if op == LOAD_NAME:
+                name = names[arg]
+                current = scope
+                while current is not None:
+                    variables = current.variables
+                    if name in variables:
+                        value = variables[name]
+                        break
+                    current = current.parent
+                else:
+                    raise InterpreterError(f"Undeclared variable '{name}'")
+                if value.__class__ is ast.FuncDefNode:
+                    value = LOLCallable(value)
+                elif value is None and not scope.in_frame_of(current):
+                    raise InterpreterError(f"Undeclared variable '{name}'")
+                push(value)
+
+            elif op == LOAD_CONST:
+                push(consts[arg])
+
+            elif op == AUTOCALL:
+                callee = stack[-1]
+                if callee.__class__ is LOLCallable and not callee.func_def.params:
+                    pop()
+                    key = None
+                    if callee.func_def.pure and memo is not None:
+                        key = memo.key(callee.func_def, ())
+                        value = memo.lookup(key)
+                        if value is not MISSING:
+                            push(value)
+                            continue
+                    if len(frames) >= max_depth:
+                        raise InterpreterError(f"Maximum call depth of {max_depth} exceeded")
+                    frames.append((code, pc, scope, instance, key))
+                    scope = Scope(parent=global_scope if callee.instance is None else scope)
+                    instance = callee.instance
+                    code = functions[id(callee.func_def)]
+                    instructions, consts, names = code.instructions, code.consts, code.names
+                    pc = 0
+
+            elif op == BINARY:
+                right_val = pop()
+                left_val = stack[-1]
+                if arg == _BOTH_SAEM:
+                    stack[-1] = left_val == right_val
+                elif arg == _DIFFRINT:
+                    stack[-1] = left_val != right_val
+                else:
+                    _check_numbrs(left_val, right_val)
+                    if arg == _SUM_OF:
+                        stack[-1] = left_val + right_val
+                    elif arg == _DIFF_OF:
+                        stack[-1] = left_val - right_val
+                    elif arg == _PRODUKT_OF:
+                        stack[-1] = left_val * right_val
+                    else:
+                        if right_val == 0: raise InterpreterError("Division by zero")
+                        stack[-1] = left_val / right_val
+
+            elif op == POP_JUMP_IF_FALSE:
+                if pop() in (False, None):
+                    pc = arg
+
+            elif op == POP_JUMP_IF_TRUE:
+                if pop() not in (False, None):
+                    pc = arg
+
+            elif op == CHECK_CALL:
+                callee = stack[-1]
+                name, arg_count = consts[arg]
+                if not isinstance(callee, LOLCallable):
+                    raise InterpreterError(f"'{name}' is not a function or method.")
+                params = callee.func_def.params
+                if arg_count != len(params):
+                    raise InterpreterError(
+                        f"Function '{callee.func_def.name}' expected {len(params)} arguments, but got {arg_count}."
+                    )
+
+            elif op == CALL:
+                if arg:
+                    args = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    args = ()
+                callee = pop()
+                func_def = callee.func_def
+                key = None
+                if func_def.pure and memo is not None:
+                    key = memo.key(func_def, args)
+                    if key is not None:
+                        value = memo.lookup(key)
+                        if value is not MISSING:
+                            push(value)
+                            continue
+                if len(frames) >= max_depth:
+                    raise InterpreterError(f"Maximum call depth of {max_depth} exceeded")
+                frames.append((code, pc, scope, instance, key))
+                scope = Scope(parent=global_scope if callee.instance is None else scope)
+                variables = scope.variables
+                for param, value in zip(func_def.params, args):
+                    variables[param.name] = value
+                instance = callee.instance
+                code = functions[id(func_def)]
+                instructions, consts, names = code.instructions, code.consts, code.names
+                pc = 0
+
+            elif op == RETURN:
+                if not frames:
+                    raise InterpreterError("Return statement ('FOUND YR') outside of a function")
+                code, pc, scope, instance, key = frames.pop()
+                instructions, consts, names = code.instructions, code.consts, code.names
+                if key is not None:
+                    memo.store(key, stack[-1])
+
+            elif op == TAIL_CALL:
+                if arg:
+                    args = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    args = ()
+                callee = pop()
+                func_def = callee.func_def
+                if func_def.pure and memo is not None:
+                    # The frame's own key (if any) still receives the final result.
+                    tail_key = memo.key(func_def, args)
+                    value = MISSING if tail_key is None else memo.lookup(tail_key)
+                    if value is not MISSING:
+                        push(value)
+                        code, pc, scope, instance, key = frames.pop()
+                        instructions, consts, names = code.instructions, code.consts, code.names
+                        if key is not None:
+                            memo.store(key, value)
+                        continue
+                scope = Scope(parent=global_scope if callee.instance is None else scope)
+                variables = scope.variables
+                for param, value in zip(func_def.params, args):
+                    variables[param.name] = value
+                instance = callee.instance
+                code = functions[id(func_def)]
+                instructions, consts, names = code.instructions, code.consts, code.names
+                pc = 0
+
+            elif op == CHECK_UNDECLARED:
+                if names[arg] in scope.variables:
+                    raise InterpreterError(f"Variable '{names[arg]}' already declared.")
+
+            elif op == DEFINE_NAME:
+                scope.variables[names[arg]] = pop()
+
+            elif op == STORE_NAME:
+                name = names[arg]
+                value = pop()
+                current = scope
+                while current is not None:
+                    if name in current.variables:
+                        current.variables[name] = value
+                        break
+                    current = current.parent
+                else:
+                    raise InterpreterError(f"Undeclared variable '{name}'")
+
+            elif op == JUMP:
+                pc = arg
+
+            elif op == POP:
+                pop()
+
+            elif op == ENTER_SCOPE:
+                scope = Scope(parent=scope, loop=True)
+
+            elif op == EXIT_SCOPE:
+                scope = scope.parent
+
+            elif op == PRINT:
+                values = stack[-arg:]
+                del stack[-arg:]
+                write(" ".join([format_value(value) for value in values]))
+
+            elif op == GET_MEMBER:
+                obj = stack[-1]
+                if not isinstance(obj, LOLInstance):
+                    raise InterpreterError("Can only access properties or methods on an instance.")
+                index = obj.lol_class.fields.get(names[arg])
+                stack[-1] = obj.values[index] if index is not None else obj.get_member(names[arg])
+
+            elif op == SET_MEMBER:
+                obj = pop()
+                value = pop()
+                if not isinstance(obj, LOLInstance):
+                    raise InterpreterError("Can only assign to properties of an instance.")
+                obj.set_field(names[arg], value)
+
+            elif op == LOAD_ME:
+                if instance is None:
+                    raise InterpreterError("'ME' can only be used inside a method.")
+                push(instance)
+
+            elif op == BUILD_BUKKIT:
+                push(Bukkit())
+
+            elif op == CHECK_BUKKIT:
+                if not isinstance(stack[-1], Bukkit):
+                    if arg:
+                        raise InterpreterError("Can only perform indexed assignment on a BUKKIT.")
+                    raise InterpreterError("Can only perform indexed access on a BUKKIT.")
+
+            elif op == BUKKIT_GET:
+                index = pop()
+                if not isinstance(index, int):
+                    raise InterpreterError("BUKKIT index must be a NUMBR.")
+                stack[-1] = stack[-1].get(index)
+
+            elif op == BUKKIT_SET:
+                index = pop()
+                bukkit_obj = pop()
+                value = pop()
+                if not isinstance(index, int):
+                    raise InterpreterError("BUKKIT index must be a NUMBR.")
+                bukkit_obj.set(index, value)
+
+            elif op == MAEK:
+                target_val = stack[-1]
+                target_type = consts[arg]
+                if target_type.upper() == 'NUMBR' and isinstance(target_val, Bukkit):
+                    stack[-1] = len(target_val)
+                else:
+                    raise InterpreterError(f"Cannot MAEK {type(target_val)} A {target_type}")
+
+            elif op == NEW_INSTANCE:
+                class_name = names[arg]
+                lol_class = scope.get(class_name)
+                if not isinstance(lol_class, LOLClass):
+                    raise InterpreterError(f"'{class_name}' is not a class.")
+                push(LOLInstance(lol_class))
+                if len(frames) >= max_depth:
+                    raise InterpreterError(f"Maximum call depth of {max_depth} exceeded")
+                frames.append((code, pc, scope, instance, None))
+                code = classes[id(lol_class.class_def)]
+                instructions, consts, names = code.instructions, code.consts, code.names
+                pc = 0
+
+            elif op == INIT_FIELD:
+                value = pop()
+                stack[-1].set_field(names[arg], value)
+
+            elif op == SMOOSH:
+                values = stack[-arg:]
+                del stack[-arg:]
+                push(smoosh(values))
+
+            elif op == READ_LINE:
+                push(self.input.readline())
+
+            elif op == AT_END_OF_INPUT:
+                push(self.input.at_end())
+
+            elif op == CALL_BUILTIN:
+                name, arg_count = consts[arg]
+                args = stack[-arg_count:]
+                del stack[-arg_count:]
+                if name in CALLING_BUILTINS:
+                    push(BUILTINS[name][0](self.call_function, *args))
+                else:
+                    push(BUILTINS[name][0](*args))
+
+            elif op == HALT:
+                self.finished = True
+                return budget
+
+            elif op == RAISE:
+                raise InterpreterError(consts[arg])
+
+            elif op != NOP:
+                raise InterpreterError(f"Unknown opcode {op}")
+
+        self._state = (code, pc, scope, instance)
+        return budget
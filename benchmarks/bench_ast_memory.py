@@ -0,0 +1,66 @@
+# Memory held by a parsed program, slotted nodes vs dict-backed nodes:
+# python -m benchmarks.bench_ast_memory [size_mb]
+import dataclasses
+import sys
+import time
+import tracemalloc
+
+from LOLpython import ast_nodes as ast
+from LOLpython.lexer import Lexer
+from LOLpython.parser import Parser
+from benchmarks.bench_lexer import make_source
+
+_legacy_classes = {}
+
+
+def _legacy_node(node, values):
+    # The previous representation: a plain class with a per-instance __dict__ and
+    # a separate string object for every identifier occurrence.
+    cls = type(node)
+    legacy = _legacy_classes.get(cls)
+    if legacy is None:
+        legacy = _legacy_classes[cls] = type(cls.__name__, (), {})
+    obj = legacy()
+    for name, value in values.items():
+        if name == 'name' and isinstance(value, str) and len(value) > 1:
+            value = value[:1] + value[1:]
+        setattr(obj, name, value)
+    return obj
+
+
+def _slotted_node(node, values):
+    return type(node)(**values)
+
+
+def rebuild(node, make):
+    if isinstance(node, list):
+        return [rebuild(item, make) for item in node]
+    if isinstance(node, ast.ASTNode):
+        values = {f.name: rebuild(getattr(node, f.name), make) for f in dataclasses.fields(node)}
+        return make(node, values)
+    return node
+
+
+def held(program, make):
+    tracemalloc.start()
+    start = time.perf_counter()
+    copy = rebuild(program, make)
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del copy
+    return size, elapsed
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    source = make_source(size_mb)
+    program = Parser(Lexer(source).stream()).parse()
+    print(f"source: {len(source) / (1024 * 1024):.2f} MB, {ast.count_nodes(program)} nodes")
+    for label, make in (('dict', _legacy_node), ('slotted', _slotted_node)):
+        size, elapsed = held(program, make)
+        print(f"{label:<8} {size / (1024 * 1024):8.1f} MB  (built in {elapsed:.3f}s)")
+
+
+if __name__ == '__main__':
+    main()
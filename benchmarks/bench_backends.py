@@ -0,0 +1,50 @@
+# Execution backends on a recursive numeric script: python -m benchmarks.bench_backends [n]
+import contextlib
+import io
+import sys
+import time
+
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+FIB = '''HAI 1.2
+HOW IZ I fib YR n
+    BOTH SAEM n AN 0
+    O RLY?
+        YA RLY
+            FOUND YR 0
+    OIC
+    BOTH SAEM n AN 1
+    O RLY?
+        YA RLY
+            FOUND YR 1
+    OIC
+    I HAS A a ITZ fib YR DIFF OF n AN 1
+    I HAS A b ITZ fib YR DIFF OF n AN 2
+    FOUND YR SUM OF a AN b
+IF U SAY SO
+VISIBLE fib YR {n}
+KTHXBYE'''
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 22
+    source = FIB.format(n=n)
+    outputs = {}
+    for name, backend in BACKENDS.items():
+        program = Resolver().resolve(Parser(Lexer(source).tokenize()).parse())
+        out = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            backend().interpret(program)
+        elapsed = time.perf_counter() - start
+        outputs[name] = out.getvalue()
+        print(f"{name:<8} {elapsed:8.3f}s  fib({n}) = {outputs[name].strip()}")
+    if len(set(outputs.values())) != 1:
+        raise SystemExit("backends disagree")
+
+
+if __name__ == '__main__':
+    main()
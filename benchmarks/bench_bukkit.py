@@ -0,0 +1,79 @@
+# BUKKIT storage and built-ins: python -m benchmarks.bench_bukkit [n]
+import contextlib
+import io
+import sys
+import time
+import tracemalloc
+
+from LOLpython.bukkit import Bukkit
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+FILL = '''HAI 1.2
+I HAS A b ITZ A BUKKIT
+IM IN YR fill UPPIN YR i TIL BOTH SAEM i AN {n}
+    b'Z ITZ i R i
+IM OUTTA YR fill
+'''
+
+LOOP_SUM = FILL + '''I HAS A total ITZ 0
+IM IN YR sum UPPIN YR i TIL BOTH SAEM i AN {n}
+    I HAS A item ITZ b'Z ITZ i
+    total R SUM OF total AN item
+IM OUTTA YR sum
+VISIBLE total
+KTHXBYE'''
+
+BUILTIN_SUM = FILL + '''VISIBLE SUMZ YR b
+KTHXBYE'''
+
+
+def _run(backend, source):
+    program = Resolver().resolve(Parser(Lexer(source).tokenize()).parse())
+    out = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        backend().interpret(program)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def _allocated(build):
+    tracemalloc.start()
+    try:
+        value = build()
+        return tracemalloc.get_traced_memory()[0], value
+    finally:
+        tracemalloc.stop()
+
+
+def _fill(bukkit, n, step=1):
+    for i in range(0, n * step, step):
+        bukkit.set(i, i * 1000003)
+    return bukkit
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    outputs = set()
+    for name, backend in BACKENDS.items():
+        loop_time, loop_out = _run(backend, LOOP_SUM.format(n=n))
+        builtin_time, builtin_out = _run(backend, BUILTIN_SUM.format(n=n))
+        outputs.update((loop_out, builtin_out))
+        print(f"{name:<8} loop sum {loop_time:8.3f}s  fill + SUMZ {builtin_time:8.3f}s  sum = {loop_out.strip()}")
+    if len(outputs) != 1:
+        raise SystemExit("backends disagree")
+
+    list_bytes, _ = _allocated(lambda: [i * 1000003 for i in range(n)])
+    array_bytes, bukkit = _allocated(lambda: _fill(Bukkit(), n))
+    print(f"{n} NUMBRs: list {list_bytes / 1024:10.1f} KiB, {bukkit.storage} {array_bytes / 1024:10.1f} KiB")
+    far = n * 100
+    padded_bytes, _ = _allocated(lambda: [None] * far + [1])
+    sparse_bytes, bukkit = _allocated(lambda: _fill(Bukkit(), 100, step=far // 100))
+    print(f"100 items up to index {far}: padded list {padded_bytes / 1024:10.1f} KiB, "
+          f"{bukkit.storage} {sparse_bytes / 1024:10.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# Cost of the hook API on fib for the tree backend, best of `repeat` runs:
+# python -m benchmarks.bench_hooks [n] [repeat]
+import gc
+import sys
+import time
+
+from LOLpython.hooks import CounterCollector
+from LOLpython.interpreter import Interpreter
+from LOLpython.lexer import Lexer
+from LOLpython.output import CollectSink
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+from .bench_backends import FIB
+
+
+def _no_hooks(interpreter):
+    pass
+
+
+def _added_and_removed(interpreter):
+    def on_statement(node):
+        pass
+    interpreter.add_hook('statement', on_statement)
+    interpreter.remove_hook('statement', on_statement)
+
+
+def _statement_hook(interpreter):
+    interpreter.add_hook('statement', lambda node: None)
+
+
+def _counters(interpreter):
+    CounterCollector().attach(interpreter)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    source = FIB.format(n=n)
+    setups = {
+        'no hooks': _no_hooks,
+        'removed': _added_and_removed,
+        'statement': _statement_hook,
+        'counters': _counters,
+    }
+    best = dict.fromkeys(setups, float('inf'))
+    # Rounds interleave the setups so that drifting machine speed affects them alike.
+    for _ in range(repeat):
+        for name, setup in setups.items():
+            program = Resolver().resolve(Parser(Lexer(source).tokenize()).parse())
+            interpreter = Interpreter(output=CollectSink())
+            setup(interpreter)
+            gc.collect()
+            start = time.perf_counter()
+            interpreter.interpret(program)
+            best[name] = min(best[name], time.perf_counter() - start)
+    for name, elapsed in best.items():
+        print(f"{name:<10} {elapsed:8.3f}s  {elapsed / best['no hooks']:6.2f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# GIMMEH throughput per input source against plain Python, and the peak memory
+# of streaming a file: python -m benchmarks.bench_input [lines]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from LOLpython.input import FileSource
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.output import CollectSink
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+SCRIPT = '''HAI 1.2
+I HAS A lines ITZ 0
+I HAS A errors ITZ 0
+I HAS A line
+IM IN YR crunch TIL NO MOAR
+    GIMMEH line
+    lines R SUM OF lines AN 1
+    BOTH SAEM line AN "ERROR disk full" O RLY?
+    YA RLY
+        errors R SUM OF errors AN 1
+    OIC
+IM OUTTA YR crunch
+VISIBLE lines errors
+KTHXBYE'''
+
+
+# One readline() of a text file per GIMMEH, as a naive source would do it.
+class ReadlineSource:
+    def __init__(self, path):
+        self.file = open(path, 'r', encoding='utf-8')
+        self._next = self.file.readline()
+
+    def readline(self):
+        line, self._next = self._next, self.file.readline()
+        return line.rstrip('\n') if line else None
+
+    def at_end(self):
+        return not self._next
+
+    def close(self):
+        self.file.close()
+
+
+def plain_python(path):
+    lines = errors = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            lines += 1
+            if line.rstrip('\n') == "ERROR disk full":
+                errors += 1
+    return f"{lines} {errors}"
+
+
+def write_log(path, n):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n):
+            f.write("ERROR disk full\n" if i % 97 == 0 else f"INFO request {i} served in {i % 50} ms\n")
+
+
+def run(backend, program, source):
+    output = CollectSink()
+    try:
+        backend(output=output, input=source).interpret(program)
+    finally:
+        source.close()
+    return output.getvalue().strip()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    program = Resolver().resolve(Parser(Lexer(SCRIPT).tokenize()).parse())
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'app.log')
+        write_log(path, n)
+        start = time.perf_counter()
+        expected = plain_python(path)
+        elapsed = time.perf_counter() - start
+        print(f"{'python':<8} {'for line':<9} {elapsed:8.3f}s  {n / elapsed:12,.0f} lines/s")
+        sources = {'readline': ReadlineSource, 'buffered': FileSource}
+        for source_name, make_source in sources.items():
+            start = time.perf_counter()
+            source = make_source(path)
+            while not source.at_end():
+                source.readline()
+            source.close()
+            elapsed = time.perf_counter() - start
+            print(f"{'source':<8} {source_name:<9} {elapsed:8.3f}s  {n / elapsed:12,.0f} lines/s")
+        for name, backend in BACKENDS.items():
+            for source_name, make_source in sources.items():
+                start = time.perf_counter()
+                result = run(backend, program, make_source(path))
+                elapsed = time.perf_counter() - start
+                assert result == expected, (name, source_name, result, expected)
+                print(f"{name:<8} {source_name:<9} {elapsed:8.3f}s  {n / elapsed:12,.0f} lines/s")
+
+        # Peak memory of reading every line should not grow with the input.
+        for lines in (n, 5 * n):
+            write_log(path, lines)
+            tracemalloc.start()
+            source = FileSource(path)
+            while source.readline() is not None:
+                pass
+            source.close()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            size = os.path.getsize(path)
+            print(f"buffered: {lines:>10,} lines ({size / 2 ** 20:6.1f} MB), peak {peak / 2 ** 20:5.1f} MB traced")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+# Instance creation and member access: python -m benchmarks.bench_instances [depth]
+# The script creates 2**depth instances (a million by default) through a binary
+# recursion, so no backend needs more than `depth` nested calls.
+import contextlib
+import io
+import sys
+import time
+import timeit
+import tracemalloc
+
+from LOLpython.interpreter import LOLCallable, LOLClass, LOLInstance
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+SCRIPT = '''HAI 1.2
+HOW DUZ I pt
+    I HAS A x ITZ 0
+    I HAS A y ITZ 0
+    I HAS A label ITZ "pt"
+    HOW IZ I getx
+        FOUND YR ME'Z x
+    IF U SAY SO
+    HOW IZ I gety
+        FOUND YR ME'Z y
+    IF U SAY SO
+    HOW IZ I scale YR k
+        ME'Z x R PRODUKT OF ME'Z x AN k
+        ME'Z y R PRODUKT OF ME'Z y AN k
+    IF U SAY SO
+    HOW IZ I norm
+        FOUND YR SUM OF ME'Z x AN ME'Z y
+    IF U SAY SO
+KTHX
+I HAS A total ITZ 0
+HOW IZ I make YR n
+    BOTH SAEM n AN 0
+    O RLY?
+        YA RLY
+            I HAS A p ITZ A NEW pt
+            p'Z x R 3
+            p'Z y R 4
+            p'Z scale YR 2
+            total R SUM OF total AN p'Z norm
+            total R SUM OF total AN p'Z getx
+            total R SUM OF total AN p'Z gety
+            FOUND YR 0
+    OIC
+    I HAS A m ITZ DIFF OF n AN 1
+    make YR m
+    make YR m
+IF U SAY SO
+make YR {depth}
+VISIBLE total
+KTHXBYE'''
+
+
+class DictInstance:
+    # The previous representation: a per-instance fields dict.
+    def __init__(self, class_def):
+        self.class_def = class_def
+        self.fields = {}
+
+
+def legacy_member(obj, name):
+    for method in obj.class_def.methods:
+        if method.name == name:
+            return LOLCallable(method, instance=obj)
+    return obj.fields[name]
+
+
+def slotted_member(obj, name):
+    index = obj.lol_class.fields.get(name)
+    if index is not None:
+        return obj.values[index]
+    return obj.get_member(name)
+
+
+def _held_bytes(make, count):
+    tracemalloc.start()
+    objects = [make() for _ in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return size / count
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    source = SCRIPT.format(depth=depth)
+    outputs = {}
+    for name, backend in BACKENDS.items():
+        program = Resolver().resolve(Parser(Lexer(source).tokenize()).parse())
+        out = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            backend().interpret(program)
+        elapsed = time.perf_counter() - start
+        outputs[name] = out.getvalue()
+        print(f"{name:<8} {elapsed:8.3f}s  {2 ** depth} instances, total = {outputs[name].strip()}")
+    if len(set(outputs.values())) != 1:
+        raise SystemExit("backends disagree")
+
+    class_def = Parser(Lexer(source).tokenize()).parse().statements[0]
+    lol_class = LOLClass(class_def)
+
+    def make_dict():
+        obj = DictInstance(class_def)
+        obj.fields.update(x=3, y=4, label='pt')
+        return obj
+
+    def make_slotted():
+        obj = LOLInstance(lol_class)
+        obj.values[:] = (3, 4, 'pt')
+        return obj
+
+    dict_obj, slotted_obj = make_dict(), make_slotted()
+    for member in ('label', 'norm'):
+        legacy = min(timeit.repeat(lambda: legacy_member(dict_obj, member), number=100_000, repeat=5))
+        slotted = min(timeit.repeat(lambda: slotted_member(slotted_obj, member), number=100_000, repeat=5))
+        print(f"'Z {member:<6} method scan + dict {legacy * 1e4:6.0f} ns, method table + slots {slotted * 1e4:6.0f} ns")
+
+    count = min(2 ** depth, 200_000)
+    print(f"memory per instance: dict fields {_held_bytes(make_dict, count):.0f} B, "
+          f"slotted {_held_bytes(make_slotted, count):.0f} B")
+
+
+if __name__ == '__main__':
+    main()
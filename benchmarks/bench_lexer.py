@@ -0,0 +1,77 @@
+# Lexer throughput: python -m benchmarks.bench_lexer [size_mb]
+import re
+import sys
+import time
+
+from LOLpython.lexer import Lexer, Token, TOKEN_SPECS
+
+SNIPPET = '''HOW IZ I add YR a AN YR b
+    FOUND YR SUM OF a AN b
+IF U SAY SO
+I HAS A total ITZ 0
+BTW running total
+total R add YR total AN YR 42
+I HAS A ratio ITZ QUOSHUNT OF 3.5 AN 2
+BOTH SAEM total AN 42
+O RLY?
+    YA RLY
+        VISIBLE "total is" total
+    NO WAI
+        VISIBLE "something went wrong"
+OIC
+'''
+
+
+def make_source(size_mb):
+    repeats = max(1, int(size_mb * 1024 * 1024) // len(SNIPPET))
+    # Nothing after KTHXBYE: the parser expects EOF there, and bench_stream and
+    # bench_ast_memory parse this source.
+    return 'HAI 1.2\n' + SNIPPET * repeats + 'KTHXBYE'
+
+
+def legacy_tokenize(code):
+    # The original per-token loop over TOKEN_SPECS, kept here as the baseline.
+    tokens, pos, line, column = [], 0, 1, 1
+    while pos < len(code):
+        for token_type, pattern in TOKEN_SPECS:
+            match = re.compile(pattern).match(code, pos)
+            if match:
+                value = match.group(0)
+                token = Token(token_type, value, line, column)
+                pos = match.end(0)
+                lines = value.split('\n')
+                if len(lines) > 1:
+                    line += len(lines) - 1
+                    column = len(lines[-1]) + 1
+                else:
+                    column += len(value)
+                break
+        else:
+            raise ValueError(f"Unexpected character at line {line}, column {column}")
+        if token.type != 'SKIP':
+            tokens.append(token)
+    tokens.append(Token('EOF', 'EOF', line, column))
+    return tokens
+
+
+def measure(label, func, code):
+    start = time.perf_counter()
+    tokens = func(code)
+    elapsed = time.perf_counter() - start
+    mb = len(code) / (1024 * 1024)
+    print(f"{label:<8} {elapsed:8.3f}s {mb / elapsed:8.2f} MB/s  ({len(tokens)} tokens)")
+    return tokens
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    code = make_source(size_mb)
+    print(f"source: {len(code) / (1024 * 1024):.2f} MB")
+    before = measure('before', legacy_tokenize, code)
+    after = measure('after', lambda c: Lexer(c).tokenize(), code)
+    if before != after:
+        raise SystemExit("token streams differ")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# Counting loops against the equivalent recursion: python -m benchmarks.bench_loops [k]
+import contextlib
+import io
+import sys
+import time
+
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+LOOP = '''HAI 1.2
+I HAS A total ITZ 0
+IM IN YR sum UPPIN YR i TIL BOTH SAEM i AN {n}
+    total R SUM OF total AN i
+IM OUTTA YR sum
+VISIBLE total
+KTHXBYE'''
+
+# Sums lo..hi-1 by halving the range, so the recursion depth stays at k.
+RECURSION = '''HAI 1.2
+HOW IZ I total YR lo AN YR hi
+    I HAS A width ITZ DIFF OF hi AN lo
+    BOTH SAEM width AN 1
+    O RLY?
+        YA RLY
+            FOUND YR lo
+    OIC
+    I HAS A half ITZ QUOSHUNT OF width AN 2
+    I HAS A mid ITZ SUM OF lo AN half
+    I HAS A left ITZ total YR lo AN YR mid
+    I HAS A right ITZ total YR mid AN YR hi
+    FOUND YR SUM OF left AN right
+IF U SAY SO
+VISIBLE total YR 0 AN YR {n}
+KTHXBYE'''
+
+
+def _run(backend, source):
+    program = Resolver().resolve(Parser(Lexer(source).tokenize()).parse())
+    out = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        backend().interpret(program)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    n = 2 ** k
+    outputs = set()
+    for name, backend in BACKENDS.items():
+        loop_time, loop_out = _run(backend, LOOP.format(n=n))
+        rec_time, rec_out = _run(backend, RECURSION.format(n=n))
+        outputs.update((float(loop_out), float(rec_out)))
+        print(f"{name:<8} loop {loop_time:8.3f}s  recursion {rec_time:8.3f}s  "
+              f"({rec_time / loop_time:5.1f}x)  sum of 0..{n - 1} = {loop_out.strip()}")
+    if len(outputs) != 1:
+        raise SystemExit("backends disagree")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# Memoization of pure functions on fib: python -m benchmarks.bench_memo [n] [size ...]
+import contextlib
+import io
+import sys
+import time
+
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.memo import MemoTable
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+from .bench_backends import FIB
+
+
+def _run(backend, source, memo):
+    program = Resolver().resolve(Parser(Lexer(source).tokenize()).parse())
+    out = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        backend(memo=memo).interpret(program)
+    return time.perf_counter() - start, out.getvalue()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    sizes = [int(arg) for arg in sys.argv[2:]] or [4, 4096]
+    source = FIB.format(n=n)
+    outputs = set()
+    for name, backend in BACKENDS.items():
+        elapsed, output = _run(backend, source, None)
+        outputs.add(output)
+        print(f"{name:<8} {'off':>6} {elapsed:8.3f}s  fib({n}) = {output.strip()}")
+        for size in sizes:
+            memo = MemoTable(size)
+            elapsed, output = _run(backend, source, memo)
+            outputs.add(output)
+            print(f"{name:<8} {size:>6} {elapsed:8.3f}s  {memo.stats}")
+    if len(outputs) != 1:
+        raise SystemExit("backends disagree")
+
+
+if __name__ == '__main__':
+    main()
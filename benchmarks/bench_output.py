@@ -0,0 +1,39 @@
+# VISIBLE throughput per output sink: python -m benchmarks.bench_output [lines]
+import os
+import sys
+import time
+
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.output import CallbackSink, CollectSink, StreamSink
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+SCRIPT = '''HAI 1.2
+IM IN YR print UPPIN YR i TIL BOTH SAEM i AN {n}
+    VISIBLE "line" i
+IM OUTTA YR print
+KTHXBYE'''
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    source = SCRIPT.format(n=n)
+    with open(os.devnull, 'w') as devnull:
+        sinks = {
+            'print': lambda: CallbackSink(lambda line: print(line, file=devnull)),
+            'unbuffered': lambda: StreamSink(devnull, buffer_size=0),
+            'buffered': lambda: StreamSink(devnull),
+            'collect': CollectSink,
+        }
+        for name, backend in BACKENDS.items():
+            for sink_name, make_sink in sinks.items():
+                program = Resolver().resolve(Parser(Lexer(source).tokenize()).parse())
+                start = time.perf_counter()
+                backend(output=make_sink()).interpret(program)
+                elapsed = time.perf_counter() - start
+                print(f"{name:<8} {sink_name:<11} {elapsed:8.3f}s  {n / elapsed:12,.0f} lines/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# PARMAP scaling with the number of worker processes:
+# python -m benchmarks.bench_parmap [items] [work per item]
+import os
+import sys
+import time
+
+from LOLpython import parallel
+from LOLpython.main import BACKENDS, parse_source
+from LOLpython.output import CollectSink
+from LOLpython.resolver import Resolver
+
+SCRIPT = '''HAI 1.2
+HOW IZ I work YR x
+    I HAS A t ITZ 0
+    IM IN YR spin UPPIN YR k TIL BOTH SAEM k AN {work}
+        I HAS A step ITZ PRODUKT OF k AN x
+        t R SUM OF t AN step
+    IM OUTTA YR spin
+    FOUND YR t
+IF U SAY SO
+I HAS A b ITZ A BUKKIT
+IM IN YR fill UPPIN YR i TIL BOTH SAEM i AN {n}
+    b'Z ITZ i R i
+IM OUTTA YR fill
+I HAS A r ITZ PARMAP YR work AN YR b
+VISIBLE SUMZ YR r
+KTHXBYE'''
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    work = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    source = SCRIPT.format(n=n, work=work)
+    cpus = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, cpus} | set(range(8, cpus + 1, 8)))
+    print(f"{n} items, {work} iterations each, {cpus} CPUs")
+    baseline, outputs = None, set()
+    for workers in counts:
+        parallel.configure(workers, threshold=1)
+        program = Resolver().resolve(parse_source(source))
+        out = CollectSink()
+        start = time.perf_counter()
+        BACKENDS['vm'](output=out).interpret(program)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        outputs.add(out.getvalue())
+        print(f"{workers:>3} workers {elapsed:8.3f}s  speedup {baseline / elapsed:5.2f}x")
+    parallel.configure()
+    if len(outputs) != 1:
+        raise SystemExit("results differ between worker counts")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# Many small scripts multiplexed in one process, per slice size:
+# python -m benchmarks.bench_scheduler [scripts] [slice ...]
+import sys
+import time
+
+from LOLpython.lexer import Lexer
+from LOLpython.output import CollectSink
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+from LOLpython.scheduler import Scheduler
+from LOLpython.vm import VirtualMachine
+
+SCRIPT = '''HAI 1.2
+I HAS A total ITZ 0
+IM IN YR count UPPIN YR i TIL BOTH SAEM i AN {n}
+    total R SUM OF total AN i
+IM OUTTA YR count
+VISIBLE total
+KTHXBYE'''
+
+
+def main():
+    scripts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    slices = [int(arg) for arg in sys.argv[2:]] or [100, 1000, 10000]
+    # Scripts of varying length, so that short ones finish while long ones run.
+    programs = [Resolver().resolve(Parser(Lexer(SCRIPT.format(n=10 + i % 200)).tokenize()).parse())
+                for i in range(scripts)]
+
+    start = time.perf_counter()
+    for program in programs:
+        VirtualMachine(output=CollectSink()).interpret(program)
+    print(f"{'sequential':<16} {time.perf_counter() - start:8.3f}s")
+
+    for slice_steps in slices:
+        scheduler = Scheduler(slice_steps)
+        for program in programs:
+            scheduler.spawn(program)
+        stats = scheduler.run()
+        print(f"{'slice ' + str(slice_steps):<16} {stats.elapsed:8.3f}s  {stats.steps / stats.elapsed:12,.0f} steps/s"
+              f"  fairness {stats.fairness:.3f}  longest wait {stats.max_wait * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Building a report with SMOOSH, lazily joined against eager concatenation:
+# python -m benchmarks.bench_smoosh [lines]
+import sys
+import time
+import tracemalloc
+
+from LOLpython import rope
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.output import CollectSink
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+SCRIPT = '''HAI 1.2
+I HAS A report ITZ ""
+IM IN YR build UPPIN YR i TIL BOTH SAEM i AN {n}
+    report R SMOOSH report AN "request :{{i}} served in " i AN " ms; " MKAY
+IM OUTTA YR build
+VISIBLE report
+KTHXBYE'''
+
+
+def run(backend, n):
+    program = Resolver().resolve(Parser(Lexer(SCRIPT.format(n=n)).tokenize()).parse())
+    output = CollectSink()
+    start = time.perf_counter()
+    backend(output=output).interpret(program)
+    return time.perf_counter() - start, output.getvalue()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    # With no limit every SMOOSH joins its result at once, copying the report so far.
+    modes = {'rope': rope.FLAT_LIMIT, 'eager': float('inf')}
+    for name, backend in BACKENDS.items():
+        for lines in (n // 4, n // 2, n):
+            results = {}
+            for mode, limit in modes.items():
+                rope.FLAT_LIMIT = limit
+                try:
+                    elapsed, output = run(backend, lines)
+                    tracemalloc.start()
+                    run(backend, lines)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                finally:
+                    rope.FLAT_LIMIT = modes['rope']
+                results[mode] = output
+                print(f"{name:<8} {mode:<6} {lines:>8,} lines {elapsed:8.3f}s  "
+                      f"{lines / elapsed:10,.0f} lines/s  peak {peak / 2 ** 20:7.1f} MB")
+            assert results['rope'] == results['eager'], name
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+# Peak memory of parsing, whole-file vs streaming: python -m benchmarks.bench_stream [size_mb]
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from LOLpython.main import _parse_file
+from benchmarks.bench_lexer import make_source
+
+
+def measure(label, filepath, stream):
+    start = time.perf_counter()
+    _parse_file(filepath, stream=stream)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    program = _parse_file(filepath, stream=stream)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} {elapsed:8.3f}s  peak {peak / (1024 * 1024):8.1f} MB  ({len(program.statements)} statements)")
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    with tempfile.NamedTemporaryFile('w', suffix='.lol', delete=False, encoding='utf-8') as f:
+        f.write(make_source(size_mb))
+    try:
+        print(f"source: {os.path.getsize(f.name) / (1024 * 1024):.2f} MB")
+        measure('list', f.name, stream=False)
+        measure('stream', f.name, stream=True)
+    finally:
+        os.unlink(f.name)
+
+
+if __name__ == '__main__':
+    main()
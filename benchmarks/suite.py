@@ -0,0 +1,202 @@
+# Times lexing, parsing, resolving and running of the synthetic workloads and
+# compares the times with a saved baseline:
+#   python -m benchmarks.suite [workload ...] [--scale F] [--backend B]
+#       [--save-baseline FILE] [--baseline FILE [--threshold R]]
+# Exits with status 1 when a phase of a workload got slower than the baseline
+# by more than the threshold.
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from LOLpython.ast_nodes import count_nodes
+from LOLpython.hooks import CounterCollector
+from LOLpython.interpreter import Interpreter
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.output import CollectSink
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+from .workloads import WORKLOADS
+
+PHASES = ('lex', 'parse', 'resolve', 'run')
+DEFAULT_THRESHOLD = 0.10
+# Time differences below this many seconds are noise, whatever the ratio.
+MIN_SECONDS = 0.005
+
+
+def _phases(source, backend):
+    # Yields (phase, function) pairs; each function gets the previous result.
+    yield 'lex', lambda _: Lexer(source).tokenize()
+    yield 'parse', lambda tokens: Parser(tokens).parse()
+    yield 'resolve', lambda program: Resolver().resolve(program)
+    yield 'run', lambda program: backend(output=CollectSink()).interpret(program)
+
+
+def _time_phases(source, backend, repeat):
+    best = dict.fromkeys(PHASES, float('inf'))
+    for _ in range(repeat):
+        value = None
+        for phase, func in _phases(source, backend):
+            gc.collect()
+            start = time.perf_counter()
+            result = func(value)
+            best[phase] = min(best[phase], time.perf_counter() - start)
+            if phase != 'run':
+                value = result
+    return best
+
+
+def _peak_memory(source, backend):
+    # A separate pass, since tracing allocations slows every phase down.
+    peaks = {}
+    value = None
+    tracemalloc.start()
+    try:
+        for phase, func in _phases(source, backend):
+            gc.collect()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            result = func(value)
+            peaks[phase] = tracemalloc.get_traced_memory()[1] - base
+            if phase != 'run':
+                value = result
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def _sizes(source):
+    tokens = Lexer(source).tokenize()
+    program = Resolver().resolve(Parser(tokens).parse())
+    # Executed statements are counted once on the tree backend, since all
+    # backends run the same statements.
+    interpreter = Interpreter(output=CollectSink())
+    counters = CounterCollector().attach(interpreter)
+    interpreter.interpret(program)
+    return {
+        'bytes': len(source.encode('utf-8')),
+        'tokens': len(tokens),
+        'nodes': count_nodes(program),
+        'statements': sum(counters.statements.values()),
+    }
+
+
+def measure(name, scale, backend, repeat):
+    source = WORKLOADS[name](scale)
+    seconds = _time_phases(source, backend, repeat)
+    peaks = _peak_memory(source, backend)
+    return {
+        'sizes': _sizes(source),
+        'phases': {phase: {'seconds': seconds[phase], 'peak_bytes': peaks[phase]} for phase in PHASES},
+    }
+
+
+def _throughput(phase, sizes, seconds):
+    if phase == 'lex':
+        return f"{sizes['bytes'] / seconds / (1024 * 1024):10.2f} MB/s"
+    if phase == 'parse':
+        return f"{sizes['tokens'] / seconds:10,.0f} tokens/s"
+    if phase == 'resolve':
+        return f"{sizes['nodes'] / seconds:10,.0f} nodes/s"
+    return f"{sizes['statements'] / seconds:10,.0f} stmts/s"
+
+
+def format_results(results):
+    lines = [f"{'workload':<16} {'phase':<8} {'time':>10} {'throughput':>20} {'peak memory':>14}"]
+    for name, result in results['workloads'].items():
+        for phase, stats in result['phases'].items():
+            lines.append(f"{name:<16} {phase:<8} {stats['seconds']:9.4f}s "
+                         f"{_throughput(phase, result['sizes'], stats['seconds']):>20} "
+                         f"{stats['peak_bytes'] / 1024:11,.0f} KB")
+    return '\n'.join(lines)
+
+
+# Returns one line per phase whose time or peak memory grew by more than
+# `threshold` (0.10 = 10%) over the baseline; times also have to grow by
+# MIN_SECONDS.
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    regressions = []
+    for name, result in results['workloads'].items():
+        base = baseline['workloads'].get(name)
+        if base is None:
+            continue
+        for phase, stats in result['phases'].items():
+            base_stats = base['phases'].get(phase)
+            if base_stats is None:
+                continue
+            for key, label in (('seconds', 'time'), ('peak_bytes', 'peak memory')):
+                before, after = base_stats[key], stats[key]
+                if key == 'seconds' and after - before < MIN_SECONDS:
+                    continue
+                if before > 0 and after > before * (1 + threshold):
+                    regressions.append(f"{name} {phase}: {label} {after / before:.2f}x the baseline "
+                                       f"({before:.4g} -> {after:.4g})")
+    return regressions
+
+
+def _parse_args(argv):
+    arg_parser = argparse.ArgumentParser(prog='python -m benchmarks.suite')
+    arg_parser.add_argument('workloads', nargs='*', metavar='workload',
+                            help=f"workloads to run (default: all of {', '.join(WORKLOADS)})")
+    arg_parser.add_argument('--scale', type=float, default=1.0,
+                            help='size of the generated programs relative to the defaults')
+    arg_parser.add_argument('--backend', choices=sorted(BACKENDS), default='tree')
+    arg_parser.add_argument('--repeat', type=int, default=3, metavar='N',
+                            help='time every phase N times and keep the best (default: 3)')
+    arg_parser.add_argument('--save-baseline', metavar='FILE',
+                            help='write the results as JSON to FILE')
+    arg_parser.add_argument('--baseline', metavar='FILE',
+                            help='compare with results saved by --save-baseline')
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, metavar='R',
+                            help=f'relative slowdown reported as a regression (default: {DEFAULT_THRESHOLD})')
+    args = arg_parser.parse_args(argv)
+    for name in args.workloads:
+        if name not in WORKLOADS:
+            arg_parser.error(f"unknown workload {name!r}, expected one of {', '.join(WORKLOADS)}")
+    if args.repeat < 1:
+        arg_parser.error("--repeat must be positive")
+    if args.scale <= 0:
+        arg_parser.error("--scale must be positive")
+    return args
+
+
+def main(argv=None):
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    results = {
+        'scale': args.scale,
+        'backend': args.backend,
+        'python': platform.python_version(),
+        'workloads': {},
+    }
+    for name in args.workloads or WORKLOADS:
+        results['workloads'][name] = measure(name, args.scale, BACKENDS[args.backend], args.repeat)
+    print(format_results(results))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+        print(f"baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        for key in ('scale', 'backend', 'python'):
+            if baseline.get(key) != results[key]:
+                print(f"warning: baseline was taken with {key} {baseline.get(key)}, not {results[key]}",
+                      file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions over {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+# Synthetic LOL programs for benchmarks.suite. Every generator takes a scale
+# factor (1 gives the default size) and returns the source of one program.
+
+# The tree and closure backends run out of Python stack a little below 200
+# nested LOL calls, and the tree backend with hooks (which the suite uses to
+# count statements) a little above 100, so deep recursion repeats a walk to
+# this depth.
+RECURSION_DEPTH = 100
+
+
+def deep_recursion(scale=1.0):
+    rounds = max(1, int(300 * scale))
+    return f'''HAI 1.2
+HOW IZ I down YR n
+    BOTH SAEM n AN 0
+    O RLY?
+        YA RLY
+            FOUND YR 0
+    OIC
+    I HAS A m ITZ DIFF OF n AN 1
+    I HAS A r ITZ down YR m
+    FOUND YR SUM OF r AN 1
+IF U SAY SO
+I HAS A total ITZ 0
+IM IN YR walk UPPIN YR i TIL BOTH SAEM i AN {rounds}
+    I HAS A depth ITZ down YR {RECURSION_DEPTH}
+    total R SUM OF total AN depth
+IM OUTTA YR walk
+VISIBLE total
+KTHXBYE'''
+
+
+def _class(index, fields, methods):
+    lines = [f'HOW DUZ I thing{index}']
+    for field in range(fields):
+        lines.append(f'    I HAS A f{field} ITZ {field}')
+    for method in range(methods):
+        field = method % fields
+        lines += [
+            f'    HOW IZ I m{method} YR k',
+            f'        ME\'Z f{field} R SUM OF ME\'Z f{field} AN k',
+            f'        FOUND YR ME\'Z f{field}',
+            '    IF U SAY SO',
+        ]
+    lines.append('KTHX')
+    return lines
+
+
+def wide_classes(scale=1.0, fields=8, methods=6):
+    classes = max(1, int(60 * scale))
+    rounds = max(1, int(20 * scale))
+    lines = ['HAI 1.2']
+    for index in range(classes):
+        lines += _class(index, fields, methods)
+    lines.append('I HAS A total ITZ 0')
+    lines.append(f'IM IN YR use UPPIN YR i TIL BOTH SAEM i AN {rounds}')
+    for index in range(classes):
+        lines.append(f'    I HAS A t{index} ITZ A NEW thing{index}')
+        for method in range(methods):
+            lines.append(f'    I HAS A r{index}x{method} ITZ t{index}\'Z m{method} YR i')
+            lines.append(f'    total R SUM OF total AN r{index}x{method}')
+    lines.append('IM OUTTA YR use')
+    lines.append('VISIBLE total')
+    lines.append('KTHXBYE')
+    return '\n'.join(lines)
+
+
+def large_bukkits(scale=1.0):
+    n = max(1, int(100_000 * scale))
+    return f'''HAI 1.2
+I HAS A nums ITZ A BUKKIT
+I HAS A mixed ITZ A BUKKIT
+IM IN YR fill UPPIN YR i TIL BOTH SAEM i AN {n}
+    nums'Z ITZ i R i
+    I HAS A half ITZ QUOSHUNT OF i AN 2
+    mixed'Z ITZ i R half
+IM OUTTA YR fill
+I HAS A total ITZ 0
+IM IN YR walk UPPIN YR i TIL BOTH SAEM i AN {n}
+    I HAS A item ITZ nums'Z ITZ i
+    total R SUM OF total AN item
+IM OUTTA YR walk
+VISIBLE total
+VISIBLE SUMZ YR nums
+VISIBLE BIGGEST YR mixed
+I HAS A front ITZ SLYCE YR nums AN YR 0 AN YR {n // 2}
+I HAS A sums ITZ ZIPWIF YR "SUM OF" AN YR nums AN YR mixed
+VISIBLE SUMZ YR front
+VISIBLE SUMZ YR sums
+I HAS A sparse ITZ A BUKKIT
+IM IN YR scatter UPPIN YR i TIL BOTH SAEM i AN {max(1, n // 100)}
+    I HAS A at ITZ PRODUKT OF i AN 5000
+    sparse'Z ITZ at R i
+IM OUTTA YR scatter
+VISIBLE sparse
+KTHXBYE'''
+
+
+_STRAIGHT_LINE = '''a R SUM OF a AN {i}
+b R DIFF OF b AN a
+c R PRODUKT OF a AN 3
+d R QUOSHUNT OF c AN 7
+s R "step {i}"
+BOTH SAEM a AN b
+O RLY?
+    YA RLY
+        b R SUM OF b AN 1
+    NO WAI
+        b R DIFF OF b AN 1
+OIC
+'''
+
+
+def straight_line(scale=1.0):
+    blocks = max(1, int(20_000 * scale))
+    return ('HAI 1.2\nI HAS A a ITZ 0\nI HAS A b ITZ 0\nI HAS A c ITZ 0\nI HAS A d ITZ 0\nI HAS A s ITZ ""\n'
+            + ''.join(_STRAIGHT_LINE.format(i=i) for i in range(blocks))
+            + 'VISIBLE a b c d s\nKTHXBYE')
+
+
+def output_heavy(scale=1.0):
+    n = max(1, int(100_000 * scale))
+    return f'''HAI 1.2
+I HAS A ratio ITZ 0.5
+IM IN YR print UPPIN YR i TIL BOTH SAEM i AN {n}
+    I HAS A scaled ITZ PRODUKT OF i AN ratio
+    VISIBLE "line" i "of" {n} scaled WIN
+IM OUTTA YR print
+KTHXBYE'''
+
+
+WORKLOADS = {
+    'deep_recursion': deep_recursion,
+    'wide_classes': wide_classes,
+    'large_bukkits': large_bukkits,
+    'straight_line': straight_line,
+    'output_heavy': output_heavy,
+}
@@ -0,0 +1,50 @@
+import unittest
+
+from LOLpython.errors import InterpreterError
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.output import CollectSink
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+OUTER_NOOB = '''HAI 1.2
+I HAS A x
+IM IN YR l UPPIN YR i TIL BOTH SAEM i AN 2
+    I HAS A y ITZ 1
+    VISIBLE x i
+    IM IN YR m UPPIN YR j TIL BOTH SAEM j AN 1
+        I HAS A z
+        VISIBLE x y z
+    IM OUTTA YR m
+IM OUTTA YR l
+KTHXBYE'''
+
+UNDECLARED = '''HAI 1.2
+IM IN YR l UPPIN YR i TIL BOTH SAEM i AN 2
+    I HAS A y ITZ 1
+    VISIBLE nope
+IM OUTTA YR l
+KTHXBYE'''
+
+
+def _run(backend, source):
+    output = CollectSink()
+    backend(output=output).interpret(Resolver().resolve(Parser(Lexer(source).tokenize()).parse()))
+    return output.getvalue()
+
+
+class ScopedLoopTest(unittest.TestCase):
+    def test_outer_noob_is_declared_in_loop_scopes(self):
+        for name, backend in BACKENDS.items():
+            with self.subTest(backend=name):
+                self.assertEqual(_run(backend, OUTER_NOOB), 'NOOB 0\nNOOB 1 NOOB\nNOOB 1\nNOOB 1 NOOB\n')
+
+    def test_undeclared_in_loop_scope(self):
+        for name, backend in BACKENDS.items():
+            with self.subTest(backend=name):
+                with self.assertRaisesRegex(InterpreterError, "Undeclared variable 'nope'"):
+                    _run(backend, UNDECLARED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from LOLpython import parallel
+from LOLpython.lexer import Lexer
+from LOLpython.main import BACKENDS
+from LOLpython.memo import MemoTable
+from LOLpython.output import CollectSink
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+SCRIPT = '''HAI 1.2
+HOW IZ I sq YR x
+    FOUND YR PRODUKT OF x AN x
+IF U SAY SO
+I HAS A b ITZ A BUKKIT
+IM IN YR fill UPPIN YR i TIL BOTH SAEM i AN 10
+    b'Z ITZ i R i
+IM OUTTA YR fill
+VISIBLE SUMZ YR PARMAP YR sq AN YR b
+KTHXBYE'''
+
+
+class SerialParmapTest(unittest.TestCase):
+    def setUp(self):
+        parallel.configure(workers=1)
+
+    def tearDown(self):
+        parallel.configure()
+
+    def test_calls_go_through_the_running_backend(self):
+        program = Resolver().resolve(Parser(Lexer(SCRIPT).tokenize()).parse())
+        for name, backend in BACKENDS.items():
+            with self.subTest(backend=name):
+                memo, output = MemoTable(), CollectSink()
+                backend(memo=memo, output=output).interpret(program)
+                self.assertEqual(output.getvalue(), '285\n')
+                self.assertEqual((memo.stats.misses, memo.stats.stores), (10, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from LOLpython.errors import InterpreterError
+from LOLpython.lexer import Lexer
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+
+
+def _resolve(body):
+    return Resolver().resolve(Parser(Lexer(f'HAI 1.2\n{body}\nKTHXBYE').tokenize()).parse())
+
+
+class BuiltinNameTest(unittest.TestCase):
+    def test_builtin_names_are_rejected(self):
+        bodies = [
+            'HOW IZ I SUMZ YR x\n    FOUND YR "mine"\nIF U SAY SO',
+            'HOW IZ I f YR PARMAP\n    FOUND YR 1\nIF U SAY SO',
+            'I HAS A BIGGEST ITZ 1',
+            'SLYCE R 2',
+            'IM IN YR l UPPIN YR ZIPWIF TIL BOTH SAEM ZIPWIF AN 2\nIM OUTTA YR l',
+            'HOW DUZ I SMALLEST\n    I HAS A a ITZ 1\nKTHX',
+        ]
+        for body in bodies:
+            with self.subTest(body=body):
+                with self.assertRaisesRegex(InterpreterError, "is a built-in function"):
+                    _resolve(body)
+
+    def test_members_may_use_builtin_names(self):
+        _resolve('HOW DUZ I c\n    I HAS A SUMZ ITZ 1\nKTHX')
+
+
+if __name__ == '__main__':
+    unittest.main()
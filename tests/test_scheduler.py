@@ -0,0 +1,44 @@
+import unittest
+
+from LOLpython.lexer import Lexer
+from LOLpython.parser import Parser
+from LOLpython.resolver import Resolver
+from LOLpython.scheduler import Scheduler
+
+CRASHING = '''HAI 1.2
+I HAS A b ITZ A BUKKIT
+VISIBLE "before"
+b'Z ITZ -1 R 5
+VISIBLE "after"
+KTHXBYE'''
+
+HEALTHY = '''HAI 1.2
+I HAS A total ITZ 0
+IM IN YR count UPPIN YR i TIL BOTH SAEM i AN 500
+    total R SUM OF total AN i
+IM OUTTA YR count
+VISIBLE total
+KTHXBYE'''
+
+
+def _program(source):
+    return Resolver().resolve(Parser(Lexer(source).tokenize()).parse())
+
+
+class SchedulerTest(unittest.TestCase):
+    def test_crash_fails_only_its_own_task(self):
+        scheduler = Scheduler(slice_steps=10)
+        crashing = scheduler.spawn(_program(CRASHING), 'crashing')
+        healthy = scheduler.spawn(_program(HEALTHY), 'healthy')
+        stats = scheduler.run()
+        self.assertEqual(crashing.status, 'failed')
+        self.assertIsInstance(crashing.error, IndexError)
+        self.assertEqual(crashing.output.getvalue(), 'before\n')
+        self.assertEqual(healthy.status, 'done')
+        self.assertIsNone(healthy.error)
+        self.assertEqual(healthy.output.getvalue(), '124750\n')
+        self.assertEqual(stats.failed, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()